@@ -7,10 +7,11 @@ from datetime import datetime, timezone
 import requests
 import json
 import numpy as np
-import threading
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import HTTPException
 from csv_analyzer import analyze_uploaded_trades, FreeTierLimitExceeded
+from benchmark import cache_stats as benchmark_cache_stats
+from rate_limiter import create_rate_limiter
 
 # Load env vars early so they are available at module scope (picked up by gunicorn too)
 load_dotenv()
@@ -25,6 +26,13 @@ _ENV_VAR_MANIFEST = (
     {"name": "PORT",             "required": False, "description": "Port Flask listens on (defaults to 5001)"},
     {"name": "FLASK_DEBUG",      "required": False, "description": "Enable Flask debug mode"},
     {"name": "ALLOWED_ORIGINS",  "required": False, "description": "Comma-separated CORS origins; defaults to * (all) if not set"},
+    {"name": "BENCHMARK_CACHE_DIR", "required": False, "description": "Directory for the persistent benchmark price cache; disabled if not set"},
+    {"name": "OPTIMIZER_WORKERS", "required": False, "description": "Worker processes for MACD parameter optimisation ('auto' = all CPUs); 1 if not set"},
+    {"name": "BACKTEST_CACHE_DIR", "required": False, "description": "Directory for the shared on-disk MACD backtest result cache; memory only if not set"},
+    {"name": "MARKET_DATA_DIR", "required": False, "description": "Directory of <SYMBOL>.parquet/.csv daily bars used instead of yfinance for all price data; downloads if not set"},
+    {"name": "SCREENER_SNAPSHOT_PATH", "required": False, "description": "SQLite file for background screener scores shared by all workers; in-memory if not set"},
+    {"name": "SCREENER_REFRESH_SECONDS", "required": False, "description": "Seconds between background screener refreshes (0 = read-only web process); 900 if not set"},
+    {"name": "RATE_LIMIT_DB_PATH", "required": False, "description": "SQLite file for rate limit counts shared across workers; in-memory if not set"},
 )
 
 
@@ -98,12 +106,10 @@ _MAX_UPLOAD_BYTES = 5 * _MB
 # Free tier: max analyses per IP per calendar month (UTC)
 MONTHLY_ANALYSIS_LIMIT = 5
 
-# In-memory store: maps (ip, "YYYY-MM") -> request count.
-# Counts reset when the server restarts — users could exceed the monthly cap
-# across restarts. Acceptable for the free tier; replace with persistent
-# storage (e.g. Redis) if stricter enforcement is needed.
-_rate_limit_store: dict[tuple[str, str], int] = {}
-_rate_limit_lock = threading.Lock()
+# Monthly usage counters. In-memory by default (per process); set
+# RATE_LIMIT_DB_PATH to share one SQLite counter file between gunicorn
+# workers so the cap holds across processes and restarts.
+_rate_limiter = create_rate_limiter()
 
 
 def _get_client_ip() -> str:
@@ -123,24 +129,25 @@ def _get_month_key() -> str:
 
 def _check_rate_limit(ip: str) -> bool:
     """Return True if the IP is within the monthly limit, False if exceeded."""
-    key = (ip, _get_month_key())
-    with _rate_limit_lock:
-        count = _rate_limit_store.get(key, 0)
-        if count >= MONTHLY_ANALYSIS_LIMIT:
-            return False
-        _rate_limit_store[key] = count + 1
-    return True
+    return _rate_limiter.try_acquire(ip, _get_month_key(), MONTHLY_ANALYSIS_LIMIT)
 
 # Try to import trading modules with error handling
 
 try:
-    from test_against_SP import get_spy_investment, generate_spy_monthly_performance
-    from MACD_trading import backtest_strategy_MACD, generate_monthly_performance
-    from optimize_MACD import optimize_macd_parameters
+    from test_against_SP import download_spy_data, get_spy_investment, generate_spy_monthly_performance
+    from MACD_trading import backtest_strategy_MACD, generate_monthly_performance, load_price_panel
+    from optimize_MACD import optimize_macd_parameters, OPTIMIZATION_MODES
+    from backtest_pool import optimizer_workers
+    from backtest_cache import cache_stats as backtest_cache_stats
+    from market_data import cache_stats as market_data_cache_stats
+    from screener_cache import cache_stats as screener_cache_stats
+    from screener_snapshot import current_snapshot, start_background_refresh
     TRADING_MODULES_AVAILABLE = True
 except ImportError as e:
     logging.error(f"Trading modules not available: {e}")
     TRADING_MODULES_AVAILABLE = False
+    def download_spy_data(*args, **kwargs):
+        raise RuntimeError("Trading modules not available")
     def get_spy_investment(*args, **kwargs):
         raise RuntimeError("Trading modules not available")
     def generate_spy_monthly_performance(*args, **kwargs):
@@ -160,6 +167,11 @@ CORS(app, resources={
 
 logger = logging.getLogger(__name__)
 
+# Recompute screener scores in the background so requests only read the snapshot
+# (only when SCREENER_REFRESH_SECONDS or SCREENER_SNAPSHOT_PATH is set)
+if TRADING_MODULES_AVAILABLE and not os.getenv("TESTING"):
+    start_background_refresh()
+
 @app.after_request
 def set_security_headers(response):
     response.headers["Content-Security-Policy"] = CSP_POLICY
@@ -209,6 +221,17 @@ def config():
     }), 200
 
 
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss counters of the in-process benchmark, backtest, price and screener caches, for monitoring."""
+    stats = {"benchmark": benchmark_cache_stats()}
+    if TRADING_MODULES_AVAILABLE:
+        stats["backtest"] = backtest_cache_stats()
+        stats["market_data"] = market_data_cache_stats()
+        stats["screener"] = screener_cache_stats()
+    return jsonify(stats), 200
+
+
 @app.route("/webhookcallback", methods=["POST"])
 def hook():
     try:
@@ -233,11 +256,15 @@ def MACD_strategy():
         end_date_str = request.args.get('end_date')
         initial_balance = request.args.get('initial_balance', default=100000, type=int)
         optimize = request.args.get('optimize', default='true').lower() == 'true'
+        optimization_mode = request.args.get('optimization_mode', default='bayesian').lower()
         
         # Validate required parameters
         if not stocks or not start_date_str or not end_date_str:
             return jsonify({"error": "Missing required parameters: stocks, start_date, end_date"}), 400
 
+        if optimization_mode not in OPTIMIZATION_MODES:
+            return jsonify({"error": f"Invalid optimization_mode. Choose: {', '.join(OPTIMIZATION_MODES)}"}), 400
+
         stock_list = [stock.strip() for stock in stocks.split(',') if stock.strip()]
         
         try:
@@ -249,13 +276,23 @@ def MACD_strategy():
         logger.info(f"Processing MACD strategy for stocks: {stock_list}, dates: {start_date_str} to {end_date_str}, optimize: {optimize}")
         
         if optimize:
+            # Download prices (and SPY) in one grouped call; every optimizer
+            # evaluation and the final backtests below reuse them
+            price_data = load_price_panel(stock_list, start_date_dt, end_date_dt)
+            # One candidate per worker process each GP iteration
+            workers = optimizer_workers()
+
             # First optimize parameters for the given stocks and dates
             optimization_result = optimize_macd_parameters(
                 symbols=stock_list,
                 start_date=start_date_dt,
                 end_date=end_date_dt,
                 initial_balance=initial_balance,
-                n_iterations=15  # Reduced for faster response time
+                n_iterations=15,  # Reduced for faster response time
+                price_data=price_data,
+                mode=optimization_mode,
+                batch_size=workers,
+                max_workers=workers
             )
             
             optimized_params = optimization_result['optimized_params']
@@ -268,7 +305,8 @@ def MACD_strategy():
                 initial_balance,
                 fastperiod=optimized_params['fastperiod'],
                 slowperiod=optimized_params['slowperiod'],
-                signalperiod=optimized_params['signalperiod']
+                signalperiod=optimized_params['signalperiod'],
+                price_data=price_data
             )
             
             formatted_result = str_result.replace("\n", "<br />")
@@ -281,7 +319,8 @@ def MACD_strategy():
                 initial_balance,
                 fastperiod=optimized_params['fastperiod'],
                 slowperiod=optimized_params['slowperiod'],
-                signalperiod=optimized_params['signalperiod']
+                signalperiod=optimized_params['signalperiod'],
+                price_data=price_data
             )
             
             # Return both the backtest result and optimized parameters
@@ -295,8 +334,10 @@ def MACD_strategy():
                 "monthly_performance": monthly_data
             }), 200
         else:
-            # Run backtest with default parameters (legacy behavior)
-            str_result, _ = backtest_strategy_MACD(stock_list, start_date_dt, end_date_dt, initial_balance)
+            # Run backtest with default parameters (legacy behavior), from one
+            # grouped download that also caches SPY for /spy-investment
+            price_data = load_price_panel(stock_list, start_date_dt, end_date_dt)
+            str_result, _ = backtest_strategy_MACD(stock_list, start_date_dt, end_date_dt, initial_balance, price_data=price_data)
             formatted_result = str_result.replace("\n", "<br />")
             return jsonify({"backtest_result": formatted_result}), 200
             
@@ -327,13 +368,15 @@ def spy_investment():
 
         logger.info(f"Processing SPY investment for dates: {start_date_str} to {end_date_str}")
 
-        final_balance = get_spy_investment(start_date, end_date, initial_balance)
+        # One download shared by the final balance and the monthly curve
+        spy_data = download_spy_data(start_date, end_date)
+        final_balance = get_spy_investment(start_date, end_date, initial_balance, data=spy_data)
         # If get_spy_investment returns an error tuple, handle it
         if isinstance(final_balance, tuple) and len(final_balance) == 2 and isinstance(final_balance[1], int):
             error_msg, status = final_balance
             return jsonify({"error": error_msg}), status
 
-        monthly_data = generate_spy_monthly_performance(start_date, end_date, initial_balance)
+        monthly_data = generate_spy_monthly_performance(start_date, end_date, initial_balance, data=spy_data)
 
         return jsonify({
             "final_balance": final_balance,
@@ -346,6 +389,7 @@ def spy_investment():
 
 # Expose for patching in tests only if available
 import sys
+sys.modules[__name__].download_spy_data = download_spy_data
 sys.modules[__name__].get_spy_investment = get_spy_investment
 sys.modules[__name__].generate_spy_monthly_performance = generate_spy_monthly_performance
 
@@ -387,11 +431,15 @@ def get_optimal_stocks():
             return jsonify({"error": "Please choose a number between 1 and 10 inclusive"})
         
         screener = StockScreener()
+        snapshot = current_snapshot()
         
         try:
             is_deployment = os.environ.get('PORT') is not None
             
-            if is_deployment:
+            if snapshot is not None:
+                # Scores precomputed by the background refresher
+                selected_stocks = screener.select_from_snapshot(snapshot, max_stocks, timeframe)
+            elif is_deployment:
                 # Use ultra-fast method for deployment
                 selected_stocks = screener.screen_stocks_fast_deployment(
                     timeframe=timeframe, 
@@ -420,8 +468,9 @@ def get_optimal_stocks():
             "selected_stocks": selected_stocks,
             "timeframe": timeframe,
             "risk": risk,
-            "total_candidates_screened": int(len(selected_stocks) * 10),  # Rough estimate
+            "total_candidates_screened": snapshot.universe_size if snapshot else int(len(selected_stocks) * 10),  # Rough estimate without a snapshot
             "selection_criteria": f"MACD-optimized for {timeframe}-term trading",
+            "snapshot": snapshot.describe() if snapshot else None,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -448,11 +497,15 @@ def auto_trade():
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')  
         initial_balance = request.args.get('initial_balance', default=100000, type=int)
+        optimization_mode = request.args.get('optimization_mode', default='bayesian').lower()
         
         # Validate parameters
         valid_timeframes = ['short', 'medium', 'long']
         if timeframe not in valid_timeframes:
             return jsonify({"error": "Invalid timeframe. Choose: short, medium, long"}), 400
+
+        if optimization_mode not in OPTIMIZATION_MODES:
+            return jsonify({"error": f"Invalid optimization_mode. Choose: {', '.join(OPTIMIZATION_MODES)}"}), 400
             
         if max_stocks < 1 or max_stocks > 10:
             return jsonify({"error": "max_stocks must be between 1 and 10"}), 400
@@ -470,12 +523,16 @@ def auto_trade():
 
         # Select optimal stocks with timeout handling
         screener = StockScreener()
+        snapshot = current_snapshot()
         
         try:
             # Check if we're in deployment
             is_deployment = os.environ.get('PORT') is not None
             
-            if is_deployment:
+            if snapshot is not None:
+                # Scores precomputed by the background refresher
+                selected_stocks = screener.select_from_snapshot(snapshot, max_stocks, timeframe)
+            elif is_deployment:
                 # Always use fast method for auto-trade in deployment
                 selected_stocks = screener.screen_stocks_fast_deployment(
                     timeframe=timeframe, 
@@ -506,13 +563,22 @@ def auto_trade():
         # Get the stock symbols for trading
         stock_symbols = [stock['symbol'] for stock in selected_stocks]
         
-        # Use the MACD strategy with Bayesian optimization
+        # Download prices once for the optimizer and the final backtests
+        price_data = load_price_panel(stock_symbols, start_date_dt, end_date_dt)
+        # One candidate per worker process each GP iteration
+        workers = optimizer_workers()
+
+        # Use the MACD strategy with Bayesian (or exhaustive grid) optimization
         optimization_result = optimize_macd_parameters(
             symbols=stock_symbols,
             start_date=start_date_dt,
             end_date=end_date_dt,
             initial_balance=initial_balance,
-            n_iterations=15  # Balanced performance vs speed (open to change)
+            n_iterations=15,  # Balanced performance vs speed (open to change)
+            price_data=price_data,
+            mode=optimization_mode,
+            batch_size=workers,
+            max_workers=workers
         )
         
         optimized_params = optimization_result['optimized_params']
@@ -525,7 +591,8 @@ def auto_trade():
             initial_balance,
             fastperiod=optimized_params['fastperiod'],
             slowperiod=optimized_params['slowperiod'],
-            signalperiod=optimized_params['signalperiod']
+            signalperiod=optimized_params['signalperiod'],
+            price_data=price_data
         )
         
         # Generate monthly performance data
@@ -536,7 +603,8 @@ def auto_trade():
             initial_balance,
             fastperiod=optimized_params['fastperiod'],
             slowperiod=optimized_params['slowperiod'],
-            signalperiod=optimized_params['signalperiod']
+            signalperiod=optimized_params['signalperiod'],
+            price_data=price_data
         )
 
         # Calculate performance metrics
@@ -549,7 +617,8 @@ def auto_trade():
                 "selection_criteria": f"MACD-optimized for {timeframe}-term trading",
                 "timeframe": timeframe,
                 "risk": risk,
-                "total_candidates_screened": len(selected_stocks) * 10  # Rough estimate
+                "total_candidates_screened": snapshot.universe_size if snapshot else len(selected_stocks) * 10,  # Rough estimate without a snapshot
+                "snapshot": snapshot.describe() if snapshot else None
             },
             "trading_results": {
                 "backtest_result": str_result.replace("\n", "<br />"),
@@ -560,7 +629,7 @@ def auto_trade():
                 "monthly_performance": monthly_data
             },
             "summary": {
-                "strategy": "MACD with Bayesian Optimization",
+                "strategy": f"MACD with {'Exhaustive Grid' if optimization_mode == 'exhaustive' else 'Bayesian'} Optimization",
                 "period": f"{start_date_str} to {end_date_str}",
                 "stocks_traded": stock_symbols,
                 "performance": f"{total_return:+.2f}%",
@@ -1,38 +1,60 @@
 """
 Fetches historical returns for a given ticker over the date range of uploaded trades.
+
+Closes come from the configured market-data provider (see
+market_data_provider.py; yfinance by default). When $BENCHMARK_CACHE_DIR is
+set, daily closes are kept in a persistent price store (see price_store.py)
+and only date ranges missing from disk are fetched.
 """
 
 from __future__ import annotations
 
 import logging
 import math
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 
-import yfinance as yf
+import pandas as pd
+
+from market_data_provider import get_provider
+from price_store import get_price_store
+from ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
-# Simple in-process cache: (ticker, start_str, end_str) -> result dict or None
-_cache: dict[tuple[str, str, str], dict | None] = {}
+# In-process cache: (ticker, start_str, end_str) -> result dict or None.
+# None (no data / failed download) expires sooner so transient errors recover.
+BENCHMARK_CACHE_MAXSIZE = 512
+BENCHMARK_CACHE_TTL_SECONDS = 6 * 60 * 60
+BENCHMARK_CACHE_NEGATIVE_TTL_SECONDS = 5 * 60
+_cache = TTLCache(
+    maxsize=BENCHMARK_CACHE_MAXSIZE,
+    ttl=BENCHMARK_CACHE_TTL_SECONDS,
+    negative_ttl=BENCHMARK_CACHE_NEGATIVE_TTL_SECONDS,
+)
 
 # Minimum number of trading day rows required for a meaningful return
 MIN_TRADING_DAYS = 2
 
+# Longest a request waits for its batch of benchmark downloads (see fetch_benchmarks)
+BENCHMARK_FETCH_DEADLINE_SECONDS = 10.0
 
-def fetch_benchmark(trades: list[dict], ticker: str) -> dict | None:
-    """Return return data for the given ticker covering the date range of the given trades.
+# Shared by all requests so timed-out downloads never hold up the caller
+_fetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="benchmark")
 
-    Extracts the earliest and latest trade dates, fetches adjusted close prices
-    via yfinance, and returns a summary dict for benchmarking.
-    Returns None if trades are empty, data is unavailable, or the period is too short.
-    """
-    if not trades:
-        return None
 
-    if not ticker or not ticker.strip():
-        logger.warning("fetch_benchmark called with empty ticker")
-        return None
+def _download_closes(ticker: str, start: datetime, end: datetime) -> pd.Series:
+    """Download adjusted daily closes for ticker from start to end (both inclusive)."""
+    # Provider end dates are exclusive, so add one day to include the last trade date
+    fetch_end = end + timedelta(days=1)
+    data = get_provider().download([ticker], start, fetch_end)[ticker]
+    if data.empty:
+        return pd.Series(dtype=float, name="close")
+    return data["close"]
+
 
+def _trade_date_range(trades: list[dict]) -> tuple[datetime, datetime] | None:
+    """Return the earliest and latest valid trade dates, or None if there are none."""
     dates = []
     for trade in trades:
         d = trade.get("date")
@@ -44,54 +66,128 @@ def fetch_benchmark(trades: list[dict], ticker: str) -> dict | None:
 
     if not dates:
         return None
+    return min(dates), max(dates)
+
+
+def fetch_benchmark(trades: list[dict], ticker: str) -> dict | None:
+    """Return return data for the given ticker covering the date range of the given trades.
+
+    Extracts the earliest and latest trade dates, fetches adjusted close prices
+    from the market-data provider, and returns a summary dict for benchmarking.
+    Returns None if trades are empty, data is unavailable, or the period is too short.
+    """
+    if not trades:
+        return None
+
+    if not ticker or not ticker.strip():
+        logger.warning("fetch_benchmark called with empty ticker")
+        return None
+
+    date_range = _trade_date_range(trades)
+    if date_range is None:
+        return None
+
+    return _fetch_range(ticker, *date_range)
 
-    start = min(dates)
-    end = max(dates)
 
+def fetch_benchmarks(
+    trades: list[dict],
+    tickers: list[str],
+    deadline_seconds: float = BENCHMARK_FETCH_DEADLINE_SECONDS,
+) -> dict[str, dict | None]:
+    """Fetch several benchmarks over the trades' date range concurrently.
+
+    The date range is computed once and every uncached ticker is downloaded
+    in parallel, so latency is that of the slowest ticker rather than the sum.
+    Tickers still running after ``deadline_seconds`` are reported as None;
+    their downloads finish in the background and populate the cache for
+    later requests.
+
+    Returns a dict mapping each requested ticker to its fetch_benchmark result.
+    """
+    results: dict[str, dict | None] = {ticker: None for ticker in tickers}
+    if not trades:
+        return results
+
+    date_range = _trade_date_range(trades)
+    if date_range is None:
+        return results
+    start, end = date_range
+
+    futures: dict[Future, str] = {}
+    for ticker in results:
+        if not ticker or not ticker.strip():
+            logger.warning("fetch_benchmarks called with empty ticker")
+            continue
+        futures[_fetch_executor.submit(_fetch_range, ticker, start, end)] = ticker
+
+    done, pending = wait(futures, timeout=deadline_seconds)
+    for future in done:
+        ticker = futures[future]
+        try:
+            results[ticker] = future.result()
+        except Exception as exc:
+            logger.warning("%s benchmark fetch failed: %s", ticker, exc)
+    for future in pending:
+        logger.warning(
+            "%s benchmark fetch exceeded the %.1fs deadline", futures[future], deadline_seconds
+        )
+
+    return results
+
+
+def _fetch_range(ticker: str, start: datetime, end: datetime) -> dict | None:
+    """Fetch and summarise ticker closes from start to end, using the module cache.
+
+    Concurrent requests for the same key share a single download.
+    """
     cache_key = (ticker, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
-    if cache_key in _cache:
-        return _cache[cache_key]
+    return _cache.get_or_load(cache_key, lambda: _load_range(ticker, start, end))
 
-    # yfinance end parameter is exclusive, so add one day to include the last trade date
-    fetch_end = end + timedelta(days=1)
 
+def cache_stats() -> dict:
+    """Hit/miss counters of the in-process benchmark cache, for monitoring."""
+    return _cache.stats()
+
+
+def _load_range(ticker: str, start: datetime, end: datetime) -> dict | None:
+    """Download closes for ticker and build the benchmark summary (uncached)."""
     try:
-        data = yf.download(ticker, start=start, end=fetch_end, auto_adjust=True, progress=False)
-        data.columns = data.columns.str.lower()
+        store = get_price_store()
+        if store is None:
+            closes = _download_closes(ticker, start, end)
+        else:
+            closes = store.get_closes(ticker, start.date(), end.date(), _download_closes)
     except Exception as exc:
         logger.warning("%s benchmark fetch failed: %s", ticker, exc)
-        _cache[cache_key] = None
         return None
 
-    if data.empty:
+    if closes.empty:
         logger.warning("%s benchmark: no data available for %s to %s", ticker, start.date(), end.date())
-        _cache[cache_key] = None
         return None
 
-    data = data.sort_index()
+    closes = closes.sort_index()
 
-    if len(data) < MIN_TRADING_DAYS:
+    if len(closes) < MIN_TRADING_DAYS:
         logger.warning(
             "%s benchmark: only %d trading day(s) of data for %s to %s — period too short",
-            ticker, len(data), start.date(), end.date(),
+            ticker, len(closes), start.date(), end.date(),
         )
-        _cache[cache_key] = None
         return None
 
-    start_price = float(data["close"].iloc[0])
-    end_price = float(data["close"].iloc[-1])
+    start_price = float(closes.iloc[0])
+    end_price = float(closes.iloc[-1])
 
     if start_price == 0:
         logger.warning("%s benchmark: start price is zero, cannot compute return", ticker)
-        _cache[cache_key] = None
         return None
 
     total_return_pct = round((end_price - start_price) / start_price * 100, 4)
 
     # Actual trading day dates yfinance used (may differ from trade dates if
     # the trade date fell on a weekend or holiday)
-    actual_start_date = data.index[0].strftime("%Y-%m-%d")
-    actual_end_date = data.index[-1].strftime("%Y-%m-%d")
+    actual_start_date = closes.index[0].strftime("%Y-%m-%d")
+    actual_end_date = closes.index[-1].strftime("%Y-%m-%d")
 
     result = {
         "start_date": start.strftime("%Y-%m-%d"),
@@ -102,7 +198,6 @@ def fetch_benchmark(trades: list[dict], ticker: str) -> dict | None:
         "end_price": round(end_price, 4),
         "total_return_pct": total_return_pct,
     }
-    _cache[cache_key] = result
     return result
 
 
@@ -113,8 +208,8 @@ def compare_user_return_to_benchmarks(
 ) -> dict:
     """Compare the user's after-cost return against one or more benchmark tickers.
 
-    For each ticker, fetches the benchmark return over the same date range as
-    the trades, then computes the difference (alpha). Returns a summary dict
+    Fetches every ticker's benchmark return over the same date range as the
+    trades concurrently (see fetch_benchmarks), then computes the difference (alpha). Returns a summary dict
     with per-ticker results and an overall best/worst comparison.
 
     Returns an empty comparisons list if trades are empty or no benchmark data
@@ -128,9 +223,11 @@ def compare_user_return_to_benchmarks(
     if tickers is None:
         tickers = ["SPY", "QQQ"]
 
+    benchmarks = fetch_benchmarks(trades, tickers)
+
     comparisons = []
     for ticker in tickers:
-        benchmark = fetch_benchmark(trades, ticker)
+        benchmark = benchmarks[ticker]
         if benchmark is None:
             comparisons.append({
                 "ticker": ticker,
@@ -13,21 +13,20 @@ import logging
 import math
 import re
 import statistics
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Sequence
+from typing import Any, Iterable, Iterator, Sequence
+
+import numpy as np
 
 from transaction_costs import calculate_commissions, calculate_slippage, calculate_bid_ask_spread, DEFAULT_COMMISSION_PER_TRADE, DEFAULT_SLIPPAGE_PCT, DEFAULT_SPREAD_PCT, MIN_CLOSED_TRADES_FOR_CONCLUSIONS, check_trade_count_sufficiency
 from statistical_tests import run_significance_tests
-from benchmark import fetch_benchmark
+from benchmark import fetch_benchmarks
+from trade_table import TradeTable
 
 SPY_TICKER = "SPY"
 QQQ_TICKER = "QQQ"
 
-def _normalize_action(action):
-    """Normalize trade action to uppercase, handling None and whitespace."""
-    return (str(action).strip().upper() if action is not None else "")
-
-
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +40,26 @@ class FreeTierLimitExceeded(ValueError):
     """Raised when the free tier trade limit is exceeded."""
     pass
 
+
+class CSVIngestError(ValueError):
+    """Raised by ingest_csv when an upload is rejected before trades are parsed.
+
+    ``format`` is the detected format ('detailed' or 'summary'), or None when the
+    file was rejected before its header could be classified.
+    """
+
+    def __init__(self, message: str, format: str | None = None):
+        super().__init__(message)
+        self.format = format
+
+
+@dataclass
+class IngestedCSV:
+    """Result of ingest_csv: the detected format plus its parsed payload."""
+    format: str                                       # "detailed" | "summary"
+    trades: list[dict] = field(default_factory=list)  # detailed uploads
+    summary: dict | None = None                       # summary uploads
+
 REQUIRED_DETAILED_COLUMNS: frozenset[str] = frozenset(
     {"date", "symbol", "action", "price", "shares"}
 )
@@ -64,6 +83,8 @@ _BINARY_MAGIC: tuple[bytes, ...] = (
 _FORMULA_CHARS: frozenset[str] = frozenset({"=", "+", "@"})
 # First characters that mark a cell as unsafe (formula chars + negative sign)
 _UNSAFE_FIRST_CHARS: frozenset[str] = _FORMULA_CHARS | frozenset({"-"})
+# Longest signature in _BINARY_MAGIC; only this many leading characters are inspected
+_MAGIC_PREFIX_LEN: int = max(len(magic) for magic in _BINARY_MAGIC)
 
 # Valid ticker: uppercase letters, digits, dots, hyphens; 1-20 chars total
 _SYMBOL_RE = re.compile(r"^[A-Z0-9]([A-Z0-9.\-]{0,19})?$")
@@ -123,38 +144,84 @@ def _parse_iso_date(value: str | None, field: str, row_num: int) -> datetime:
     return parsed
 
 
-def _assert_content_safe(csv_data: str) -> None:
-    """Raise ValueError if csv_data looks like a binary file or contains formula injection."""
+_UNSAFE_CELL_MESSAGE = (
+    "Your file contains a cell that cannot be processed safely "
+    "(e.g. a value starting with =, +, @, or -). "
+    "Please export a plain CSV from your trading platform."
+)
+
+
+def _is_unsafe_cell(cell: str) -> bool:
+    """Return True if a cell would be executed as a formula by spreadsheet tools.
+
+    Numeric cells (including negative numbers and scientific notation) are safe.
+    The first-character test runs before the float() attempt so ordinary cells
+    never pay for a failed conversion.
+    """
+    stripped = cell.strip()
+    return bool(stripped) and stripped[0] in _UNSAFE_FIRST_CHARS and not _is_numeric_cell(stripped)
+
+
+def _assert_not_binary(csv_data: str) -> None:
+    """Raise ValueError if csv_data starts with a binary file signature or contains null bytes."""
     # Strip BOM at string level before encoding so it cannot hide binary signatures.
     # Use latin-1 (not utf-8) so each character maps to exactly one byte, preserving
     # extended-ASCII magic bytes like 0x89 (PNG) and 0x8b (GZIP) that would become
-    # two-byte sequences in utf-8.
+    # two-byte sequences in utf-8. Only the prefix is encoded: no signature is longer.
     check_str = csv_data[1:] if csv_data.startswith("\ufeff") else csv_data
-    check_raw = check_str.encode("latin-1", errors="replace")
+    check_raw = check_str[:_MAGIC_PREFIX_LEN].encode("latin-1", errors="replace")
 
     for magic in _BINARY_MAGIC:
         if check_raw.startswith(magic):
             raise ValueError("CSV content appears to be a binary file, not a CSV")
 
-    raw = csv_data.encode("utf-8", errors="replace")
-    if b"\x00" in raw:
+    if "\x00" in csv_data:
         raise ValueError("CSV content contains null bytes")
 
+
+def _assert_content_safe(csv_data: str) -> None:
+    """Raise ValueError if csv_data looks like a binary file or contains formula injection."""
+    _assert_not_binary(csv_data)
+
     # Check every cell for formula injection.
-    # Numeric cells (including negative numbers and scientific notation) are safe.
     normalized = csv_data.replace("\r\n", "\n").replace("\r", "\n")
     reader = csv.reader(io.StringIO(normalized))
     for row in reader:
         for cell in row:
-            stripped = cell.strip()
-            if not stripped or _is_numeric_cell(stripped):
-                continue
-            if stripped[0] in _UNSAFE_FIRST_CHARS:
-                raise ValueError(
-                    "Your file contains a cell that cannot be processed safely "
-                    "(e.g. a value starting with =, +, @, or -). "
-                    "Please export a plain CSV from your trading platform."
-                )
+            if _is_unsafe_cell(cell):
+                raise ValueError(_UNSAFE_CELL_MESSAGE)
+
+
+def _first_non_empty_line(text: str) -> str:
+    """Return the first line of text containing non-whitespace, without splitting the whole file."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end == -1:
+            end = length
+        line = text[start:end]
+        if line.strip():
+            return line
+        start = end + 1
+    return ""
+
+
+def _sniff_delimiter(csv_data: str) -> str:
+    """Return ';' for semicolon-delimited data and ',' otherwise.
+
+    Expects line endings already normalised.
+    """
+    first_non_empty = _first_non_empty_line(csv_data)
+    try:
+        dialect = csv.Sniffer().sniff(first_non_empty, delimiters=",;")
+        logger.debug("CSV delimiter detected: %r", dialect.delimiter)
+        return dialect.delimiter
+    except csv.Error:
+        # Sniffer can't decide (e.g. single-column file) — fall back to heuristic
+        if ";" in first_non_empty and "," not in first_non_empty:
+            return ";"
+        return ","
 
 
 def _convert_semicolon_to_comma(csv_data: str) -> str:
@@ -166,49 +233,36 @@ def _convert_semicolon_to_comma(csv_data: str) -> str:
     return out.getvalue()
 
 
-def _strip_row(row: dict) -> dict:
-    # csv.DictReader can produce None for columns beyond the header width; skip those
-    return {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
-
+def _cell(row: list[str], idx: int) -> str | None:
+    """Return the stripped cell at idx, or None when the row is shorter than the header."""
+    return row[idx].strip() if idx < len(row) else None
 
-# ---------------------------------------------------------------------------
-# Public functions
-# ---------------------------------------------------------------------------
 
+def _column_index(header_row: list[str]) -> dict[str, int]:
+    """Map normalised (lowercase, stripped) header names to their column position.
 
-def sanitize_csv(csv_data: str) -> str:
-    """Strip BOM, normalise line endings, and convert semicolon delimiters to commas."""
-    _assert_content_safe(csv_data)
-    # Remove exactly one UTF-8 BOM if present
-    if csv_data.startswith("\ufeff"):
-        csv_data = csv_data[1:]
-    # Normalise line endings to \n
-    csv_data = csv_data.replace("\r\n", "\n").replace("\r", "\n")
-    # Detect delimiter and convert semicolon-delimited files to comma-delimited
-    first_non_empty = next((l for l in csv_data.split("\n") if l.strip()), "")
-    try:
-        dialect = csv.Sniffer().sniff(first_non_empty, delimiters=",;")
-        logger.debug("CSV delimiter detected: %r", dialect.delimiter)
-        if dialect.delimiter == ";":
-            csv_data = _convert_semicolon_to_comma(csv_data)
-    except csv.Error:
-        # Sniffer can't decide (e.g. single-column file) — fall back to heuristic
-        if ";" in first_non_empty and "," not in first_non_empty:
-            csv_data = _convert_semicolon_to_comma(csv_data)
-    return csv_data
+    Mirrors csv.DictReader: when two headers normalise to the same name, the
+    right-most column wins.
+    """
+    return {name.strip().lower(): i for i, name in enumerate(header_row)}
 
 
-def detect_format(csv_data: str) -> str:
-    """Return 'detailed' or 'summary' based on the CSV header columns.
+def _numbered_rows(rows: Iterable[list[str]]) -> Iterator[tuple[int, list[str]]]:
+    """Yield (row_num, row) for data rows, skipping empty lines like csv.DictReader does.
 
-    Expects data that has already been through sanitize_csv().
-    Raises ValueError if the header matches neither known format.
-    'detailed' is checked first; a file satisfying both formats is treated as 'detailed'.
+    Row numbers start at 2 because row 1 is the header.
     """
-    reader = csv.reader(io.StringIO(csv_data))
-    try:
-        header_row = next(reader)
-    except StopIteration:
+    row_num = 1
+    for row in rows:
+        if not row:
+            continue
+        row_num += 1
+        yield row_num, row
+
+
+def _format_from_header(header_row: list[str] | None) -> str:
+    """Return 'detailed' or 'summary' for a tokenised header row (see detect_format)."""
+    if header_row is None:
         raise ValueError("CSV is empty or has no header row")
 
     actual_cols: frozenset[str] = frozenset(col.strip().lower() for col in header_row if col.strip())
@@ -235,29 +289,31 @@ def detect_format(csv_data: str) -> str:
     )
 
 
-def parse_detailed(csv_data: str, is_free_tier: bool = True) -> list[dict]:
-    """Parse a detailed trade-list CSV into a list of typed trade dicts.
-    If is_free_tier is True, enforce the free tier trade limit.
-    """
-    reader = csv.DictReader(io.StringIO(csv_data))
-
-    if reader.fieldnames is None:
+def _parse_detailed_rows(
+    header_row: list[str] | None,
+    rows: Iterable[list[str]],
+    is_free_tier: bool,
+) -> list[dict]:
+    """Build typed trade dicts from a tokenised header and data rows (see parse_detailed)."""
+    if header_row is None:
         raise ValueError("CSV is empty or has no header row")
 
-    # Build normalized (lowercase, stripped) -> original fieldname mapping
-    norm_to_original: dict[str, str] = {f.strip().lower(): f for f in reader.fieldnames}
+    columns = _column_index(header_row)
 
-    missing = REQUIRED_DETAILED_COLUMNS - norm_to_original.keys()
+    missing = REQUIRED_DETAILED_COLUMNS - columns.keys()
     if missing:
         raise ValueError(f"Your CSV is missing required columns: {sorted(missing)}. Please check your file headers.")
 
-    # Access each required column by its original (un-normalized) fieldname
-    col = {norm: norm_to_original[norm] for norm in REQUIRED_DETAILED_COLUMNS}
+    date_idx = columns["date"]
+    symbol_idx = columns["symbol"]
+    action_idx = columns["action"]
+    price_idx = columns["price"]
+    shares_idx = columns["shares"]
 
     trades: list[dict] = []
-    for row_num, raw_row in enumerate(reader, start=2):
+    for row_num, row in _numbered_rows(rows):
         # Skip entirely blank rows before checking the limit
-        if all(v is None or v.strip() == "" for v in raw_row.values()):
+        if all(not cell.strip() for cell in row):
             continue
 
         # Enforce limit on non-blank rows only
@@ -266,12 +322,10 @@ def parse_detailed(csv_data: str, is_free_tier: bool = True) -> list[dict]:
                 f"Trade count exceeds the free tier limit of {FREE_TIER_TRADE_LIMIT}"
             )
 
-        raw_row = _strip_row(raw_row)
-
-        date_val = _require_field(raw_row[col["date"]], row_num, "date")
+        date_val = _require_field(_cell(row, date_idx), row_num, "date")
         _parse_iso_date(date_val, "date", row_num)  # validation only; date stored as string
 
-        symbol_val = _require_field(raw_row[col["symbol"]], row_num, "symbol").upper()
+        symbol_val = _require_field(_cell(row, symbol_idx), row_num, "symbol").upper()
         # Disallow all-digit, trailing dot/hyphen, or any space
         if (
             not _SYMBOL_RE.match(symbol_val)
@@ -281,12 +335,12 @@ def parse_detailed(csv_data: str, is_free_tier: bool = True) -> list[dict]:
         ):
             raise ValueError(f"Row {row_num}: symbol '{symbol_val}' contains invalid characters")
 
-        action_val = _require_field(raw_row[col["action"]], row_num, "action").upper()
+        action_val = _require_field(_cell(row, action_idx), row_num, "action").upper()
         if action_val not in {"BUY", "SELL"}:
             raise ValueError(f"Row {row_num}: action '{action_val}' is not BUY or SELL")
 
-        price_val = _parse_positive_float(raw_row[col["price"]], "price", row_num)
-        shares_val = _parse_positive_float(raw_row[col["shares"]], "shares", row_num)
+        price_val = _parse_positive_float(_cell(row, price_idx), "price", row_num)
+        shares_val = _parse_positive_float(_cell(row, shares_idx), "shares", row_num)
 
         trades.append({
             "date": date_val,
@@ -299,58 +353,40 @@ def parse_detailed(csv_data: str, is_free_tier: bool = True) -> list[dict]:
     return trades
 
 
-def parse_summary(csv_data: str) -> dict:
-    """
-    Parse a summary-format CSV into a single dict of aggregate metrics.
-
-    Expected columns (case/padding ignored):
-        - initial_capital (float > 0)
-        - final_balance (float > 0)
-        - num_trades (int > 0, accepts e.g. "42" or "42.0")
-        - win_rate (float in [0, 1])
-        - start_date (YYYY-MM-DD string)
-        - end_date (YYYY-MM-DD string)
-    Extra columns are ignored. Missing/typoed columns raise ValueError.
-    """
-    reader = csv.DictReader(io.StringIO(csv_data))
-
-    if reader.fieldnames is None:
+def _parse_summary_rows(header_row: list[str] | None, rows: Iterable[list[str]]) -> dict:
+    """Build the summary metrics dict from a tokenised header and data rows (see parse_summary)."""
+    if header_row is None:
         raise ValueError("CSV is empty or has no header row")
 
     # Normalize headers and check for required columns
-    norm_to_original: dict[str, str] = {f.strip().lower(): f for f in reader.fieldnames}
-    actual_cols = set(norm_to_original.keys())
-    missing = REQUIRED_SUMMARY_KEYS - actual_cols
-    extra = actual_cols - REQUIRED_SUMMARY_KEYS
+    columns = _column_index(header_row)
+    missing = REQUIRED_SUMMARY_KEYS - columns.keys()
     if missing:
         raise ValueError(f"Your CSV is missing required fields: {sorted(missing)}. Please check your column names.")
 
-    # Map normalized required keys to original header
-    col = {norm: norm_to_original[norm] for norm in REQUIRED_SUMMARY_KEYS}
-
-    data_row: dict | None = None
-    for raw_row in reader:
-        if all(v is None or v.strip() == "" for v in raw_row.values()):
+    data_row: list[str] | None = None
+    for _, row in _numbered_rows(rows):
+        if all(not cell.strip() for cell in row):
             continue
         if data_row is not None:
             raise ValueError("Summary CSV must contain exactly one data row")
-        data_row = _strip_row(raw_row)
+        data_row = row
 
     if data_row is None:
         raise ValueError("CSV has no data rows")
 
     initial_capital = _parse_positive_float(
-        data_row[col["initial_capital"]], "initial_capital", 2
+        _cell(data_row, columns["initial_capital"]), "initial_capital", 2
     )
     final_balance = _parse_positive_float(
-        data_row[col["final_balance"]], "final_balance", 2
+        _cell(data_row, columns["final_balance"]), "final_balance", 2
     )
 
     # Accept num_trades as "42" or "42.0" (but not "42.5")
-    num_trades_str = data_row[col["num_trades"]]
+    num_trades_str = _cell(data_row, columns["num_trades"])
     try:
         num_trades_f = float(num_trades_str)
-    except ValueError:
+    except (TypeError, ValueError):
         raise ValueError(f"Row 2: num_trades '{num_trades_str}' is not a number")
     if (
         math.isnan(num_trades_f)
@@ -361,19 +397,19 @@ def parse_summary(csv_data: str) -> dict:
         raise ValueError(f"Row 2: num_trades must be a positive integer, got '{num_trades_str}'")
     num_trades = int(num_trades_f)
 
-    win_rate_str = data_row[col["win_rate"]]
+    win_rate_str = _cell(data_row, columns["win_rate"])
     try:
         win_rate = float(win_rate_str)
-    except ValueError:
+    except (TypeError, ValueError):
         raise ValueError(f"Row 2: win_rate '{win_rate_str}' is not a number")
     # expects a decimal fraction, e.g. 0.65 not 65
     if math.isnan(win_rate) or math.isinf(win_rate) or win_rate < 0.0 or win_rate > 1.0:
         raise ValueError(f"Row 2: win_rate must be between 0 and 1, got '{win_rate_str}'")
 
-    start_date_str = data_row[col["start_date"]]
+    start_date_str = _cell(data_row, columns["start_date"])
     parsed_start = _parse_iso_date(start_date_str, "start_date", 2)
 
-    end_date_str = data_row[col["end_date"]]
+    end_date_str = _cell(data_row, columns["end_date"])
     parsed_end = _parse_iso_date(end_date_str, "end_date", 2)
 
     if parsed_start > parsed_end:
@@ -392,122 +428,209 @@ def parse_summary(csv_data: str) -> dict:
     }
 
 
-def validate_trades(trades: list[dict]) -> list[dict]:
+def _checked_rows(csv_data: str, delimiter: str) -> Iterator[list[str]]:
+    """Tokenise csv_data once, rejecting formula-injection cells as each row is read."""
+    for row in csv.reader(io.StringIO(csv_data), delimiter=delimiter):
+        for cell in row:
+            if _is_unsafe_cell(cell):
+                raise CSVIngestError(_UNSAFE_CELL_MESSAGE)
+        yield row
+
+
+# ---------------------------------------------------------------------------
+# Public functions
+# ---------------------------------------------------------------------------
+
+
+def sanitize_csv(csv_data: str) -> str:
+    """Strip BOM, normalise line endings, and convert semicolon delimiters to commas."""
+    _assert_content_safe(csv_data)
+    # Remove exactly one UTF-8 BOM if present
+    if csv_data.startswith("\ufeff"):
+        csv_data = csv_data[1:]
+    # Normalise line endings to \n
+    csv_data = csv_data.replace("\r\n", "\n").replace("\r", "\n")
+    # Detect delimiter and convert semicolon-delimited files to comma-delimited
+    if _sniff_delimiter(csv_data) == ";":
+        csv_data = _convert_semicolon_to_comma(csv_data)
+    return csv_data
+
+
+def detect_format(csv_data: str) -> str:
+    """Return 'detailed' or 'summary' based on the CSV header columns.
+
+    Expects data that has already been through sanitize_csv().
+    Raises ValueError if the header matches neither known format.
+    'detailed' is checked first; a file satisfying both formats is treated as 'detailed'.
+    """
+    reader = csv.reader(io.StringIO(csv_data))
+    return _format_from_header(next(reader, None))
+
+
+def parse_detailed(csv_data: str, is_free_tier: bool = True) -> list[dict]:
+    """Parse a detailed trade-list CSV into a list of typed trade dicts.
+    If is_free_tier is True, enforce the free tier trade limit.
+    """
+    reader = csv.reader(io.StringIO(csv_data))
+    return _parse_detailed_rows(next(reader, None), reader, is_free_tier)
+
+
+def parse_summary(csv_data: str) -> dict:
+    """
+    Parse a summary-format CSV into a single dict of aggregate metrics.
+
+    Expected columns (case/padding ignored):
+        - initial_capital (float > 0)
+        - final_balance (float > 0)
+        - num_trades (int > 0, accepts e.g. "42" or "42.0")
+        - win_rate (float in [0, 1])
+        - start_date (YYYY-MM-DD string)
+        - end_date (YYYY-MM-DD string)
+    Extra columns are ignored. Missing/typoed columns raise ValueError.
+    """
+    reader = csv.reader(io.StringIO(csv_data))
+    return _parse_summary_rows(next(reader, None), reader)
+
+
+def ingest_csv(csv_data: str, is_free_tier: bool = True) -> IngestedCSV:
+    """Sanitize, classify, and parse an upload with a single tokenising pass.
+
+    Equivalent to sanitize_csv -> detect_format -> parse_detailed / parse_summary,
+    but the text is read by csv.reader exactly once: the delimiter is sniffed from
+    the first non-empty line, and every cell is checked for formula injection as
+    its row is parsed. Semicolon-delimited files are read directly rather than
+    being re-serialised as commas first.
+
+    Raises CSVIngestError for uploads rejected before any trade is parsed (binary
+    content, unsafe cells, unknown header, invalid summary row). Errors in a
+    detailed trade row propagate as the same ValueError / FreeTierLimitExceeded
+    that parse_detailed raises. An unsafe cell anywhere in the file takes
+    precedence over a row error reported earlier in the scan.
+    """
+    try:
+        _assert_not_binary(csv_data)
+    except ValueError as exc:
+        raise CSVIngestError(str(exc)) from exc
+
+    # Remove exactly one UTF-8 BOM if present, then normalise line endings to \n
+    text = csv_data[1:] if csv_data.startswith("\ufeff") else csv_data
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    rows = _checked_rows(text, _sniff_delimiter(text))
+    fmt: str | None = None
+    try:
+        header_row = next(rows, None)
+        fmt = _format_from_header(header_row)
+        if fmt == "summary":
+            return IngestedCSV(format=fmt, summary=_parse_summary_rows(header_row, rows))
+        return IngestedCSV(format=fmt, trades=_parse_detailed_rows(header_row, rows, is_free_tier))
+    except CSVIngestError:
+        raise
+    except ValueError as exc:
+        # Finish the scan: unsafe content later in the file outranks this error
+        for _ in rows:
+            pass
+        if fmt == "detailed":
+            raise
+        raise CSVIngestError(str(exc), fmt) from exc
+
+
+def validate_trades(trades: list[dict] | TradeTable) -> list[dict]:
     """Check trades for pairing errors and duplicates; return a list of warning dicts.
 
     Warnings (not exceptions) are returned so callers can still show results while
     surfacing data quality issues to the user.
     """
+    table = TradeTable.coerce(trades)
     warnings: list[dict] = []
 
     # Detect duplicate rows: same date + symbol + action (normalized)
-    seen: dict[tuple, int] = {}
-    for trade in trades:
-        action = _normalize_action(trade.get("action"))
-        symbol = str(trade.get("symbol") or "").strip().upper()
-        date = str(trade.get("date") or "").strip()
-        key = (date, symbol, action)
-        seen[key] = seen.get(key, 0) + 1
-
-    for key, count in seen.items():
-        if count > 1:
-            date, symbol, action = key
-            warnings.append({
-                "type": "duplicate",
-                "level": "warning",
-                "message": (
-                    f"Duplicate trade: {action} {symbol} on {date} appears {count} times"
-                ),
-            })
+    num_actions = len(table.actions)
+    key = (table.date_code.astype(np.int64) * len(table.symbols) + table.symbol_code) * num_actions + table.action_code
+    _, first_idx, counts = np.unique(key, return_index=True, return_counts=True)
+    for i, count in sorted(zip(first_idx[counts > 1].tolist(), counts[counts > 1].tolist())):
+        action = table.actions[table.action_code[i]]
+        symbol = table.symbols[table.symbol_code[i]]
+        date = table.dates[table.date_code[i]]
+        warnings.append({
+            "type": "duplicate",
+            "level": "warning",
+            "message": (
+                f"Duplicate trade: {action} {symbol} on {date} appears {count} times"
+            ),
+        })
 
-    # Check BUY/SELL pairing per symbol using a simple FIFO stack
-    open_buys: dict[str, list[dict]] = {}
-    for trade in trades:
-        action = _normalize_action(trade.get("action"))
-        symbol = str(trade.get("symbol") or "").strip().upper()
-        if action == "BUY":
-            open_buys.setdefault(symbol, []).append(trade)
-        elif action == "SELL":
-            if not open_buys.get(symbol):
-                date = trade.get("date") or "unknown date"
-                warnings.append({
-                    "type": "unmatched_sell",
-                    "level": "warning",
-                    "message": f"SELL for {symbol} on {date} has no preceding BUY",
-                })
-            else:
-                open_buys[symbol].pop(0)
-
-    for symbol, buys in open_buys.items():
-        for buy in buys:
-            date = buy.get("date") or "unknown date"
-            warnings.append({
-                "type": "unclosed_position",
-                "level": "info",
-                "message": f"Open position: {symbol} BUY on {date} (no matching SELL yet)",
-            })
+    # Check BUY/SELL pairing per symbol using the table's FIFO matching
+    fifo = table.fifo
+    for i in fifo.unmatched_sell_idx:
+        date = table.raw_date[i] or "unknown date"
+        warnings.append({
+            "type": "unmatched_sell",
+            "level": "warning",
+            "message": f"SELL for {table.symbols[table.symbol_code[i]]} on {date} has no preceding BUY",
+        })
 
-    # Check for zero or negative price or share count, or missing/invalid values
-    def _is_invalid_value(val):
-        try:
-            return float(val) <= 0
-        except (TypeError, ValueError):
-            return True
+    for i in fifo.open_buy_idx:
+        date = table.raw_date[i] or "unknown date"
+        warnings.append({
+            "type": "unclosed_position",
+            "level": "info",
+            "message": f"Open position: {table.symbols[table.symbol_code[i]]} BUY on {date} (no matching SELL yet)",
+        })
+
+    # Check for zero or negative price or share count, or missing/invalid values.
+    # NaN marks a missing or non-numeric cell and fails the > 0 comparison.
+    with np.errstate(invalid="ignore"):
+        bad_price = ~(table.price > 0)
+        bad_shares = ~(table.shares > 0)
 
-    for idx, trade in enumerate(trades):
-        symbol = str(trade.get("symbol") or "").strip().upper()
-        date = trade.get("date") or "unknown date"
-        price = trade.get("price")
-        shares = trade.get("shares")
+    for idx in np.flatnonzero(bad_price | bad_shares):
+        symbol = table.symbols[table.symbol_code[idx]]
+        date = table.raw_date[idx] or "unknown date"
 
-        if _is_invalid_value(price):
+        if bad_price[idx]:
             warnings.append({
                 "type": "invalid_price",
                 "level": "warning",
-                "message": f"Row {idx+1}: Trade {symbol} on {date} has invalid price: {price}",
+                "message": f"Row {idx+1}: Trade {symbol} on {date} has invalid price: {table.raw_price[idx]}",
             })
-        if _is_invalid_value(shares):
+        if bad_shares[idx]:
             warnings.append({
                 "type": "invalid_shares",
                 "level": "warning",
-                "message": f"Row {idx+1}: Trade {symbol} on {date} has invalid share count: {shares}",
+                "message": f"Row {idx+1}: Trade {symbol} on {date} has invalid share count: {table.raw_shares[idx]}",
             })
 
     return warnings
 
 
-def calculate_pnl(trades: list[dict]) -> dict:
+def calculate_pnl(trades: list[dict] | TradeTable) -> dict:
     """Compute per-trade P&L, equity curve, and total return from a trade list.
 
     Pairs BUY->SELL trades per symbol using FIFO matching. Unpaired trades are skipped.
     Returns a dict with keys: trade_pnl, equity_curve, total_pnl, total_return_pct.
     """
-    # FIFO buy queues per symbol: stores (date, price, shares) for each open BUY
-    open_buys: dict[str, list[dict]] = {}
+    table = TradeTable.coerce(trades)
+    fifo = table.fifo
+    buy_idx, sell_idx = fifo.buy_idx, fifo.sell_idx
+
+    # Round trips are already in chronological sell order
+    pnl = (table.price[sell_idx] - table.price[buy_idx]) * table.shares[sell_idx]
+    cumulative = np.cumsum(pnl)
+    cumulative_pnl = float(cumulative[-1]) if cumulative.size else 0.0
+
     trade_pnl: list[dict] = []
-    cumulative_pnl = 0.0
-
-    for trade in trades:
-        symbol = trade.get("symbol")
-        action = _normalize_action(trade.get("action"))
-        if action == "BUY":
-            open_buys.setdefault(symbol, []).append(trade)
-        elif action == "SELL":
-            if not open_buys.get(symbol):
-                continue  # unmatched sell — already flagged by validate_trades
-            buy = open_buys[symbol].pop(0)
-            pnl = (trade.get("price", 0) - buy.get("price", 0)) * trade.get("shares", 0)
-            cumulative_pnl += pnl
-            trade_pnl.append({
-                "buy_date": buy.get("date"),
-                "sell_date": trade.get("date"),
-                "symbol": symbol,
-                "shares": trade.get("shares"),
-                "buy_price": buy.get("price"),
-                "sell_price": trade.get("price"),
-                "pnl": round(pnl, 4),
-                "cumulative_pnl": round(cumulative_pnl, 4),
-            })
+    for b, s, p, c in zip(buy_idx.tolist(), sell_idx.tolist(), pnl.tolist(), cumulative.tolist()):
+        trade_pnl.append({
+            "buy_date": table.raw_date[b],
+            "sell_date": table.raw_date[s],
+            "symbol": table.raw_symbol[s],
+            "shares": table.raw_shares[s],
+            "buy_price": table.raw_price[b],
+            "sell_price": table.raw_price[s],
+            "pnl": round(p, 4),
+            "cumulative_pnl": round(c, 4),
+        })
 
     # Equity curve: cumulative P&L at each sell event (chronological order)
     equity_curve = [
@@ -516,40 +639,27 @@ def calculate_pnl(trades: list[dict]) -> dict:
     ]
 
     # Total return as a percentage of total capital deployed (sum of all buy costs)
-    total_buy_cost = sum(
-        t["buy_price"] * t["shares"] for t in trade_pnl
-    )
+    total_buy_cost = sum((table.price[buy_idx] * table.shares[sell_idx]).tolist())
     total_return_pct = (
         round((cumulative_pnl / total_buy_cost) * 100, 4)
         if total_buy_cost > 0
         else 0.0
     )
 
-    # Helper to safely compute holding period in days
-    def _holding_days(t):
-        try:
-            buy = t["buy_date"]
-            sell = t["sell_date"]
-            if not (buy and sell):
-                return None
-            days = (datetime.strptime(sell, "%Y-%m-%d") - datetime.strptime(buy, "%Y-%m-%d")).days
-            return days if days >= 0 else None
-        except Exception:
-            return None
+    # Holding period in days; None when either date is missing/unparseable or out of order
+    buy_ord = table.date_ordinal[buy_idx]
+    sell_ord = table.date_ordinal[sell_idx]
+    days = sell_ord - buy_ord
+    has_days = (buy_ord >= 0) & (sell_ord >= 0) & (days >= 0)
+    rounded_pnl = np.array([t["pnl"] for t in trade_pnl], dtype=np.float64)
 
     # Only count trades with pnl > 0 (exclude breakeven and losses)
     # This is intentional: see test coverage and docstring
-    winner_days = [
-        d for t in trade_pnl if t["pnl"] > 0
-        for d in [_holding_days(t)] if d is not None
-    ]
+    winner_days = days[has_days & (rounded_pnl > 0)].tolist()
     avg_holding_days_winners = round(float(statistics.mean(winner_days)), 2) if winner_days else None
 
     # Mean days held for trades that closed at a loss (pnl < 0, excluding breakeven)
-    loser_days = [
-        d for t in trade_pnl if t["pnl"] < 0
-        for d in [_holding_days(t)] if d is not None
-    ]
+    loser_days = days[has_days & (rounded_pnl < 0)].tolist()
     avg_holding_days_losers = round(float(statistics.mean(loser_days)), 2) if loser_days else None
 
     return {
@@ -562,7 +672,6 @@ def calculate_pnl(trades: list[dict]) -> dict:
     }
 
 
-
 # Minimum winners and losers required before flagging the disposition effect
 MIN_TRADES_FOR_DISPOSITION_CHECK = 5
 # Losers must be held at least 50% longer than winners to trigger the warning
@@ -701,7 +810,7 @@ CONCENTRATION_RISK_THRESHOLD = 0.50
 MIN_TRADES_FOR_CONCENTRATION_CHECK = 2
 
 
-def check_concentration_risk(trades: list[dict]) -> dict | None:
+def check_concentration_risk(trades: list[dict] | TradeTable) -> dict | None:
     """Return a warning dict if more than 50% of trades are in a single symbol.
 
     Concentration is measured by trade count, not position size or capital deployed.
@@ -711,20 +820,23 @@ def check_concentration_risk(trades: list[dict]) -> dict | None:
     if len(trades) < MIN_TRADES_FOR_CONCENTRATION_CHECK:
         return None
 
-    symbol_counts: dict[str, int] = {}
-    for trade in trades:
-        symbol = str(trade.get("symbol") or "").strip().upper()
-        if not symbol:
-            logger.warning("check_concentration_risk: trade skipped due to missing symbol: %r", trade)
-            continue
-        symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
+    table = TradeTable.coerce(trades)
+    symbol_counts = table.symbol_counts()
+    if "" in table.symbols:
+        blank = table.symbols.index("")
+        for i in np.flatnonzero(table.symbol_code == blank):
+            logger.warning("check_concentration_risk: trade skipped due to missing symbol: row %d", i + 1)
+        symbol_counts[blank] = 0
 
-    total = sum(symbol_counts.values())
+    total = int(symbol_counts.sum())
     if total == 0:
         return None
 
-    most_traded = max(symbol_counts, key=lambda s: symbol_counts[s])
-    pct = symbol_counts[most_traded] / total
+    # argmax returns the first maximum, i.e. the earliest-seen symbol on ties
+    top = int(np.argmax(symbol_counts))
+    most_traded = table.symbols[top]
+    trade_count = int(symbol_counts[top])
+    pct = trade_count / total
 
     if pct <= CONCENTRATION_RISK_THRESHOLD:
         return None
@@ -735,12 +847,12 @@ def check_concentration_risk(trades: list[dict]) -> dict | None:
         "level": "warning",
         "message": (
             f"{pct_display}% of your trades are in {most_traded} "
-            f"({symbol_counts[most_traded]} of {total}). "
+            f"({trade_count} of {total}). "
             "Having more than half your trades in a single symbol increases exposure to that asset. "
             "Consider diversifying across more symbols to reduce concentration risk."
         ),
         "symbol": most_traded,
-        "trade_count": symbol_counts[most_traded],
+        "trade_count": trade_count,
         "total_trades": total,
         "concentration_pct": round(pct, 4),
     }
@@ -749,12 +861,11 @@ def check_concentration_risk(trades: list[dict]) -> dict | None:
 def analyze_uploaded_trades(csv_data: str, commission_per_trade: float = DEFAULT_COMMISSION_PER_TRADE, slippage_pct: float = DEFAULT_SLIPPAGE_PCT, spread_pct: float = DEFAULT_SPREAD_PCT) -> dict:
     """Main entry point: sanitize, detect format, parse, validate, and return analysis results."""
     try:
-        clean = sanitize_csv(csv_data)
-        fmt = detect_format(clean)
-    except ValueError as e:
+        ingested = ingest_csv(csv_data)
+    except CSVIngestError as e:
         return {
             "error": str(e),
-            "format": "detailed",
+            "format": e.format or "detailed",
             "trades": [],
             "warnings": [],
             "notices": [],
@@ -762,20 +873,10 @@ def analyze_uploaded_trades(csv_data: str, commission_per_trade: float = DEFAULT
             "significance": None,
         }
 
+    fmt = ingested.format
     warnings = []
     if fmt == "summary":
-        try:
-            summary = parse_summary(clean)
-        except ValueError as e:
-            return {
-                "error": str(e),
-                "format": fmt,
-                "trades": [],
-                "warnings": [],
-                "notices": [],
-                "pnl": {},
-                "significance": None,
-            }
+        summary = ingested.summary
         sufficiency_warning = check_trade_count_sufficiency(summary.get("num_trades", 0))
         if sufficiency_warning:
             warnings.append(sufficiency_warning)
@@ -786,20 +887,22 @@ def analyze_uploaded_trades(csv_data: str, commission_per_trade: float = DEFAULT
             "warnings": warnings,
         }
 
-    trades = parse_detailed(clean) or []
-    all_issues = validate_trades(trades) or []
+    trades = ingested.trades
+    # Build the columnar view once; every calculator below reuses its FIFO matching
+    table = TradeTable.from_dicts(trades)
+    all_issues = validate_trades(table) or []
     WARNING_LEVELS = {"warning", "error"}
     INFO_LEVELS = {"info"}
     warnings.extend(i for i in all_issues if i.get("level", "warning") in WARNING_LEVELS)
     notices = [i for i in all_issues if i.get("level") in INFO_LEVELS]
-    pnl = calculate_pnl(trades) if trades else {}
+    pnl = calculate_pnl(table) if trades else {}
     num_closed = len(pnl.get("trade_pnl", []))
     sufficiency_warning = check_trade_count_sufficiency(num_closed)
     if sufficiency_warning:
         warnings.append(sufficiency_warning)
-    commissions = calculate_commissions(trades, commission_per_trade=commission_per_trade) if trades else {}
-    slippage = calculate_slippage(trades, slippage_pct=slippage_pct) if trades else {}
-    bid_ask_spread = calculate_bid_ask_spread(trades, spread_pct=spread_pct) if trades else {}
+    commissions = calculate_commissions(table, commission_per_trade=commission_per_trade) if trades else {}
+    slippage = calculate_slippage(table, slippage_pct=slippage_pct) if trades else {}
+    bid_ask_spread = calculate_bid_ask_spread(table, spread_pct=spread_pct) if trades else {}
     pnl_values = [t["pnl"] for t in pnl.get("trade_pnl", [])]
     significance = run_significance_tests(pnl_values) if pnl_values else None
     disposition_warning = check_disposition_effect(pnl)
@@ -808,17 +911,10 @@ def analyze_uploaded_trades(csv_data: str, commission_per_trade: float = DEFAULT
     overtrading_warning = check_overtrading(pnl, commissions, slippage, bid_ask_spread)
     if overtrading_warning:
         warnings.append(overtrading_warning)
-    concentration_warning = check_concentration_risk(trades)
+    concentration_warning = check_concentration_risk(table)
     if concentration_warning:
         warnings.append(concentration_warning)
-    try:
-        spy_benchmark = fetch_benchmark(trades, SPY_TICKER)
-    except Exception:
-        spy_benchmark = None
-    try:
-        qqq_benchmark = fetch_benchmark(trades, QQQ_TICKER)
-    except Exception:
-        qqq_benchmark = None
+    benchmarks = fetch_benchmarks(trades, [SPY_TICKER, QQQ_TICKER])
     return {
         "format": fmt,
         "format_description": FORMAT_DESCRIPTIONS.get(fmt, ""),
@@ -830,6 +926,6 @@ def analyze_uploaded_trades(csv_data: str, commission_per_trade: float = DEFAULT
         "slippage": slippage,
         "bid_ask_spread": bid_ask_spread,
         "significance": significance,
-        "spy_benchmark": spy_benchmark,
-        "qqq_benchmark": qqq_benchmark,
+        "spy_benchmark": benchmarks[SPY_TICKER],
+        "qqq_benchmark": benchmarks[QQQ_TICKER],
     }
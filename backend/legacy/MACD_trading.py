@@ -1,10 +1,13 @@
 import os
 from datetime import datetime, timedelta
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import time
 
+from backtest_cache import backtest_key, memoised_backtest
+from equity_curve import month_end_balances, monthly_performance
+from market_data import BENCHMARK_TICKERS, load_bars, load_symbol
+
 try:
     import talib
     TALIB_AVAILABLE = True
@@ -42,68 +45,232 @@ def calculate_indicators(data, fastperiod, slowperiod, signalperiod):
     
     return data
 
-def backtest_strategy_MACD(symbols, start_date, end_date, initial_balance=100000, trailing_stop_loss=0.15, fastperiod=12, slowperiod=26, signalperiod=9, return_monthly_data=False):
+def _next_true_index(mask):
+    """
+    For every bar i, the index of the first True in mask at or after i
+    (len(mask) if none). One extra trailing slot holds len(mask) so callers
+    can look up i + 1 without a bounds check. A 2-D mask is handled column
+    by column (bars along axis 0).
+    """
+    n = len(mask)
+    idx = np.where(mask, np.arange(n).reshape((n,) + (1,) * (mask.ndim - 1)), n)
+    out = np.empty((n + 1,) + mask.shape[1:], dtype=np.int64)
+    out[n] = n
+    if n:
+        out[:n] = np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+    return out
+
+def _run_macd_trades(close, next_buy, next_cross_down, balance, trailing_stop_loss):
+    """
+    Trade loop shared by the single backtest and the parameter grid.
+
+    Buys with all available cash on the next buy signal and sells on the
+    first later cross below the signal line or when the price falls
+    trailing_stop_loss below the entry price. Runs once per trade rather
+    than once per bar.
+
+    Returns (cash balance, open position qty, [(bar, action, price, qty), ...]).
+    """
+    n = len(close)
+    position = 0
+    fills = []
+    # Bar 0 only seeds the indicators; trading starts on bar 1
+    i = next_buy[1] if n > 1 else n
+    while i < n:
+        price = close[i]
+        qty = int(balance / price)
+        balance -= qty * price
+        fills.append((i, 'buy', price, qty))
+        if qty == 0:
+            # Could not afford a share: still flat, so try again from the next bar
+            i = next_buy[i + 1]
+            continue
+
+        # Exit on the first bar (from entry on) that crosses down or hits the stop
+        cross = next_cross_down[i]
+        stop_hit = close[i:cross] <= price * (1 - trailing_stop_loss)
+        exit_idx = i + int(stop_hit.argmax()) if stop_hit.any() else cross
+        if exit_idx >= n:
+            position = qty
+            break
+
+        exit_price = close[exit_idx]
+        balance += qty * exit_price
+        fills.append((exit_idx, 'sell', exit_price, qty))
+        i = next_buy[exit_idx + 1]
+
+    return balance, position, fills
+
+def _signal_indices(macd, signal, hist):
+    """
+    Next-buy and next-cross-down index arrays for MACD/signal/histogram
+    arrays (1-D, or 2-D with one column per parameter set).
+    NaN comparisons are False, so warm-up bars never trigger a trade.
+    """
+    next_buy = _next_true_index((macd > signal) & (hist > 0))
+    next_cross_down = _next_true_index(macd < signal)
+    return next_buy, next_cross_down
+
+def simulate_macd_trades(data, symbol, balance, trailing_stop_loss):
+    """
+    Run the MACD crossover strategy over one symbol's indicator frame.
+
+    Crossover masks and "next signal" indices are computed once with NumPy;
+    see _run_macd_trades for the trading rules.
+
+    Returns (cash balance, open position qty, trade history list).
+    """
+    close = data['close'].to_numpy(dtype=float)
+    next_buy, next_cross_down = _signal_indices(
+        data['MACD'].to_numpy(dtype=float),
+        data['Signal'].to_numpy(dtype=float),
+        data['Hist'].to_numpy(dtype=float),
+    )
+    balance, position, fills = _run_macd_trades(
+        close, next_buy, next_cross_down, balance, trailing_stop_loss
+    )
+    return balance, position, _trade_history(data, symbol, fills)
+
+def _trade_history(data, symbol, fills):
+    return [
+        {
+            'symbol': symbol,
+            'action': action,
+            'price': price,
+            'qty': qty,
+            'date': data.index[i]
+        }
+        for i, action, price, qty in fills
+    ]
+
+def _equity_curve(close, fills, balance):
+    """
+    Daily mark-to-market value (cash + position * close) of one symbol's
+    account, starting from balance. Cash is accumulated fill by fill in the
+    same order as _run_macd_trades, so the last bar equals the final balance
+    the backtest reports.
+    """
+    n = len(close)
+    bars = np.array([fill[0] for fill in fills], dtype=np.int64)
+    signed_qty = np.array(
+        [qty if action == 'buy' else -qty for _, action, _, qty in fills], dtype=np.int64
+    )
+    prices = np.array([fill[2] for fill in fills], dtype=float)
+    cash = np.cumsum(np.concatenate([[balance], -(signed_qty * prices)]))
+    position = np.cumsum(np.concatenate([[0], signed_qty]))
+    # Number of fills executed on or before each bar
+    done = np.searchsorted(bars, np.arange(n), side='right')
+    return cash[done] + position[done] * close
+
+def download_symbol_data(symbol, start_date, end_date):
+    """
+    One symbol's daily OHLC bars with lower-cased column names, served from
+    the market_data cache when an earlier batch already fetched it
+    """
+    return load_symbol(symbol, start_date, end_date)
+
+def load_price_panel(symbols, start_date, end_date, benchmarks=BENCHMARK_TICKERS):
+    """
+    Download every symbol and return {symbol: OHLC DataFrame}.
+
+    All symbols, plus the benchmark tickers (cached for the SPY comparison,
+    not returned), are fetched in one grouped download. Pass the result as
+    price_data to backtest_strategy_MACD (and the optimizer) so repeated
+    backtests over the same symbols and dates reuse the frames instead of
+    calling yfinance again. If the grouped download raises, each symbol is
+    tried on its own; a symbol whose download still raises is left out, so
+    the backtest retries it and fails the way it always has.
+    """
+    try:
+        bars = load_bars(symbols, start_date, end_date, benchmarks=benchmarks)
+        return {symbol: bars[symbol] for symbol in symbols}
+    except Exception as e:
+        print(f"Error loading grouped price data, retrying per symbol: {e}")
+
+    panel = {}
+    for symbol in symbols:
+        try:
+            panel[symbol] = download_symbol_data(symbol, start_date, end_date)
+        except Exception as e:
+            print(f"Error loading price data for {symbol}: {e}")
+    return panel
+
+def backtest_strategy_MACD(symbols, start_date, end_date, initial_balance=100000, trailing_stop_loss=0.15, fastperiod=12, slowperiod=26, signalperiod=9, return_monthly_data=False, price_data=None, use_cache=True):
+    """
+    Backtest the MACD strategy on each symbol with an equal share of the portfolio.
+
+    price_data: optional {symbol: OHLC DataFrame} from load_price_panel.
+    Symbols found there are not downloaded again; the frames are not modified.
+    use_cache: serve repeated backtests from backtest_cache (see there).
+
+    Returns (summary, final balance), plus {'YYYY-MM': month-end portfolio
+    balance} from the daily mark-to-market equity when return_monthly_data
+    is set, or an error message string.
+    """
+    def run():
+        return _run_backtest_strategy_MACD(
+            symbols, start_date, end_date, initial_balance, trailing_stop_loss,
+            fastperiod, slowperiod, signalperiod, price_data
+        )
+
+    if use_cache:
+        key = backtest_key(
+            symbols, start_date, end_date, initial_balance, trailing_stop_loss,
+            fastperiod, slowperiod, signalperiod
+        )
+        result = memoised_backtest(key, run)
+    else:
+        result = run()
+
+    if isinstance(result, str) or return_monthly_data:
+        return result
+    return result[:2]
+
+def _run_backtest_strategy_MACD(symbols, start_date, end_date, initial_balance, trailing_stop_loss, fastperiod, slowperiod, signalperiod, price_data):
+    """
+    Uncached backtest. Returns (summary, final balance, month-end balances)
+    or an error message string.
+    """
     portfolio_balance = initial_balance
     total_trade_history = []
     return_str = ''
-    monthly_performance = [] if return_monthly_data else None
+    share = initial_balance / len(symbols)
+    # Per-symbol gain over its share, marked to market daily; summed below
+    # the same way portfolio_balance is, so the curve ends at the final balance
+    equity_gains = []
 
     for symbol in symbols:
 
-        data = yf.download(symbol, start=start_date, end=end_date, auto_adjust=True, progress=False)
-        data.columns = data.columns.str.lower()
+        if price_data is not None and symbol in price_data:
+            # Copy: calculate_indicators adds columns in place
+            data = price_data[symbol].copy()
+        else:
+            data = download_symbol_data(symbol, start_date, end_date)
 
         try:
             data = calculate_indicators(data, fastperiod, slowperiod, signalperiod)
         except KeyError:
             return f"{symbol} is not the name of a real stock"
         
-        position = 0
-        balance = portfolio_balance / len(symbols)
-        trade_history = []
-        purchase_price = None
-        highest_price = None
-        
-        for index in range(1, len(data)):
-            macd_line = data['MACD'].iloc[index]
-            signal_line = data['Signal'].iloc[index]
-            price = data['close'].iloc[index]
-
-            if macd_line > signal_line and data['Hist'].iloc[index] > 0 and position == 0:
-                qty = int(balance/price)
-                balance -= qty * price
-                position = qty
-                purchase_price = price
-                highest_price = price
-                trade_history.append({
-                    'symbol': symbol,
-                    'action': 'buy',
-                    'price': price,
-                    'qty': qty,
-                    'date': data.index[index]
-                })
-
-                if position > 0:
-                    highest_price = max(highest_price, price)
-
-            if position > 0 and (macd_line < signal_line or price <= highest_price * (1 - trailing_stop_loss)):
-                balance += position * price
-                trade_history.append({
-                'symbol': symbol,
-                'action': 'sell',
-                'price': price,
-                'qty': qty,
-                'date': data.index[index]
-                })
-                position = 0
-                purchase_price = None
-                highest_price = None
+        allocation = portfolio_balance / len(symbols)
+        close = data['close'].to_numpy(dtype=float)
+        next_buy, next_cross_down = _signal_indices(
+            data['MACD'].to_numpy(dtype=float),
+            data['Signal'].to_numpy(dtype=float),
+            data['Hist'].to_numpy(dtype=float),
+        )
+        balance, position, fills = _run_macd_trades(
+            close, next_buy, next_cross_down, allocation, trailing_stop_loss
+        )
 
         if position > 0:
             balance += position * data['close'].iloc[-1]
 
-        portfolio_balance += balance - (initial_balance / len(symbols))
-        total_trade_history.extend(trade_history)
+        portfolio_balance += balance - share
+        total_trade_history.extend(_trade_history(data, symbol, fills))
+        equity_gains.append(
+            (pd.Series(_equity_curve(close, fills, allocation), index=data.index) - share, allocation - share)
+        )
 
 
         return_str += (
@@ -115,66 +282,102 @@ def backtest_strategy_MACD(symbols, start_date, end_date, initial_balance=100000
             f"Portfolio Initial Balance: ${initial_balance:,.2f}, "
             f"Final Portfolio Balance: ${portfolio_balance:,.2f}\n"
         )
-    return return_str, portfolio_balance
 
-def generate_monthly_performance(symbols, start_date, end_date, initial_balance=100000, fastperiod=12, slowperiod=26, signalperiod=9):
+    return return_str, portfolio_balance, month_end_balances(_portfolio_equity(initial_balance, equity_gains))
+
+def _portfolio_equity(initial_balance, equity_gains):
     """
-    Generate monthly performance data for MACD strategy to use in frontend charts
+    Daily portfolio value: initial balance plus every symbol's marked-to-market
+    gain, aligned on the union of trading days (a symbol without a bar yet
+    contributes its starting gain; afterwards its last value carries forward).
     """
-    from datetime import datetime, timedelta
-    import pandas as pd
-    
-    # Get the optimized backtest results
-    _, final_balance = backtest_strategy_MACD(
-        symbols, start_date, end_date, initial_balance, 
-        fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod
-    )
-    
-    # Calculate number of months between start and end date
-    months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-    if months <= 0:
-        months = 1
-    
-    # Calculate monthly growth rate
-    total_return = (final_balance - initial_balance) / initial_balance
-    monthly_return = (1 + total_return) ** (1/months) - 1
-    
-    # Generate monthly data points
-    monthly_data = []
-    current_balance = initial_balance
-    current_date = start_date
-    
-    for month in range(months + 1):
-        if month == 0:
-            monthly_data.append({
-                'month': 'Start',
-                'balance': initial_balance,
-                'date': current_date.strftime('%Y-%m')
-            })
-        elif month == months:
-            # Use actual final balance for last month
-            monthly_data.append({
-                'month': f'Month {month}',
-                'balance': final_balance,
-                'date': current_date.strftime('%Y-%m')
-            })
-        else:
-            # Use calculated monthly growth
-            current_balance *= (1 + monthly_return)
-            monthly_data.append({
-                'month': f'Month {month}',
-                'balance': round(current_balance, 2),
-                'date': current_date.strftime('%Y-%m')
-            })
-        
-        # Move to next month
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
+    if not equity_gains:
+        return pd.Series(dtype=float)
+    frame = pd.concat([gain for gain, _ in equity_gains], axis=1).sort_index().ffill()
+    for column, (_, starting_gain) in enumerate(equity_gains):
+        frame.iloc[:, column] = frame.iloc[:, column].fillna(starting_gain)
+    return initial_balance + frame.sum(axis=1)
+
+def _grid_indicators(close, pairs, signalperiod):
+    """
+    MACD, signal and histogram arrays of shape (bars, len(pairs)) for every
+    (fastperiod, slowperiod) pair at one signal period.
+
+    Column j equals what calculate_indicators produces for pairs[j]: with
+    pandas, each distinct EMA period is computed once and shared by every
+    pair using it, and the signal EMA runs over all pairs in one call.
+    """
+    if TALIB_AVAILABLE:
+        columns = [
+            talib.MACD(close.to_numpy(), fastperiod=fast, slowperiod=slow, signalperiod=signalperiod)
+            for fast, slow in pairs
+        ]
+        macd, signal, hist = (np.column_stack([col[k] for col in columns]) for k in range(3))
+        return macd, signal, hist
+
+    periods = sorted({p for pair in pairs for p in pair})
+    emas = {p: close.ewm(span=p).mean() for p in periods}
+    macd = pd.DataFrame({j: emas[fast] - emas[slow] for j, (fast, slow) in enumerate(pairs)})
+    signal = macd.ewm(span=signalperiod).mean()
+    hist = macd - signal
+    return macd.to_numpy(), signal.to_numpy(), hist.to_numpy()
+
+def backtest_macd_grid(symbols, start_date, end_date, fastperiods, slowperiods, signalperiods, initial_balance=100000, trailing_stop_loss=0.15, price_data=None):
+    """
+    Backtest every (fastperiod, slowperiod, signalperiod) combination at once.
+
+    Indicators for all combinations are built as 2-D arrays (one column per
+    combination) and the buy / cross-down signal indices are derived in one
+    vectorised pass per signal period. Each combination's final balance is
+    exactly what backtest_strategy_MACD returns for it.
+
+    Returns {(fastperiod, slowperiod, signalperiod): final portfolio balance}.
+    Raises ValueError if a symbol has no price data.
+    """
+    pairs = [(fast, slow) for fast in fastperiods for slow in slowperiods]
+    portfolios = {
+        (fast, slow, sig): initial_balance
+        for fast in fastperiods for slow in slowperiods for sig in signalperiods
+    }
+    share = initial_balance / len(symbols)
+
+    for symbol in symbols:
+        if price_data is not None and symbol in price_data:
+            data = price_data[symbol]
         else:
-            current_date = current_date.replace(month=current_date.month + 1)
-    
-    return monthly_data
+            data = download_symbol_data(symbol, start_date, end_date)
+        if 'close' not in data.columns:
+            raise ValueError(f"{symbol} is not the name of a real stock")
 
+        close = data['close'].astype(float)
+        close_values = close.to_numpy()
+        for signalperiod in signalperiods:
+            next_buy, next_cross_down = _signal_indices(
+                *_grid_indicators(close, pairs, signalperiod)
+            )
+            for j, (fast, slow) in enumerate(pairs):
+                key = (fast, slow, signalperiod)
+                balance, position, _ = _run_macd_trades(
+                    close_values, next_buy[:, j], next_cross_down[:, j],
+                    portfolios[key] / len(symbols), trailing_stop_loss
+                )
+                if position > 0:
+                    balance += position * close_values[-1]
+                portfolios[key] += balance - share
 
+    return portfolios
 
+def generate_monthly_performance(symbols, start_date, end_date, initial_balance=100000, fastperiod=12, slowperiod=26, signalperiod=9, price_data=None):
+    """
+    Generate monthly performance data for MACD strategy to use in frontend charts
 
+    Balances come from the backtest's daily mark-to-market equity, sampled
+    at month ends. The backtest is memoised, so after the final backtest of
+    a request this is a cache hit rather than a second run.
+    """
+    _, final_balance, month_end = backtest_strategy_MACD(
+        symbols, start_date, end_date, initial_balance,
+        fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod,
+        price_data=price_data, return_monthly_data=True
+    )
+    return monthly_performance(start_date, end_date, initial_balance, final_balance, month_end)
@@ -0,0 +1,118 @@
+"""
+Concurrent, rate-limited price fetching for the stock screener.
+
+fetch_batches splits the universe into batches and downloads each batch
+with one provider call, running at most max_concurrency downloads at a
+time. It yields each batch's {symbol: data} as soon as that batch arrives,
+so the screener can score symbols while the rest are still downloading.
+
+Every download attempt first takes a token from a process-wide
+TokenBucket. Concurrent screens (several requests, several threads)
+therefore share one request rate towards the data provider, instead of
+each fetch sleeping a fixed 50 ms.
+
+Downloads run on a dedicated thread pool rather than the event loop's
+default executor. A screen that hits its deadline returns at once; the
+downloads still in flight finish in the background.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Sustained provider requests per second, and how many may be sent at once
+SCREENER_REQUESTS_PER_SECOND = 2.0
+SCREENER_BURST = 4
+
+SCREENER_BATCH_SIZE = 20
+SCREENER_MAX_CONCURRENCY = 4
+SCREENER_FETCH_ATTEMPTS = 2
+
+class TokenBucket:
+    """
+    Token bucket shared across threads and event loops.
+
+    reserve() takes a token immediately, possibly going into debt, and
+    returns how long the caller must wait before using it. Waiters are
+    therefore served in arrival order without holding a lock while asleep.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"rate must be positive and capacity at least 1, got {rate}, {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self):
+        """
+        Blocking acquire, for synchronous callers
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+# Shared by every screen in the process
+_token_bucket = TokenBucket(SCREENER_REQUESTS_PER_SECOND, SCREENER_BURST)
+_fetch_executor = ThreadPoolExecutor(max_workers=SCREENER_MAX_CONCURRENCY, thread_name_prefix='screener')
+
+def wait_for_token():
+    """
+    Block until the shared bucket allows one more provider request
+    """
+    _token_bucket.wait()
+
+async def fetch_batches(symbols, fetch_batch, batch_size=SCREENER_BATCH_SIZE,
+                        max_concurrency=SCREENER_MAX_CONCURRENCY, bucket=None, executor=None):
+    """
+    Yield {symbol: data} for each batch of symbols, in completion order.
+
+    fetch_batch(list_of_symbols) is a blocking call returning {symbol: data}.
+    Each attempt takes a token from bucket (the shared one by default). A
+    batch that fails SCREENER_FETCH_ATTEMPTS times yields None for each of
+    its symbols. Closing the generator early cancels the batches that have
+    not started yet.
+    """
+    bucket = bucket or _token_bucket
+    executor = executor or _fetch_executor
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    symbols = list(symbols)
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+    async def run(batch):
+        async with semaphore:
+            for attempt in range(1, SCREENER_FETCH_ATTEMPTS + 1):
+                await bucket.acquire()
+                try:
+                    return await loop.run_in_executor(executor, fetch_batch, batch)
+                except Exception as e:
+                    logger.warning(f"Batch download failed (attempt {attempt}) for {batch[0]}..{batch[-1]}: {e}")
+            return {symbol: None for symbol in batch}
+
+    tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+    try:
+        for next_batch in asyncio.as_completed(tasks):
+            yield await next_batch
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,161 @@
+"""
+Memoisation of MACD backtest results.
+
+Results are keyed on everything that determines them: the symbol tuple (in
+order, since each symbol's allocation depends on the ones before it), the
+date range, the initial balance, the trailing stop and the MACD periods.
+
+Two tiers:
+  - an in-process LRU (ttl_cache.TTLCache) that serves repeats within a
+    request (e.g. the final backtest and generate_monthly_performance) and
+    across requests handled by the same worker;
+  - an optional SQLite file under $BACKTEST_CACHE_DIR shared by every
+    worker process and kept across restarts.
+
+Entries expire after BACKTEST_CACHE_TTL_SECONDS in both tiers, so ranges
+ending near today pick up newly published bars.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the shared SQLite file; the disk tier is off when unset
+BACKTEST_CACHE_DIR_ENV = 'BACKTEST_CACHE_DIR'
+BACKTEST_CACHE_FILENAME = 'backtest_results.sqlite3'
+
+BACKTEST_CACHE_MAXSIZE = 256
+BACKTEST_CACHE_TTL_SECONDS = 6 * 60 * 60
+
+_MISSING = object()
+
+_memory = TTLCache(maxsize=BACKTEST_CACHE_MAXSIZE, ttl=BACKTEST_CACHE_TTL_SECONDS)
+
+def _day(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+def backtest_key(symbols, start_date, end_date, initial_balance, trailing_stop_loss, fastperiod, slowperiod, signalperiod):
+    """
+    Normalised, hashable cache key for one backtest
+    """
+    return (
+        tuple(str(symbol).strip() for symbol in symbols),
+        _day(start_date),
+        _day(end_date),
+        float(initial_balance),
+        float(trailing_stop_loss),
+        int(fastperiod),
+        int(slowperiod),
+        int(signalperiod),
+    )
+
+class DiskTier:
+    """
+    JSON-encoded results in a SQLite file, shared between processes
+    """
+
+    def __init__(self, directory, ttl=BACKTEST_CACHE_TTL_SECONDS):
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, BACKTEST_CACHE_FILENAME)
+        self.ttl = ttl
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT value FROM results WHERE key = ? AND created > ?',
+                (json.dumps(key), time.time() - self.ttl)
+            ).fetchone()
+        return _MISSING if row is None else tuple(json.loads(row[0]))
+
+    def set(self, key, value):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)',
+                (json.dumps(key), json.dumps(list(value)), time.time())
+            )
+
+_disk_lock = threading.Lock()
+_disk = None
+
+def get_disk_tier():
+    """
+    The process-wide disk tier for $BACKTEST_CACHE_DIR, or None if unset
+    """
+    global _disk
+    directory = os.environ.get(BACKTEST_CACHE_DIR_ENV, '').strip()
+    if not directory:
+        return None
+    with _disk_lock:
+        if _disk is None or _disk.directory != directory:
+            try:
+                _disk = DiskTier(directory)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning('Backtest cache unavailable at %s: %s', directory, e)
+                return None
+        return _disk
+
+def memoised_backtest(key, run):
+    """
+    Return the cached result for key, or call run() and cache its result.
+
+    Only result tuples ((summary, final_balance, month_end) from
+    backtest_strategy_MACD) are cached; anything else (the "not a real
+    stock" message) is returned as-is so it is retried next time.
+    """
+    value = _memory.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    disk = get_disk_tier()
+    if disk is not None:
+        try:
+            value = disk.get(key)
+        except sqlite3.Error as e:
+            logger.warning('Backtest cache read failed: %s', e)
+        if value is not _MISSING:
+            _memory.set(key, value)
+            return value
+
+    value = run()
+    if isinstance(value, tuple):
+        _memory.set(key, value)
+        if disk is not None:
+            try:
+                disk.set(key, value)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning('Backtest cache write failed: %s', e)
+    return value
+
+def clear():
+    """
+    Drop the in-process tier and its counters (the disk tier is left alone)
+    """
+    _memory.clear()
+
+def cache_stats():
+    """
+    Hit/miss counters of the in-process tier, plus whether a disk tier is on
+    """
+    stats = _memory.stats()
+    stats['disk_enabled'] = get_disk_tier() is not None
+    return stats
@@ -0,0 +1,160 @@
+"""
+Parallel evaluation of MACD backtests for the parameter optimizer.
+
+BacktestEvaluator scores batches of (fastperiod, slowperiod, signalperiod)
+parameter sets, either in-process or on a ProcessPoolExecutor. The price
+panel is handed to each worker once, when the worker starts, and is only
+read after that. Tasks carry just the parameters, and results come back in
+submission order, so a run gives the same answer for any worker count.
+
+Symbols inside one backtest still run in order: each symbol's allocation is
+a share of the portfolio balance left by the symbols before it.
+
+Workers are started with 'spawn', not fork: the web app has request and
+background threads, and forking while one of them holds a lock (logging,
+an import, the screener caches) can deadlock the child.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from MACD_trading import backtest_macd_grid, backtest_strategy_MACD
+
+# Env var capping optimizer worker processes per request (1 = no pool)
+OPTIMIZER_WORKERS_ENV = 'OPTIMIZER_WORKERS'
+
+# Trailing stop used for every optimizer backtest
+OPTIMIZER_TRAILING_STOP = 0.1
+
+def optimizer_workers():
+    """
+    Worker count from $OPTIMIZER_WORKERS: a positive integer, or 'auto' for
+    every CPU. Defaults to 1 (no process pool) when unset or invalid.
+    """
+    raw = os.environ.get(OPTIMIZER_WORKERS_ENV, '').strip().lower()
+    if raw == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return 1
+
+def evaluate_parameters(parameters, symbols, start_date, end_date, initial_balance, price_data):
+    """
+    Optimizer objective: negative final balance for one parameter set
+    (parameters are truncated to integers). Returns -initial_balance if the
+    backtest fails. Not memoised: each request tries hundreds of one-off
+    parameter sets, which would evict the /backtest results from the cache.
+    """
+    fastperiod, slowperiod, signalperiod = parameters
+    try:
+        _, final_balance = backtest_strategy_MACD(
+            symbols=symbols,
+            start_date=start_date,
+            end_date=end_date,
+            initial_balance=initial_balance,
+            trailing_stop_loss=OPTIMIZER_TRAILING_STOP,
+            fastperiod=int(fastperiod),
+            slowperiod=int(slowperiod),
+            signalperiod=int(signalperiod),
+            price_data=price_data,
+            use_cache=False
+        )
+        return -final_balance
+    except Exception as e:
+        print(f"Error in objective function: {e}")
+        return -initial_balance  # Return negative initial balance if error occurs
+
+# Set once per worker process by _init_worker; read-only afterwards
+_worker_context = None
+
+def _init_worker(context):
+    global _worker_context
+    _worker_context = context
+
+def _evaluate_in_worker(parameters):
+    return evaluate_parameters(parameters, **_worker_context)
+
+def _run_grid(context, grid):
+    return backtest_macd_grid(
+        context['symbols'], context['start_date'], context['end_date'],
+        *grid,
+        initial_balance=context['initial_balance'],
+        trailing_stop_loss=OPTIMIZER_TRAILING_STOP,
+        price_data=context['price_data']
+    )
+
+def _grid_in_worker(grid):
+    return _run_grid(_worker_context, grid)
+
+class BacktestEvaluator:
+    """
+    Scores MACD parameter sets for one symbol list and date range.
+
+    With max_workers > 1 a process pool is started lazily on first use and
+    kept for the evaluator's lifetime; use it as a context manager (or call
+    close()) to shut the pool down.
+    """
+
+    def __init__(self, symbols, start_date, end_date, initial_balance, price_data, max_workers=1):
+        self.context = {
+            'symbols': symbols,
+            'start_date': start_date,
+            'end_date': end_date,
+            'initial_balance': initial_balance,
+            'price_data': price_data,
+        }
+        self.max_workers = max(1, int(max_workers))
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.context,)
+            )
+        return self._pool
+
+    def evaluate(self, parameter_sets):
+        """
+        Objective value (negative final balance) for each parameter set, in order
+        """
+        parameter_sets = [tuple(p) for p in parameter_sets]
+        if self.max_workers == 1 or len(parameter_sets) < 2:
+            return [evaluate_parameters(p, **self.context) for p in parameter_sets]
+        return list(self._get_pool().map(_evaluate_in_worker, parameter_sets))
+
+    def evaluate_grid(self, fastperiods, slowperiods, signalperiods):
+        """
+        Final balance of every grid combination, as backtest_macd_grid returns,
+        with the signal periods split across workers.
+        """
+        signalperiods = list(signalperiods)
+        if self.max_workers == 1 or len(signalperiods) < 2:
+            return _run_grid(self.context, (fastperiods, slowperiods, signalperiods))
+
+        chunks = [signalperiods[k::self.max_workers] for k in range(self.max_workers)]
+        grids = [(list(fastperiods), list(slowperiods), chunk) for chunk in chunks if chunk]
+        results = list(self._get_pool().map(_grid_in_worker, grids))
+
+        # Rebuild in the serial (fast, slow, signal) order so ties break identically
+        merged = {}
+        for result in results:
+            merged.update(result)
+        return {
+            (fast, slow, sig): merged[(fast, slow, sig)]
+            for fast in fastperiods for slow in slowperiods for sig in signalperiods
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
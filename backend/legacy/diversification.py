@@ -0,0 +1,212 @@
+"""
+Sector- and correlation-aware selection for the stock screener.
+
+diversify picks max_stocks candidates greedily. At each step it takes the
+candidate with the best
+    score - CORRELATION_PENALTY * (highest correlation with a stock already picked)
+and no sector may take more than SECTOR_CAP_SHARE of the slots until
+every other option is exhausted. Picking a stock updates each remaining
+candidate's highest correlation with one column of the matrix, so a
+selection costs O(n * max_stocks).
+
+Correlations are daily-return correlations from the screener's cached
+price frames (screener_cache), so diversifying never downloads anything.
+Where there is no usable history for a pair, the static map below stands
+in: SAME_INDUSTRY_CORRELATION for the same industry, SAME_SECTOR_CORRELATION
+for the same sector, 0 otherwise.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import screener_cache
+
+CORRELATION_PENALTY = 20.0
+SECTOR_CAP_SHARE = 0.4
+
+SAME_INDUSTRY_CORRELATION = 0.8
+SAME_SECTOR_CORRELATION = 0.5
+
+# Only the best CANDIDATE_POOL_FACTOR * max_stocks candidates are correlated
+CANDIDATE_POOL_FACTOR = 4
+
+# Daily returns used for correlations, and the overlap a pair needs
+RETURN_LOOKBACK = 60
+MIN_RETURN_OVERLAP = 20
+
+# symbol -> (sector, industry) for the screener universe
+SECTORS = {
+    # Technology
+    'AAPL': ('Technology', 'Consumer Electronics'),
+    'MSFT': ('Technology', 'Software'),
+    'NVDA': ('Technology', 'Semiconductors'),
+    'AMD': ('Technology', 'Semiconductors'),
+    'INTC': ('Technology', 'Semiconductors'),
+    'CRM': ('Technology', 'Software'),
+    'ORCL': ('Technology', 'Software'),
+    'ADBE': ('Technology', 'Software'),
+    'SHOP': ('Technology', 'Software'),
+    'SQ': ('Technology', 'Software'),
+    'UBER': ('Technology', 'Software'),
+    'LYFT': ('Technology', 'Software'),
+    'ZOOM': ('Technology', 'Software'),
+    'ZM': ('Technology', 'Software'),
+    'DOCU': ('Technology', 'Software'),
+    'OKTA': ('Technology', 'Software'),
+    'SNOW': ('Technology', 'Software'),
+    'PLTR': ('Technology', 'Software'),
+    # Communication Services
+    'GOOGL': ('Communication Services', 'Internet Content'),
+    'META': ('Communication Services', 'Internet Content'),
+    'TWTR': ('Communication Services', 'Internet Content'),
+    'SNAP': ('Communication Services', 'Internet Content'),
+    'PINS': ('Communication Services', 'Internet Content'),
+    'SPOT': ('Communication Services', 'Internet Content'),
+    'NFLX': ('Communication Services', 'Entertainment'),
+    'ROKU': ('Communication Services', 'Entertainment'),
+    'DIS': ('Communication Services', 'Entertainment'),
+    'PARA': ('Communication Services', 'Entertainment'),
+    'WBD': ('Communication Services', 'Entertainment'),
+    'FOXA': ('Communication Services', 'Entertainment'),
+    'CMCSA': ('Communication Services', 'Telecom Services'),
+    'VZ': ('Communication Services', 'Telecom Services'),
+    'T': ('Communication Services', 'Telecom Services'),
+    'TMUS': ('Communication Services', 'Telecom Services'),
+    'CHTR': ('Communication Services', 'Telecom Services'),
+    # Consumer Cyclical
+    'AMZN': ('Consumer Cyclical', 'Internet Retail'),
+    'ETSY': ('Consumer Cyclical', 'Internet Retail'),
+    'W': ('Consumer Cyclical', 'Internet Retail'),
+    'CHWY': ('Consumer Cyclical', 'Internet Retail'),
+    'TSLA': ('Consumer Cyclical', 'Auto Manufacturers'),
+    'HD': ('Consumer Cyclical', 'Home Improvement Retail'),
+    'SBUX': ('Consumer Cyclical', 'Restaurants'),
+    'MCD': ('Consumer Cyclical', 'Restaurants'),
+    'NKE': ('Consumer Cyclical', 'Apparel'),
+    'LULU': ('Consumer Cyclical', 'Apparel'),
+    # Consumer Defensive
+    'WMT': ('Consumer Defensive', 'Discount Stores'),
+    'COST': ('Consumer Defensive', 'Discount Stores'),
+    'TGT': ('Consumer Defensive', 'Discount Stores'),
+    'PG': ('Consumer Defensive', 'Household Products'),
+    'KO': ('Consumer Defensive', 'Beverages'),
+    # Healthcare
+    'JNJ': ('Healthcare', 'Drug Manufacturers'),
+    'PFE': ('Healthcare', 'Drug Manufacturers'),
+    'ABBV': ('Healthcare', 'Drug Manufacturers'),
+    'GILD': ('Healthcare', 'Drug Manufacturers'),
+    'MRNA': ('Healthcare', 'Biotechnology'),
+    'BIIB': ('Healthcare', 'Biotechnology'),
+    'REGN': ('Healthcare', 'Biotechnology'),
+    'VRTX': ('Healthcare', 'Biotechnology'),
+    'UNH': ('Healthcare', 'Healthcare Plans'),
+    'TMO': ('Healthcare', 'Diagnostics & Research'),
+    'DHR': ('Healthcare', 'Diagnostics & Research'),
+    'ISRG': ('Healthcare', 'Medical Instruments'),
+    # Financials
+    'JPM': ('Financials', 'Banks'),
+    'BAC': ('Financials', 'Banks'),
+    'C': ('Financials', 'Banks'),
+    'WFC': ('Financials', 'Banks'),
+    'USB': ('Financials', 'Banks'),
+    'PNC': ('Financials', 'Banks'),
+    'TFC': ('Financials', 'Banks'),
+    'V': ('Financials', 'Credit Services'),
+    'MA': ('Financials', 'Credit Services'),
+    'PYPL': ('Financials', 'Credit Services'),
+    'COF': ('Financials', 'Credit Services'),
+    'AXP': ('Financials', 'Credit Services'),
+    'GS': ('Financials', 'Capital Markets'),
+    'MS': ('Financials', 'Capital Markets'),
+    'COIN': ('Financials', 'Capital Markets'),
+    'BLK': ('Financials', 'Asset Management'),
+    # Industrials
+    'CAT': ('Industrials', 'Farm & Heavy Machinery'),
+    'BA': ('Industrials', 'Aerospace & Defense'),
+    'GE': ('Industrials', 'Aerospace & Defense'),
+    'RTX': ('Industrials', 'Aerospace & Defense'),
+    'LMT': ('Industrials', 'Aerospace & Defense'),
+    'MMM': ('Industrials', 'Conglomerates'),
+    'HON': ('Industrials', 'Conglomerates'),
+    'UPS': ('Industrials', 'Integrated Freight & Logistics'),
+    # Energy
+    'XOM': ('Energy', 'Oil & Gas Integrated'),
+    'CVX': ('Energy', 'Oil & Gas Integrated'),
+}
+
+def sector_correlations(symbols, sectors=SECTORS):
+    """
+    Stand-in correlation matrix from the static sector/industry map
+    """
+    labels = [sectors.get(symbol, (None, None)) for symbol in symbols]
+    sector = np.array([s or f'?{i}' for i, (s, _) in enumerate(labels)])
+    industry = np.array([f'{s}/{ind}' if s and ind else f'?{i}' for i, (s, ind) in enumerate(labels)])
+    matrix = np.where(sector[:, None] == sector[None, :], SAME_SECTOR_CORRELATION, 0.0)
+    matrix = np.where(industry[:, None] == industry[None, :], SAME_INDUSTRY_CORRELATION, matrix)
+    np.fill_diagonal(matrix, 1.0)
+    return matrix
+
+def return_correlations(symbols, days=100, lookback=RETURN_LOOKBACK):
+    """
+    Daily-return correlations over the last lookback bars of the cached
+    price frames, NaN for pairs without MIN_RETURN_OVERLAP shared returns
+    """
+    closes = {}
+    for symbol in symbols:
+        frame = screener_cache.get_frame(symbol, days)
+        if frame is not None and 'close' in frame:
+            closes[symbol] = frame['close']
+
+    matrix = np.full((len(symbols), len(symbols)), np.nan)
+    if len(closes) < 2:
+        return matrix
+    returns = pd.DataFrame(closes).pct_change().iloc[-lookback:]
+    measured = returns.corr(min_periods=MIN_RETURN_OVERLAP).reindex(index=symbols, columns=symbols)
+    return measured.to_numpy(dtype=float, copy=True)
+
+def diversify(candidates, max_stocks, correlations=None, sectors=SECTORS):
+    """
+    Greedy max-score, min-correlation subset of candidates (dicts with
+    'symbol' and 'score'), in the order they were picked.
+
+    correlations is an n x n matrix aligned with candidates; NaN entries
+    (and the whole matrix when None) fall back to sector_correlations.
+    """
+    n = len(candidates)
+    if n <= max_stocks:
+        return list(candidates)
+
+    symbols = [candidate['symbol'] for candidate in candidates]
+    scores = np.array([candidate['score'] for candidate in candidates], dtype=float)
+    corr = sector_correlations(symbols, sectors)
+    if correlations is not None:
+        corr = np.where(np.isnan(correlations), corr, correlations)
+
+    sector_of = np.array([sectors.get(symbol, (None, None))[0] for symbol in symbols], dtype=object)
+    cap = max(1, math.ceil(max_stocks * SECTOR_CAP_SHARE))
+    sector_counts = {}
+    capped = np.zeros(n, dtype=bool)
+
+    available = np.ones(n, dtype=bool)
+    max_corr = np.zeros(n)
+    selected = []
+    for respect_cap in (True, False):
+        while len(selected) < max_stocks:
+            eligible = available & ~capped if respect_cap else available
+            if not eligible.any():
+                break
+            # Negative correlation earns no bonus
+            objective = np.where(eligible, scores - CORRELATION_PENALTY * np.maximum(max_corr, 0), -np.inf)
+            pick = int(np.argmax(objective))
+
+            selected.append(pick)
+            available[pick] = False
+            max_corr = np.maximum(max_corr, corr[:, pick])
+            sector = sector_of[pick]
+            if sector is not None:
+                sector_counts[sector] = sector_counts.get(sector, 0) + 1
+                if sector_counts[sector] >= cap:
+                    capped |= sector_of == sector
+
+    return [candidates[i] for i in selected]
@@ -0,0 +1,52 @@
+"""
+Month-end aggregation of daily equity curves for the frontend charts.
+
+Backtests (and the SPY buy-and-hold comparison) mark their holdings to
+market every trading day. month_end_balances reduces that daily curve to
+the last value of each calendar month. monthly_performance turns it into
+the {'month', 'balance', 'date'} entries that the charts plot.
+"""
+import pandas as pd
+
+def month_end_balances(equity):
+    """
+    {'YYYY-MM': balance at the last bar of that month} for a daily equity Series
+    """
+    equity = equity.dropna()
+    if equity.empty:
+        return {}
+    monthly = equity.groupby(equity.index.to_period('M')).last()
+    return {str(period): float(value) for period, value in monthly.items()}
+
+def monthly_performance(start_date, end_date, initial_balance, final_balance, month_end):
+    """
+    Chart entries from start_date's month through end_date's month.
+
+    'Start' is the initial balance. 'Month k' is the balance carried into its
+    month, which is the close of the month before it. Months with no bars carry
+    the previous value forward. The last entry is the actual final balance.
+    """
+    # Calculate number of months between start and end date
+    months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+    if months <= 0:
+        months = 1
+
+    start_period = pd.Period(start_date, freq='M')
+    monthly_data = [{
+        'month': 'Start',
+        'balance': initial_balance,
+        'date': start_period.strftime('%Y-%m')
+    }]
+
+    carried = initial_balance
+    for month in range(1, months + 1):
+        closed = str(start_period + (month - 1))
+        carried = month_end.get(closed, carried)
+        monthly_data.append({
+            'month': f'Month {month}',
+            # Use actual final balance for last month
+            'balance': final_balance if month == months else round(carried, 2),
+            'date': (start_period + month).strftime('%Y-%m')
+        })
+
+    return monthly_data
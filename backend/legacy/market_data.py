@@ -0,0 +1,79 @@
+"""
+Batched daily-bar downloads shared by the MACD backtests and the SPY comparison.
+
+load_bars takes every symbol a request needs, plus the benchmark tickers,
+and fetches the ones that are not cached yet in a single provider call (one
+grouped yf.download by default; see market_data_provider). Each per-symbol
+frame is cached by (symbol, start day, end day). For example,
+/MACD-strategy downloads the stocks together with SPY, so a following
+/spy-investment call for the same dates is served from memory.
+
+End dates are exclusive, as in yfinance.
+"""
+from datetime import date, datetime
+
+import pandas as pd
+
+from market_data_provider import get_provider
+from ttl_cache import TTLCache
+
+# Fetched alongside every batch so the benchmark comparison reuses it
+BENCHMARK_TICKERS = ('SPY',)
+
+MARKET_DATA_MAXSIZE = 256
+MARKET_DATA_TTL_SECONDS = 60 * 60
+
+_frames = TTLCache(maxsize=MARKET_DATA_MAXSIZE, ttl=MARKET_DATA_TTL_SECONDS)
+
+def _day(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+def load_bars(symbols, start_date, end_date, benchmarks=BENCHMARK_TICKERS):
+    """
+    {symbol: OHLC frame} for symbols and benchmarks, in that order.
+
+    Uncached symbols are fetched together in one get_provider().download call.
+    Non-empty frames are cached; callers get copies they may modify.
+    Exceptions from the provider are raised to the caller.
+    """
+    wanted = list(dict.fromkeys(list(symbols) + list(benchmarks)))
+    start_day, end_day = _day(start_date), _day(end_date)
+
+    bars = {}
+    missing = []
+    for symbol in wanted:
+        frame = _frames.get((symbol, start_day, end_day))
+        if frame is None:
+            missing.append(symbol)
+        else:
+            bars[symbol] = frame
+
+    if missing:
+        fetched = get_provider().download(missing, start_date, end_date)
+        for symbol in missing:
+            frame = fetched.get(symbol, pd.DataFrame())
+            if not frame.empty:
+                _frames.set((symbol, start_day, end_day), frame)
+            bars[symbol] = frame
+
+    return {symbol: bars[symbol].copy() for symbol in wanted}
+
+def load_symbol(symbol, start_date, end_date):
+    """
+    One symbol's bars, from the cache when an earlier batch included it
+    """
+    return load_bars([symbol], start_date, end_date, benchmarks=())[symbol]
+
+def clear():
+    """
+    Drop every cached frame and reset the counters
+    """
+    _frames.clear()
+
+def cache_stats():
+    """
+    Hit/miss counters of the frame cache
+    """
+    return _frames.stats()
@@ -2,8 +2,10 @@ import numpy as np
 from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import Matern
 from scipy.optimize import minimize
+from scipy.stats import norm
 import random
-from MACD_trading import backtest_strategy_MACD
+from MACD_trading import backtest_strategy_MACD, load_price_panel
+from backtest_pool import BacktestEvaluator
 from datetime import datetime
 
 # Set random seeds for deterministic results - must be set each time the function is called
@@ -17,31 +19,140 @@ parameter_bounds = {
     'signalperiod': (5, 10)
 }
 
-def optimize_macd_parameters(symbols, start_date, end_date, initial_balance=100000, n_iterations=15):
+# 'bayesian' samples n_iterations points with a Gaussian process;
+# 'exhaustive' backtests every integer combination in parameter_bounds
+OPTIMIZATION_MODES = ('bayesian', 'exhaustive')
+
+def parameter_grid():
+    """
+    Every integer value of each parameter within parameter_bounds (inclusive)
+    """
+    return {name: range(low, high + 1) for name, (low, high) in parameter_bounds.items()}
+
+def optimize_macd_parameters_exhaustive(symbols, start_date, end_date, initial_balance=100000, price_data=None, max_workers=1):
+    """
+    Find the best MACD parameters by backtesting the whole parameter grid.
+
+    The objective only depends on the integer parts of the parameters, so
+    this is the exact optimum the Bayesian search approximates. Ties go to
+    the smallest (fastperiod, slowperiod, signalperiod). With max_workers > 1
+    the signal periods are split across a process pool.
+    """
+    grid = parameter_grid()
+    with BacktestEvaluator(symbols, start_date, end_date, initial_balance, price_data, max_workers) as evaluator:
+        balances = evaluator.evaluate_grid(grid['fastperiod'], grid['slowperiod'], grid['signalperiod'])
+    # max() keeps the first of equal balances; grid order is ascending
+    (fastperiod, slowperiod, signalperiod), best_balance = max(balances.items(), key=lambda item: item[1])
+
+    return {
+        'optimized_params': {
+            'fastperiod': fastperiod,
+            'slowperiod': slowperiod,
+            'signalperiod': signalperiod
+        },
+        'best_balance': best_balance,
+        'total_return': ((best_balance - initial_balance) / initial_balance) * 100
+    }
+
+# Acquisition search: score this many random candidates with one batched
+# gp.predict call, then polish the best few with L-BFGS-B
+ACQUISITION_CANDIDATES = 2048
+ACQUISITION_REFINE_TOP = 3
+# Exploration margin for Expected Improvement, in dollars of final balance
+EI_XI = 0.01
+
+def expected_improvement(mean, std, best_y, xi=EI_XI):
+    """
+    Expected Improvement below best_y (the objective is minimised).
+
+    EI = (best_y - mean - xi) * Phi(z) + std * phi(z), z = (best_y - mean - xi) / std.
+    Where the GP is certain (std == 0) this is max(best_y - mean - xi, 0).
+    """
+    mean = np.asarray(mean, dtype=float)
+    std = np.asarray(std, dtype=float)
+    improvement = best_y - mean - xi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = improvement / std
+        ei = improvement * norm.cdf(z) + std * norm.pdf(z)
+    return np.where(std > 0, ei, np.maximum(improvement, 0.0))
+
+def propose_next_samples(gp, best_y, rng, batch_size=1):
+    """
+    Return batch_size points in parameter_bounds with the highest Expected
+    Improvement, each with distinct integer parameters (the backtest only
+    sees the integer parts, so near-duplicates would waste evaluations).
+
+    Scores ACQUISITION_CANDIDATES uniform random points in one gp.predict
+    call and refines the top ACQUISITION_REFINE_TOP with L-BFGS-B; the
+    remaining batch slots are filled from the best-scoring candidates.
+    """
+    bounds = [
+        parameter_bounds['fastperiod'],
+        parameter_bounds['slowperiod'],
+        parameter_bounds['signalperiod']
+    ]
+    low, high = np.array(bounds, dtype=float).T
+    candidates = rng.uniform(low, high, size=(ACQUISITION_CANDIDATES, len(bounds)))
+    mean, std = gp.predict(candidates, return_std=True)
+    scores = expected_improvement(mean, std, best_y)
+
+    def negative_ei(x):
+        m, s = gp.predict(x.reshape(1, -1), return_std=True)
+        return -float(expected_improvement(m, s, best_y)[0])
+
+    order = np.argsort(-scores, kind='stable')
+    pool = [(-scores[k], candidates[k]) for k in order]
+    for start in candidates[order[:ACQUISITION_REFINE_TOP]]:
+        res = minimize(negative_ei, start, bounds=bounds, method='L-BFGS-B')
+        pool.append((float(res.fun), res.x))
+    # Stable sort: a refined point only displaces a candidate it strictly beats
+    pool.sort(key=lambda item: item[0])
+
+    samples = []
+    seen = set()
+    for _, point in pool:
+        key = tuple(int(v) for v in point)
+        if key not in seen:
+            seen.add(key)
+            samples.append(np.asarray(point))
+            if len(samples) == batch_size:
+                break
+    return samples
+
+def propose_next_sample(gp, best_y, rng):
+    """
+    Return the point in parameter_bounds with the highest Expected Improvement.
+    """
+    return propose_next_samples(gp, best_y, rng, batch_size=1)[0]
+
+def optimize_macd_parameters(symbols, start_date, end_date, initial_balance=100000, n_iterations=15, price_data=None, mode='bayesian', batch_size=1, max_workers=1):
     """
     Optimize MACD parameters for given stocks and date range using Bayesian optimization
+
+    price_data: optional {symbol: OHLC DataFrame} from load_price_panel. When
+    omitted, prices are downloaded once here and shared by every evaluation.
+    mode: 'bayesian' (default) or 'exhaustive' to search the whole grid
+    (n_iterations is then ignored).
+    batch_size: candidates proposed and evaluated per GP iteration.
+    max_workers: worker processes for evaluating a batch (1 = in-process).
+    Results do not depend on max_workers.
     """
+    if mode not in OPTIMIZATION_MODES:
+        raise ValueError(f"mode must be one of {OPTIMIZATION_MODES}, got {mode!r}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
     # Reset random seeds at the start of each optimization
     set_random_seeds()
 
-    
-    def objective(parameters):
-        fastperiod, slowperiod, signalperiod = parameters
-        try:
-            _, final_balance = backtest_strategy_MACD(
-                symbols=symbols,
-                start_date=start_date,
-                end_date=end_date,
-                initial_balance=initial_balance,
-                trailing_stop_loss=0.1,
-                fastperiod=int(fastperiod),
-                slowperiod=int(slowperiod),
-                signalperiod=int(signalperiod)
-            )
-            return -final_balance
-        except Exception as e:
-            print(f"Error in objective function: {e}")
-            return -initial_balance  # Return negative initial balance if error occurs
+    if price_data is None:
+        price_data = load_price_panel(symbols, start_date, end_date)
+
+    if mode == 'exhaustive':
+        return optimize_macd_parameters_exhaustive(
+            symbols, start_date, end_date, initial_balance,
+            price_data=price_data, max_workers=max_workers
+        )
 
     kernel = Matern(nu=2.5)
     gp = GaussianProcessRegressor(
@@ -60,55 +171,21 @@ def optimize_macd_parameters(symbols, start_date, end_date, initial_balance=1000
             for _ in range(n_samples)
         ]
 
-    X_init = np.array(generate_initial_samples())
-    y_init = np.array([objective(x) for x in X_init])
-    
-    gp.fit(X_init, y_init)
+    with BacktestEvaluator(symbols, start_date, end_date, initial_balance, price_data, max_workers) as evaluator:
+        X_init = np.array(generate_initial_samples())
+        y_init = np.array(evaluator.evaluate(X_init))
 
-    for i in range(n_iterations):
-        def acquisition(x):
-            mean, std = gp.predict(np.array(x).reshape(1, -1), return_std=True)
-            best_y = min(y_init)
-            if std > 0:
-                z = (best_y - mean) / std
-                return -(mean + std * z)
-            else:
-                return -mean
-        
-        next_sample = []
-        best_acq_value = float('inf')
-        
-        # Use deterministic sampling instead of random
-        np.random.seed(42 + i)  # Different seed per iteration but still deterministic
-        random.seed(42 + i)
-        
-        for j in range(100):
-            random_sample = [
-                random.uniform(*parameter_bounds['fastperiod']),
-                random.uniform(*parameter_bounds['slowperiod']),
-                random.uniform(*parameter_bounds['signalperiod'])
-            ]
-
-            res = minimize(
-                acquisition, 
-                random_sample, 
-                bounds=[
-                    parameter_bounds['fastperiod'], 
-                    parameter_bounds['slowperiod'], 
-                    parameter_bounds['signalperiod']
-                ],
-                method='L-BFGS-B'  # Use deterministic method
-            )
-            if res.fun < best_acq_value:
-                best_acq_value = res.fun
-                next_sample = res.x
-
-        next_sample = np.array(next_sample)
-        next_y = objective(next_sample)
-        X_init = np.vstack((X_init, next_sample))
-        y_init = np.append(y_init, next_y)
         gp.fit(X_init, y_init)
 
+        for i in range(n_iterations):
+            # Different seed per iteration but still deterministic
+            rng = np.random.default_rng(42 + i)
+            next_samples = np.array(propose_next_samples(gp, min(y_init), rng, batch_size))
+            next_y = evaluator.evaluate(next_samples)
+            X_init = np.vstack((X_init, next_samples))
+            y_init = np.append(y_init, next_y)
+            gp.fit(X_init, y_init)
+
     best_params = X_init[np.argmin(y_init)]
     best_balance = -min(y_init)
     
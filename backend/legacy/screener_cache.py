@@ -0,0 +1,118 @@
+"""
+Price frames and indicator state shared by every StockScreener.
+
+A new StockScreener is built for each /get-optimal-stocks and /auto-trade
+request (and one lives in the snapshot refresher), so the caches live here
+at module level rather than on the instance:
+  - frames: the recent daily bars of (symbol, days), for an hour;
+  - indicators: the last indicator frame and IndicatorState of
+    (symbol, days), so the next screen only processes new bars.
+
+Both are ttl_cache.TTLCache instances: lock-protected, LRU-bounded and
+expiring per entry, so the async screener, the refresher thread and
+request threads can share them.
+
+Histories for a days-long window start at history_start(days): now - days
+rounded down to a HISTORY_ANCHOR_DAYS grid. The start stays put while the
+end grows, so cached indicators extend bar by bar; scoring only looks at
+scoring_window(frame, days), the last days calendar days of the history.
+
+A lookup is served by the smallest cached window of the same symbol that
+covers it: a 60-day request reuses a cached 100-day frame, trimmed to
+bars on or after history_start(60).
+"""
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from ttl_cache import TTLCache
+
+SCREENER_FRAMES_MAXSIZE = 512
+SCREENER_FRAMES_TTL_SECONDS = 60 * 60
+SCREENER_INDICATORS_MAXSIZE = 512
+SCREENER_INDICATORS_TTL_SECONDS = 24 * 60 * 60
+
+# Frames shorter than this after trimming are treated as missing
+MIN_CACHED_BARS = 30
+
+# History starts move in steps of this many days
+HISTORY_ANCHOR_DAYS = 30
+
+_frames = TTLCache(maxsize=SCREENER_FRAMES_MAXSIZE, ttl=SCREENER_FRAMES_TTL_SECONDS)
+_indicators = TTLCache(maxsize=SCREENER_INDICATORS_MAXSIZE, ttl=SCREENER_INDICATORS_TTL_SECONDS)
+
+# Every window size stored so far, to find a larger cached window
+_windows_lock = threading.Lock()
+_windows = set()
+
+def history_start(days, now=None):
+    """
+    First day of the history fetched for a days-long window: now - days,
+    rounded down to the HISTORY_ANCHOR_DAYS grid
+    """
+    earliest = ((now or datetime.now()) - timedelta(days=days)).toordinal()
+    return datetime.combine(date.fromordinal(earliest - earliest % HISTORY_ANCHOR_DAYS), datetime.min.time())
+
+def scoring_window(frame, days):
+    """
+    The rows of a history within days calendar days of its last bar
+    """
+    if frame is None or frame.empty:
+        return frame
+    return frame.loc[frame.index >= frame.index[-1] - pd.Timedelta(days=days)]
+
+def _trim(frame, days):
+    cutoff = pd.Timestamp(history_start(days))
+    if getattr(frame.index, 'tz', None) is not None:
+        cutoff = cutoff.tz_localize(frame.index.tz)
+    return frame.loc[frame.index >= cutoff]
+
+def get_frame(symbol, days):
+    """
+    Cached history of a days-long window for symbol, or None
+    """
+    frame = _frames.get((symbol, days))
+    if frame is not None:
+        return frame
+    with _windows_lock:
+        larger = sorted(window for window in _windows if window > days)
+    for window in larger:
+        frame = _frames.get((symbol, window))
+        if frame is not None:
+            trimmed = _trim(frame, days)
+            return trimmed if len(trimmed) >= MIN_CACHED_BARS else None
+    return None
+
+def set_frame(symbol, days, frame):
+    with _windows_lock:
+        _windows.add(days)
+    _frames.set((symbol, days), frame)
+
+def get_indicators(symbol, days):
+    """
+    (indicator frame, IndicatorState) from the last screen, or None.
+    Shared between threads: extend a copy of the state, then set_indicators.
+    """
+    return _indicators.get((symbol, days))
+
+def set_indicators(symbol, days, frame, state):
+    _indicators.set((symbol, days), (frame, state))
+
+def drop_indicators(symbol, days):
+    _indicators.set((symbol, days), None)
+
+def clear():
+    """
+    Drop every cached frame and indicator state and reset the counters
+    """
+    _frames.clear()
+    _indicators.clear()
+    with _windows_lock:
+        _windows.clear()
+
+def cache_stats():
+    """
+    Hit/miss counters of the frame and indicator caches
+    """
+    return {'frames': _frames.stats(), 'indicators': _indicators.stats()}
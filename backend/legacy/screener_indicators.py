@@ -0,0 +1,204 @@
+"""
+Incremental indicators for the stock screener.
+
+StockScreener.calculate_technical_indicators recomputes SMA20/50, the
+20-day volume average, MACD(12, 26, 9), RSI(14) and ATR(14) over the whole
+window with pandas. IndicatorState keeps only the carries those indicators
+need:
+  - the EMA value and its total weight, since pandas' ewm(adjust=True)
+    divides by the sum of weights;
+  - a running sum plus the values still inside each rolling window;
+  - the previous close.
+With these, each new bar costs O(1) instead of a pass over the window.
+
+extend_indicators appends indicator rows for the bars that arrived after
+the state's last bar, so the result matches a fresh recompute up to
+rounding. The state is kept one bar behind the frame: the latest bar may
+still be forming during market hours, and its row is recomputed from the
+state on every call instead of invalidating the cache.
+
+It returns None when the cached rows no longer match the data; the caller
+then recomputes from scratch. That includes a history whose first bar
+moved, since a fresh recompute restarts the EMAs at the first bar and
+changes MACD, Signal and Hist on every row. The screener therefore fetches
+histories from a fixed start (screener_cache.history_start) that only
+moves every HISTORY_ANCHOR_DAYS, and trims to the scoring window after
+computing indicators.
+"""
+import copy
+import math
+from collections import deque
+
+import pandas as pd
+
+INDICATOR_COLUMNS = ['sma_20', 'sma_50', 'volume_avg_20', 'MACD', 'Signal', 'Hist', 'RSI', 'ATR']
+
+FAST_SPAN, SLOW_SPAN, SIGNAL_SPAN = 12, 26, 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+
+class _Ema:
+    """
+    pandas ewm(span=span, adjust=True).mean(), one value at a time
+    """
+
+    def __init__(self, span, value=math.nan, weight=0.0):
+        self.decay = 1 - 2 / (span + 1)
+        self.value = value
+        self.weight = weight
+
+    @classmethod
+    def seeded(cls, span, value, count):
+        ema = cls(span, value)
+        # Sum of decay**i over the count observations seen so far
+        ema.weight = (1 - ema.decay ** count) / (1 - ema.decay)
+        return ema
+
+    def update(self, x):
+        weight = 1 + self.decay * self.weight
+        if self.weight:
+            self.value = (x + self.decay * self.weight * self.value) / weight
+        else:
+            self.value = x
+        self.weight = weight
+        return self.value
+
+class _RollingMean:
+    """
+    pandas rolling(window).mean() over a stream, with a running sum
+    """
+
+    def __init__(self, window, values=()):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        for value in values:
+            self.update(value)
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        return self.total / self.window if len(self.values) == self.window else math.nan
+
+class IndicatorState:
+    """
+    Carries for extending one symbol's screener indicators bar by bar
+    """
+
+    def __init__(self, last_index, last_close, ema_fast, ema_slow, signal,
+                 sma_20, sma_50, volume_20, gains, losses, true_ranges):
+        self.last_index = last_index
+        self.last_close = last_close
+        self.ema_fast = ema_fast
+        self.ema_slow = ema_slow
+        self.signal = signal
+        self.sma_20 = sma_20
+        self.sma_50 = sma_50
+        self.volume_20 = volume_20
+        self.gains = gains
+        self.losses = losses
+        self.true_ranges = true_ranges
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        State after the last row of a frame from calculate_technical_indicators
+        (pandas path)
+        """
+        close, high, low = frame['close'], frame['high'], frame['low']
+        count = len(frame)
+
+        delta = close.diff()
+        gains = delta.where(delta > 0, 0)
+        losses = -delta.where(delta < 0, 0)
+        prev_close = close.shift()
+        true_range = pd.concat(
+            [high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1
+        ).max(axis=1)
+
+        return cls(
+            last_index=frame.index[-1],
+            last_close=float(close.iloc[-1]),
+            ema_fast=_Ema.seeded(FAST_SPAN, float(close.ewm(span=FAST_SPAN).mean().iloc[-1]), count),
+            ema_slow=_Ema.seeded(SLOW_SPAN, float(close.ewm(span=SLOW_SPAN).mean().iloc[-1]), count),
+            signal=_Ema.seeded(SIGNAL_SPAN, float(frame['Signal'].iloc[-1]), count),
+            sma_20=_RollingMean(20, close.iloc[-20:]),
+            sma_50=_RollingMean(50, close.iloc[-50:]),
+            volume_20=_RollingMean(20, frame['volume'].iloc[-20:]),
+            gains=_RollingMean(RSI_PERIOD, gains.iloc[-RSI_PERIOD:]),
+            losses=_RollingMean(RSI_PERIOD, losses.iloc[-RSI_PERIOD:]),
+            true_ranges=_RollingMean(ATR_PERIOD, true_range.iloc[-ATR_PERIOD:]),
+        )
+
+    def update(self, index, high, low, close, volume):
+        """
+        Advance by one bar and return its indicator values (INDICATOR_COLUMNS)
+        """
+        prev_close = self.last_close
+        delta = close - prev_close
+        avg_gain = self.gains.update(delta if delta > 0 else 0.0)
+        avg_loss = self.losses.update(-delta if delta < 0 else 0.0)
+        if avg_loss:
+            rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        else:
+            # pandas: x/0 is inf (RSI 100) and 0/0 is NaN
+            rsi = 100.0 if avg_gain > 0 else math.nan
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        signal = self.signal.update(macd)
+
+        self.last_index = index
+        self.last_close = close
+        return {
+            'sma_20': self.sma_20.update(close),
+            'sma_50': self.sma_50.update(close),
+            'volume_avg_20': self.volume_20.update(volume),
+            'MACD': macd,
+            'Signal': signal,
+            'Hist': macd - signal,
+            'RSI': rsi,
+            'ATR': self.true_ranges.update(true_range),
+        }
+
+def extend_indicators(frame, state, data):
+    """
+    Indicator frame for data, reusing frame (the last result for this symbol).
+
+    state is the IndicatorState after the bar before frame's last row: the
+    last bar may be a partial (intraday) bar, so it is recomputed from state
+    each time rather than trusted. state advances to the bar before data's
+    last row, ready for the next call.
+
+    Returns None when frame cannot be reused: data starts on a different
+    bar than frame, the close of state's bar changed, or the bars do not
+    line up.
+    """
+    if state.last_index not in data.index or data.index[0] != frame.index[0]:
+        return None
+    if not math.isclose(float(data.at[state.last_index, 'close']), state.last_close, rel_tol=1e-9):
+        return None
+
+    new_bars = data.loc[data.index > state.last_index]
+    if new_bars.empty:
+        return None
+    last_bar = ['high', 'low', 'close', 'volume']
+    if frame.index.equals(data.index) and frame[last_bar].iloc[-1].equals(data[last_bar].iloc[-1]):
+        # Same bars as last time (e.g. served from the data cache)
+        return frame
+
+    kept = frame.loc[:state.last_index, INDICATOR_COLUMNS]
+    bars = list(zip(new_bars.index, new_bars[['high', 'low', 'close', 'volume']].itertuples(index=False)))
+    rows = [state.update(index, *map(float, bar)) for index, bar in bars[:-1]]
+    # The last bar goes through a copy, so the next call can replace it
+    index, bar = bars[-1]
+    rows.append(copy.deepcopy(state).update(index, *map(float, bar)))
+
+    indicators = pd.concat([kept, pd.DataFrame(rows, index=new_bars.index)])
+    if not indicators.index.equals(data.index):
+        return None
+
+    result = data.drop(columns=INDICATOR_COLUMNS, errors='ignore')
+    return pd.concat([result, indicators], axis=1)
@@ -0,0 +1,165 @@
+"""
+Cross-sectional MACD suitability scoring.
+
+StockScreener.calculate_macd_suitability_score scores one symbol's frame:
+a Python loop over the last 20 Hist values, per-row .iloc lookups and a
+Series.corr per symbol. macd_suitability_scores computes the same five
+components (MACD crossovers, 20-day return, volume/price correlation,
+ATR% and RSI) for every column of a (dates x symbols) panel at once with
+NumPy, so the whole universe is scored in one call.
+
+A panel is {field: DataFrame(dates x symbols)} for the fields in
+PANEL_FIELDS, as built by build_panel. Before computing anything each
+column is right-aligned: its bars keep their order and move to the bottom
+rows, so row -1 is every symbol's latest bar and a symbol with a shorter
+or gapped history sees exactly the bars its own frame would contain.
+
+Indicators follow the pandas path of calculate_technical_indicators
+(the one used without TA-Lib), and scores and filters are identical to
+calculate_macd_suitability_score and apply_base_filters on each symbol's
+frame. Indicators always use each symbol's whole history; pass bars to
+count only the scoring window towards MIN_BARS, as the screener does.
+"""
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ('high', 'low', 'close', 'volume')
+
+MIN_BARS = 50
+LOOKBACK = 20
+
+def build_panel(frames):
+    """
+    Panel from {symbol: OHLCV frame}; symbols without data are left out
+    """
+    frames = {symbol: frame for symbol, frame in frames.items() if frame is not None and not frame.empty}
+    return {
+        field: pd.DataFrame({symbol: frame[field] for symbol, frame in frames.items()}, dtype=float)
+        for field in PANEL_FIELDS
+    }
+
+def _right_align(panel):
+    close = panel['close']
+    # Stable sort puts each column's missing rows first, keeping its bars in order
+    order = np.argsort(~np.isnan(close.to_numpy(dtype=float)), axis=0, kind='stable')
+    return {
+        field: pd.DataFrame(np.take_along_axis(panel[field].to_numpy(dtype=float), order, axis=0),
+                            columns=close.columns)
+        for field in PANEL_FIELDS
+    }
+
+def panel_indicators(aligned):
+    """
+    Hist, RSI(14) and ATR(14) for every column of a right-aligned panel,
+    with the same pandas formulas as calculate_technical_indicators
+    """
+    close, high, low = aligned['close'], aligned['high'], aligned['low']
+
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    hist = macd - macd.ewm(span=9).mean()
+
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+
+    prev_close = close.shift()
+    # fmax skips NaN like DataFrame.max(axis=1) does
+    true_range = np.fmax(np.fmax(high - low, (high - prev_close).abs()), (low - prev_close).abs())
+    atr = true_range.rolling(window=14).mean()
+
+    return {'Hist': hist, 'RSI': rsi, 'ATR': atr}
+
+def _tail(frame):
+    # (symbols x LOOKBACK), each row one symbol's last LOOKBACK bars
+    return np.ascontiguousarray(frame.to_numpy(dtype=float)[-LOOKBACK:].T)
+
+def _corr(a, b):
+    """
+    Row-wise Pearson correlation over the pairs where both are present,
+    computed like np.corrcoef (which Series.corr uses)
+    """
+    valid = ~(np.isnan(a) | np.isnan(b))
+    n = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        da = np.where(valid, a - np.where(valid, a, 0).sum(axis=1, keepdims=True) / n[:, None], 0)
+        db = np.where(valid, b - np.where(valid, b, 0).sum(axis=1, keepdims=True) / n[:, None], 0)
+        scale = 1 / (n - 1)
+        cov = (da * db).sum(axis=1) * scale
+        r = cov / np.sqrt((da * da).sum(axis=1) * scale) / np.sqrt((db * db).sum(axis=1) * scale)
+    return np.where(n >= 2, np.clip(r, -1, 1), np.nan)
+
+def _bar_counts(aligned, bars):
+    if bars is None:
+        return aligned['close'].notna().sum().to_numpy()
+    return bars.reindex(aligned['close'].columns).to_numpy()
+
+def macd_suitability_scores(panel, bars=None):
+    """
+    calculate_macd_suitability_score for every symbol of panel, as a
+    Series indexed by symbol (0 for symbols with fewer than MIN_BARS bars,
+    counted in bars when given)
+    """
+    aligned = _right_align(panel)
+    symbols = aligned['close'].columns
+    bars = _bar_counts(aligned, bars)
+    if len(aligned['close']) < MIN_BARS:
+        return pd.Series(0.0, index=symbols)
+
+    indicators = panel_indicators(aligned)
+    close = _tail(aligned['close'])
+    volume = _tail(aligned['volume'])
+    hist = _tail(indicators['Hist'])
+    atr_last = indicators['ATR'].to_numpy()[-1]
+    rsi_last = indicators['RSI'].to_numpy()[-1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # 1. MACD Signal Quality: histogram sign changes in the last 20 bars
+        prev_hist, curr_hist = hist[:, :-1], hist[:, 1:]
+        signals = (((prev_hist <= 0) & (curr_hist > 0)) | ((prev_hist >= 0) & (curr_hist < 0))).sum(axis=1)
+        score = np.select([(signals >= 2) & (signals <= 4), (signals == 1) | (signals == 5)], [30, 20], 10)
+
+        # 2. Trend Strength
+        change = np.abs((close[:, -1] - close[:, 0]) / close[:, 0])
+        score += np.select([change > 0.05, change > 0.02], [25, 15], 5)
+
+        # 3. Volume Confirmation
+        volume_trend = np.abs(_corr(volume, close))
+        score += np.select([volume_trend > 0.3, volume_trend > 0.1], [20, 12], 5)
+
+        # 4. Volatility Suitability
+        atr_pct = atr_last / close[:, -1]
+        score += np.select([(atr_pct >= 0.015) & (atr_pct <= 0.05), (atr_pct >= 0.01) & (atr_pct <= 0.07)], [15, 10], 3)
+
+        # 5. RSI Position (no points while RSI is undefined)
+        score += np.select([np.isnan(rsi_last), (rsi_last >= 40) & (rsi_last <= 60), (rsi_last >= 30) & (rsi_last <= 70)],
+                           [0, 10, 7], 2)
+
+    score = np.minimum(score, 100).astype(float)
+    return pd.Series(np.where(bars >= MIN_BARS, score, 0.0), index=symbols)
+
+def base_filter_mask(panel, bars=None):
+    """
+    apply_base_filters for every symbol of panel, as a boolean Series
+    """
+    aligned = _right_align(panel)
+    symbols = aligned['close'].columns
+    bars = _bar_counts(aligned, bars)
+    if len(aligned['close']) < MIN_BARS:
+        return pd.Series(False, index=symbols)
+
+    close_last = aligned['close'].to_numpy()[-1]
+    volume = _tail(aligned['volume'])
+    present = ~np.isnan(volume)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Series.mean: NaN-skipping sum over the count
+        avg_volume = np.where(present, volume, 0).sum(axis=1) / present.sum(axis=1)
+
+    failed = (
+        (bars < MIN_BARS)
+        | (close_last < 5)
+        | (volume[:, -1] < 100000)
+        | (avg_volume < 500000)
+        | (close_last * avg_volume < 10000000)
+    )
+    return pd.Series(~failed, index=symbols)
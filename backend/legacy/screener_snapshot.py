@@ -0,0 +1,315 @@
+"""
+Precomputed screener scores, refreshed in the background.
+
+refresh_snapshot downloads the whole universe with no deadline, scores it
+in one cross-sectional pass (StockScreener.score_universe) and publishes
+the candidates as a Snapshot. Requests then read the latest snapshot with
+current_snapshot() instead of screening inside the request.
+
+Snapshots always live in memory. When $SCREENER_SNAPSHOT_PATH is set they
+are also written to that SQLite file, so every gunicorn worker (and the
+standalone worker below) shares one snapshot. current_snapshot() re-reads
+the file at most every SNAPSHOT_POLL_SECONDS; other calls return the
+in-memory copy without touching disk.
+
+Refreshing runs either
+  - in a daemon thread started by the app (start_background_refresh), every
+    $SCREENER_REFRESH_SECONDS. The thread only starts when that is set, or
+    by default (every 15 minutes) when $SCREENER_SNAPSHOT_PATH is set, or
+  - in a separate process: python screener_snapshot.py [--once]. Set
+    SCREENER_REFRESH_SECONDS=0 on the web service so it only reads.
+
+With a shared file, every gunicorn worker starts a refresher thread, but
+only one of them refreshes: each cycle a refresher claims a lease row in
+the file, and the others skip the cycle while another holder's lease is
+current. If the holder dies, its lease runs out and another worker takes over.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# SQLite file shared by every process; snapshots stay in-process when unset
+SCREENER_SNAPSHOT_PATH_ENV = 'SCREENER_SNAPSHOT_PATH'
+# Seconds between background refreshes; 0 disables the in-app thread
+SCREENER_REFRESH_SECONDS_ENV = 'SCREENER_REFRESH_SECONDS'
+SCREENER_REFRESH_SECONDS = 15 * 60
+
+SNAPSHOT_POLL_SECONDS = 5.0
+SNAPSHOT_DAYS = 100
+
+# A refresher's lease on the shared file lasts this many refresh intervals
+REFRESHER_LEASE_INTERVALS = 2
+
+class Snapshot:
+    """
+    Screener candidates (dicts as returned by StockScreener.score_stock),
+    best score first, and when they were computed
+    """
+
+    def __init__(self, candidates, computed_at, universe_size):
+        self.candidates = candidates
+        self.computed_at = computed_at
+        self.universe_size = universe_size
+
+    def age_seconds(self, now=None):
+        return max(0.0, (time.time() if now is None else now) - self.computed_at)
+
+    def describe(self):
+        """
+        JSON-ready summary for API responses
+        """
+        return {
+            'computed_at': datetime.fromtimestamp(self.computed_at).isoformat(),
+            'age_seconds': round(self.age_seconds(), 1),
+            'universe_size': self.universe_size,
+            'candidates': len(self.candidates),
+        }
+
+class SnapshotStore:
+    """
+    The latest snapshot in a SQLite file, shared between processes
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS snapshot ('
+                'id INTEGER PRIMARY KEY CHECK (id = 1), computed_at REAL NOT NULL, '
+                'universe_size INTEGER NOT NULL, candidates TEXT NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS refresher ('
+                'id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT candidates, computed_at, universe_size FROM snapshot WHERE id = 1'
+            ).fetchone()
+        return None if row is None else Snapshot(json.loads(row[0]), row[1], row[2])
+
+    def save(self, snapshot):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO snapshot (id, computed_at, universe_size, candidates) VALUES (1, ?, ?, ?)',
+                (snapshot.computed_at, snapshot.universe_size, json.dumps(snapshot.candidates))
+            )
+
+    def claim_refresher(self, owner, lease_seconds, now=None):
+        """
+        Take or renew the refresher lease; False while another owner holds it
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT OR IGNORE INTO refresher (id, owner, expires_at) VALUES (1, ?, 0)', (owner,))
+            # One statement, so two processes cannot both see an expired lease
+            cursor = conn.execute(
+                'UPDATE refresher SET owner = ?, expires_at = ? WHERE id = 1 AND (owner = ? OR expires_at < ?)',
+                (owner, now + lease_seconds, owner, now)
+            )
+            return cursor.rowcount == 1
+
+    def release_refresher(self, owner):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('UPDATE refresher SET expires_at = 0 WHERE id = 1 AND owner = ?', (owner,))
+
+_lock = threading.Lock()
+_latest = None
+_checked = 0.0
+_store = None
+
+def get_store():
+    """
+    The process-wide store for $SCREENER_SNAPSHOT_PATH, or None if unset
+    """
+    global _store
+    path = os.environ.get(SCREENER_SNAPSHOT_PATH_ENV, '').strip()
+    if not path:
+        return None
+    with _lock:
+        if _store is None or _store.path != path:
+            try:
+                _store = SnapshotStore(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning('Screener snapshot store unavailable at %s: %s', path, e)
+                return None
+        return _store
+
+def publish(snapshot):
+    """
+    Make snapshot the current one here and, if configured, in the shared file
+    """
+    global _latest, _checked
+    store = get_store()
+    if store is not None:
+        try:
+            store.save(snapshot)
+        except sqlite3.Error as e:
+            logger.warning('Screener snapshot write failed: %s', e)
+    with _lock:
+        if _latest is None or snapshot.computed_at >= _latest.computed_at:
+            _latest = snapshot
+        _checked = time.monotonic()
+
+def current_snapshot():
+    """
+    The newest published snapshot, or None before the first refresh finishes
+    """
+    global _latest, _checked
+    with _lock:
+        if time.monotonic() - _checked < SNAPSHOT_POLL_SECONDS:
+            return _latest
+        _checked = time.monotonic()
+    store = get_store()
+    if store is not None:
+        try:
+            loaded = store.load()
+        except sqlite3.Error as e:
+            logger.warning('Screener snapshot read failed: %s', e)
+            loaded = None
+        with _lock:
+            if loaded is not None and (_latest is None or loaded.computed_at > _latest.computed_at):
+                _latest = loaded
+    return _latest
+
+def refresh_snapshot(screener=None, symbols=None):
+    """
+    Score every symbol of the universe, publish the result and return it.
+    A refresh without any candidate is returned but not published.
+    """
+    if screener is None:
+        from stock_screener import StockScreener
+        screener = StockScreener()
+    symbols = screener.get_stock_universe() if symbols is None else list(symbols)
+
+    start_time = time.time()
+    frames = asyncio.run(screener.gather_stock_data(symbols, days=SNAPSHOT_DAYS))
+    # One vectorised scoring pass over the whole universe
+    candidates = screener.score_universe(frames, days=SNAPSHOT_DAYS)
+    candidates.sort(key=lambda x: x['score'], reverse=True)
+    snapshot = Snapshot(candidates, time.time(), len(symbols))
+    if not candidates:
+        # e.g. every download failed; keep serving the previous snapshot
+        logger.warning(f"Screener refresh found no candidates among {len(symbols)} stocks; not published")
+        return snapshot
+    publish(snapshot)
+    logger.info(f"Screener snapshot refreshed in {time.time() - start_time:.1f}s: "
+                f"{len(candidates)} candidates from {len(symbols)} stocks")
+    return snapshot
+
+class SnapshotRefresher(threading.Thread):
+    """
+    Daemon thread calling refresh_snapshot every interval seconds.
+    One screener is kept across refreshes so its data cache and
+    incremental indicators carry over. With a shared store, a cycle only
+    refreshes if this refresher holds the store's refresher lease.
+    """
+
+    def __init__(self, interval, screener=None):
+        super().__init__(name='screener-snapshot', daemon=True)
+        self.interval = interval
+        self.screener = screener
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{id(self)}'
+        self._stop_event = threading.Event()
+
+    def _is_elected(self):
+        store = get_store()
+        if store is None:
+            return True
+        try:
+            return store.claim_refresher(self.owner, REFRESHER_LEASE_INTERVALS * self.interval)
+        except sqlite3.Error as e:
+            logger.warning('Screener refresher lease unavailable: %s', e)
+            return False
+
+    def run(self):
+        if self.screener is None:
+            from stock_screener import StockScreener
+            self.screener = StockScreener()
+        while not self._stop_event.is_set():
+            try:
+                if self._is_elected():
+                    refresh_snapshot(self.screener)
+            except Exception as e:
+                logger.error(f"Screener snapshot refresh failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
+        store = get_store()
+        if store is not None:
+            try:
+                store.release_refresher(self.owner)
+            except sqlite3.Error as e:
+                logger.warning('Screener refresher lease release failed: %s', e)
+
+def refresh_interval():
+    """
+    $SCREENER_REFRESH_SECONDS, or the default when invalid. When unset, the
+    default if $SCREENER_SNAPSHOT_PATH is set and 0 (no in-app refresh)
+    otherwise, so workers do not each screen the universe on their own.
+    """
+    raw = os.environ.get(SCREENER_REFRESH_SECONDS_ENV, '').strip()
+    if not raw:
+        return SCREENER_REFRESH_SECONDS if os.environ.get(SCREENER_SNAPSHOT_PATH_ENV, '').strip() else 0.0
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        logger.warning('Invalid %s=%r; using %ss', SCREENER_REFRESH_SECONDS_ENV, raw, SCREENER_REFRESH_SECONDS)
+        return SCREENER_REFRESH_SECONDS
+
+_refresher = None
+
+def start_background_refresh(interval=None):
+    """
+    Start the process-wide refresher thread once; None if the interval is 0
+    """
+    global _refresher
+    interval = refresh_interval() if interval is None else interval
+    if interval <= 0:
+        return None
+    with _lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = SnapshotRefresher(interval)
+            _refresher.start()
+        return _refresher
+
+def clear():
+    """
+    Forget the in-process snapshot (the shared file is left alone)
+    """
+    global _latest, _checked
+    with _lock:
+        _latest = None
+        _checked = 0.0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if get_store() is None:
+        logger.warning('%s is not set; the web workers will not see these snapshots', SCREENER_SNAPSHOT_PATH_ENV)
+    if '--once' in sys.argv[1:]:
+        refresh_snapshot()
+    else:
+        refresher = SnapshotRefresher(refresh_interval() or SCREENER_REFRESH_SECONDS)
+        refresher.start()
+        refresher.join()
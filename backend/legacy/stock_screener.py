@@ -1,10 +1,21 @@
 import os
+import asyncio
+import copy
+import heapq
 import logging
-from datetime import datetime, timedelta
-import yfinance as yf
+import time
+from datetime import datetime
 import pandas as pd
 import numpy as np
 
+import screener_cache
+from async_screening import fetch_batches, wait_for_token
+from diversification import CANDIDATE_POOL_FACTOR, diversify, return_correlations
+from market_data_provider import get_provider
+from screener_indicators import IndicatorState, extend_indicators
+from screener_scoring import base_filter_mask, build_panel, macd_suitability_scores
+from screener_snapshot import current_snapshot
+
 try:
     import talib
     TALIB_AVAILABLE = True
@@ -17,8 +28,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StockScreener:
-    def __init__(self):
-        self._data_cache = {}
+    """Price data and indicator state are cached in screener_cache, shared
+    by every instance, so a screener is cheap to create per request."""
     
     def get_stock_universe(self):
         """Get basic stock universe from Alpaca with caching and fallback"""
@@ -54,45 +65,39 @@ class StockScreener:
             logger.error(f"Error getting stock universe: {e}")
             return ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'NVDA', 'META', 'NFLX', 'AMD', 'INTC']
     
+    def _cached_stock_data(self, symbol, days):
+        # Served from the same or a longer cached window, for up to an hour
+        return screener_cache.get_frame(symbol, days)
+
+    def _store_stock_data(self, symbol, days, data):
+        screener_cache.set_frame(symbol, days, data)
+
     def get_stock_data(self, symbol, days=100):
         """Get historical data for a stock with caching and retry logic"""
-        import time
-        
         # Check cache 
-        cache_key = f"{symbol}_{days}"
-        if cache_key in self._data_cache:
-            cached_data, cache_time = self._data_cache[cache_key]
-            # Use cached data if less than 1 hour old
-            if time.time() - cache_time < 3600:
-                return cached_data
+        cached_data = self._cached_stock_data(symbol, days)
+        if cached_data is not None:
+            return cached_data
         
         max_retries = 2
         retry_delay = 0.2  # Slightly longer initial delay
         
         for attempt in range(max_retries):
             try:
-                # Add small delay to avoid hitting rate limits
-                time.sleep(0.05)  # 50ms delay between requests
+                # Share the provider request rate with concurrent screens
+                wait_for_token()
                 
                 end_date = datetime.now()
-                start_date = end_date - timedelta(days=days)
+                # Fixed start, so the cached indicators only ever extend
+                start_date = screener_cache.history_start(days, end_date)
                 
-                data = yf.download(symbol, start=start_date, end=end_date, auto_adjust=True, progress=False)
-                data.columns = data.columns.str.lower()
+                data = get_provider().download([symbol], start_date, end_date)[symbol]
                 
                 if len(data) < 30:  
                     return None
                 
                 # Cache the result
-                self._data_cache[cache_key] = (data, time.time())
-                
-                # Limit cache size
-                if len(self._data_cache) > 150: 
-                    oldest_keys = sorted(self._data_cache.keys(), 
-                                       key=lambda k: self._data_cache[k][1])[:30]
-                    for key in oldest_keys:
-                        del self._data_cache[key]
-                        
+                self._store_stock_data(symbol, days, data)
                 return data
                 
             except Exception as e:
@@ -107,6 +112,20 @@ class StockScreener:
                     logger.warning(f"Could not get data for {symbol} after {max_retries} attempts: {e}")
                     return None
 
+    def download_stock_data_batch(self, symbols, days=100):
+        """
+        Download several symbols in one provider call (no caching, no retries).
+        Returns {symbol: data}, with None for symbols with under 30 bars.
+        """
+        end_date = datetime.now()
+        start_date = screener_cache.history_start(days, end_date)
+        frames = get_provider().download(list(symbols), start_date, end_date)
+        batch = {}
+        for symbol in symbols:
+            frame = frames.get(symbol)
+            batch[symbol] = frame if frame is not None and len(frame) >= 30 else None
+        return batch
+
     def calculate_technical_indicators(self, data):
         """Calculate technical indicators for screening"""
         if data is None or len(data) < 50:
@@ -152,6 +171,42 @@ class StockScreener:
             logger.warning(f"Error calculating indicators: {e}")
             return None
 
+    def update_technical_indicators(self, symbol, data, days=100):
+        """
+        calculate_technical_indicators over a symbol's history (see
+        screener_cache.history_start), extended incrementally from the state
+        kept for this symbol: bars already seen cost nothing and each new or
+        updated last bar is O(1). Falls back to a full computation the first
+        time, when the cached rows no longer match the data (including a
+        history that now starts on a later bar) and when TA-Lib is in use.
+        Returns the scoring window (screener_cache.scoring_window) of the result.
+        """
+        if data is None or len(data) < 50:
+            return None
+        if TALIB_AVAILABLE:
+            return screener_cache.scoring_window(self.calculate_technical_indicators(data.copy()), days)
+
+        cached = screener_cache.get_indicators(symbol, days)
+        if cached is not None:
+            try:
+                frame, state = cached
+                # The cached state is shared with other threads; advance a copy
+                state = copy.deepcopy(state)
+                extended = extend_indicators(frame, state, data)
+                if extended is not None:
+                    screener_cache.set_indicators(symbol, days, extended, state)
+                    return screener_cache.scoring_window(extended, days)
+            except Exception as e:
+                logger.warning(f"Incremental indicators failed for {symbol}, recomputing: {e}")
+
+        frame = self.calculate_technical_indicators(data.copy())
+        if frame is None:
+            screener_cache.drop_indicators(symbol, days)
+            return None
+        # The state stops one bar short: the last bar may still be forming
+        screener_cache.set_indicators(symbol, days, frame, IndicatorState.from_frame(frame.iloc[:-1]))
+        return screener_cache.scoring_window(frame, days)
+
     def apply_base_filters(self, symbol, data):
         """Apply basic filtering criteria"""
         if data is None or len(data) < 50:
@@ -221,7 +276,9 @@ class StockScreener:
                 score += 5
             
             # 3. Volume Confirmation (20% weight)
-            volume_trend = prev_20['volume'].corr(prev_20['close'])
+            # Flat volume or price has zero variance: NaN scores as no trend
+            with np.errstate(invalid='ignore', divide='ignore'):
+                volume_trend = prev_20['volume'].corr(prev_20['close'])
             if abs(volume_trend) > 0.3:  # Volume follows price
                 score += 20
             elif abs(volume_trend) > 0.1:
@@ -255,99 +312,140 @@ class StockScreener:
             logger.warning(f"Error calculating MACD suitability: {e}")
             return 0
 
-    def screen_stocks_for_macd(self, timeframe='medium', max_stocks=10, timeout_seconds=30):
-        """Main screening function for MACD strategy with aggressive timeout handling"""
-        import time
-        from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+    def score_stock(self, symbol, data):
+        """Indicators, base filters and MACD score for one symbol's data.
+        Returns the candidate dict, or None if it fails a filter or scores 50 or less."""
+        if data is None:
+            return None
+        
+        # Calculate indicators (incrementally after the first screen)
+        data = self.update_technical_indicators(symbol, data, days=100)
+        if data is None:
+            return None
         
+        # Apply base filters
+        passed, reason = self.apply_base_filters(symbol, data)
+        if not passed:
+            return None
+        
+        # Calculate MACD suitability score
+        score = self.calculate_macd_suitability_score(data)
+        
+        if score > 50:  # Minimum threshold
+            return {
+                'symbol': symbol,
+                'score': float(score),
+                'price': float(data['close'].iloc[-1]),
+                'volume': int(data['volume'].iloc[-1]),
+                'data_points': len(data)
+            }
+        return None
+
+    def score_universe(self, frames, days=100):
+        """score_stock for every {symbol: data} in one cross-sectional pass
+        (see screener_scoring). Returns the candidates in frames order.
+        With TA-Lib the indicators differ from the pandas ones, so each
+        symbol is scored on its own instead."""
+        if TALIB_AVAILABLE:
+            return [c for c in (self._score_safely(s, d) for s, d in frames.items()) if c]
+        
+        frames = {s: d for s, d in frames.items() if d is not None and len(d) >= 50}
+        panel = build_panel(frames)
+        if not panel['close'].columns.size:
+            return []
+        # Indicators run over the whole history; the bar count is the scoring window's
+        bars = pd.Series({s: len(screener_cache.scoring_window(d, days)) for s, d in frames.items()})
+        scores = macd_suitability_scores(panel, bars)
+        passed = base_filter_mask(panel, bars)
+        
+        candidates = []
+        for symbol in scores.index[passed & (scores > 50)]:
+            data = frames[symbol]
+            candidates.append({
+                'symbol': symbol,
+                'score': float(scores[symbol]),
+                'price': float(data['close'].iloc[-1]),
+                'volume': int(data['volume'].iloc[-1]),
+                'data_points': int(bars[symbol])
+            })
+        return candidates
+
+    async def gather_stock_data(self, symbols, days=100):
+        """{symbol: data or None} for every symbol, from the cache or
+        concurrent batch downloads (see async_screening.fetch_batches)"""
+        frames = {}
+        missing = []
+        for symbol in symbols:
+            frames[symbol] = self._cached_stock_data(symbol, days)
+            if frames[symbol] is None:
+                missing.append(symbol)
+        
+        async for batch in fetch_batches(missing, lambda batch: self.download_stock_data_batch(batch, days)):
+            for symbol, data in batch.items():
+                if data is not None:
+                    self._store_stock_data(symbol, days, data)
+                frames[symbol] = data
+        return frames
+
+    async def stream_macd_candidates(self, symbols, days=100):
+        """
+        Async generator of (symbol, candidate or None), scoring each symbol as
+        soon as its data is available: cached symbols first, then each
+        downloaded batch as it arrives (see async_screening.fetch_batches).
+        """
+        missing = []
+        for symbol in symbols:
+            data = self._cached_stock_data(symbol, days)
+            if data is None:
+                missing.append(symbol)
+            else:
+                yield symbol, self._score_safely(symbol, data)
+
+        async for batch in fetch_batches(missing, lambda batch: self.download_stock_data_batch(batch, days)):
+            for symbol, data in batch.items():
+                if data is not None:
+                    # Cache writes stay on the event loop thread
+                    self._store_stock_data(symbol, days, data)
+                yield symbol, self._score_safely(symbol, data)
+
+    def _score_safely(self, symbol, data):
+        try:
+            return self.score_stock(symbol, data)
+        except Exception as e:
+            logger.warning(f"Error processing {symbol}: {e}")
+            return None
+
+    def screen_stocks_for_macd(self, timeframe='medium', max_stocks=10, timeout_seconds=30):
+        """Main screening function for MACD strategy.
+
+        Bulk-fetches the whole universe concurrently under the shared rate
+        limit and scores symbols as their data arrives. Whatever has been
+        scored when 80% of timeout_seconds has passed is used; precomputed
+        scores only fill in if too few candidates were found.
+        """
         logger.info(f"Starting MACD stock screening for {timeframe} timeframe with {timeout_seconds}s timeout")
         
         stock_universe = self.get_stock_universe()
-        # Aggressively reduce universe size for deployment reliability
-        if len(stock_universe) > 60:
-            stock_universe = stock_universe[:60]  # Process only top 60 stocks for speed
         
         candidates = []
         start_time = time.time()
         processed_count = 0
-        
-        def process_stock(symbol):
-            """Process a single stock - designed for parallel execution"""
+
+        async def collect():
+            nonlocal processed_count
+            async for symbol, result in self.stream_macd_candidates(stock_universe, days=100):
+                processed_count += 1
+                if result:
+                    candidates.append(result)
+
+        async def collect_until_deadline():
             try:
-                # Get data with shorter timeout per stock
-                data = self.get_stock_data(symbol, days=100)
-                if data is None:
-                    return None
-                
-                # Calculate indicators
-                data = self.calculate_technical_indicators(data)
-                if data is None:
-                    return None
-                
-                # Apply base filters
-                passed, reason = self.apply_base_filters(symbol, data)
-                if not passed:
-                    return None
-                
-                # Calculate MACD suitability score
-                score = self.calculate_macd_suitability_score(data)
-                
-                if score > 50:  # Minimum threshold
-                    return {
-                        'symbol': symbol,
-                        'score': float(score),
-                        'price': float(data['close'].iloc[-1]),
-                        'volume': int(data['volume'].iloc[-1]),
-                        'data_points': len(data)
-                    }
-                return None
-                
-            except Exception as e:
-                logger.warning(f"Error processing {symbol}: {e}")
-                return None
-        
-        # Use ThreadPoolExecutor with more aggressive timeouts
-        with ThreadPoolExecutor(max_workers=3) as executor:  # Reduced workers to avoid API limits
-            # Submit tasks in smaller batches
-            batch_size = 20
-            for i in range(0, len(stock_universe), batch_size):
-                batch = stock_universe[i:i + batch_size]
-                future_to_symbol = {executor.submit(process_stock, symbol): symbol 
-                                  for symbol in batch}
-                
-                # Process batch with strict timeout
-                try:
-                    for future in as_completed(future_to_symbol, timeout=min(timeout_seconds * 0.3, 10)):
-                        try:
-                            result = future.result(timeout=1)  # 1 second timeout per stock
-                            if result:
-                                candidates.append(result)
-                            
-                            processed_count += 1
-                            
-                            # Early exit if we have enough candidates or running out of time
-                            elapsed = time.time() - start_time
-                            if len(candidates) >= max_stocks * 2 or elapsed > timeout_seconds * 0.6:
-                                logger.info(f"Early exit: Found {len(candidates)} candidates in {elapsed:.1f}s")
-                                raise StopIteration
-                                
-                        except TimeoutError:
-                            symbol = future_to_symbol[future]
-                            logger.warning(f"Timeout processing {symbol}")
-                            continue
-                        except Exception as e:
-                            symbol = future_to_symbol[future]
-                            logger.warning(f"Error processing {symbol}: {e}")
-                            continue
-                            
-                except (TimeoutError, StopIteration):
-                    logger.info(f"Batch processing stopped early after {time.time() - start_time:.1f}s")
-                    break
-                    
-                # Check overall timeout between batches
-                if time.time() - start_time > timeout_seconds * 0.7:
-                    logger.info("Overall timeout approaching, stopping processing")
-                    break
+                await asyncio.wait_for(collect(), timeout=timeout_seconds * 0.8)
+            except asyncio.TimeoutError:
+                logger.info(f"Screening deadline reached after {time.time() - start_time:.1f}s, "
+                            f"{processed_count}/{len(stock_universe)} stocks processed")
+
+        asyncio.run(collect_until_deadline())
         
         total_time = time.time() - start_time
         logger.info(f"Screening completed in {total_time:.1f}s. Found {len(candidates)} candidates from {processed_count} stocks")
@@ -369,8 +467,8 @@ class StockScreener:
         # Sort by score and return top candidates
         candidates.sort(key=lambda x: x['score'], reverse=True)
         
-        # Apply diversification (simple sector spreading)
-        final_selection = self.diversify_selection(candidates[:max_stocks*2], max_stocks)
+        # Spread across sectors and weakly correlated stocks
+        final_selection = self.diversify_selection(candidates, max_stocks)
         
         logger.info(f"Selected {len(final_selection)} stocks for MACD strategy")
         for stock in final_selection:
@@ -408,30 +506,13 @@ class StockScreener:
         return self.get_fallback_stocks(max_stocks)
 
     def diversify_selection(self, candidates, max_stocks):
-        """Simple diversification to avoid too many similar stocks"""
-        # For now, just take top stocks with some spacing
-        # In future, we can add sector classification
-        selected = []
-        used_first_letters = set()
-        
-        for candidate in candidates:
-            if len(selected) >= max_stocks:
-                break
-            
-            # Simple diversification: avoid too many stocks starting with same letter
-            first_letter = candidate['symbol'][0]
-            if first_letter not in used_first_letters or len(selected) < max_stocks // 2:
-                selected.append(candidate)
-                used_first_letters.add(first_letter)
-        
-        # Fill remaining slots if needed
-        for candidate in candidates:
-            if len(selected) >= max_stocks:
-                break
-            if candidate not in selected:
-                selected.append(candidate)
-        
-        return selected[:max_stocks]
+        """Pick max_stocks of the candidates (best score first): high scores,
+        spread across sectors and weakly correlated returns (see diversification).
+        Only the top CANDIDATE_POOL_FACTOR * max_stocks by score are considered,
+        so the correlation matrix stays small for a whole-universe snapshot."""
+        pool = heapq.nlargest(CANDIDATE_POOL_FACTOR * max_stocks, candidates, key=lambda c: c['score'])
+        correlations = return_correlations([c['symbol'] for c in pool])
+        return diversify(pool, max_stocks, correlations)
 
     def use_precomputed_data_if_timeout(self, timeframe='medium', max_stocks=10):
         """Ultra-fast method using pre-computed stock scores - no API calls needed"""
@@ -471,33 +552,53 @@ class StockScreener:
         ]
         
         # Adjust scores based on timeframe
+        self.adjust_scores_for_timeframe(precomputed_stocks, timeframe)
+        
+        # Sort by score and apply diversification
+        precomputed_stocks.sort(key=lambda x: x['score'], reverse=True)
+        final_selection = self.diversify_selection(precomputed_stocks, max_stocks)
+        
+        logger.info(f"Pre-computed selection: {[s['symbol'] for s in final_selection]}")
+        return final_selection
+
+    def adjust_scores_for_timeframe(self, stocks, timeframe):
+        """Bump the scores of stocks suited to the timeframe, in place"""
         if timeframe == 'short':
             # Favor higher volatility for short-term
-            for stock in precomputed_stocks:
+            for stock in stocks:
                 if stock['symbol'] in ['TSLA', 'NVDA', 'AMD']:
                     stock['score'] += 3
         elif timeframe == 'long':
             # Favor stability for long-term
-            for stock in precomputed_stocks:
+            for stock in stocks:
                 if stock['symbol'] in ['AAPL', 'MSFT', 'GOOGL']:
                     stock['score'] += 2
-        
-        # Sort by score and apply diversification
-        precomputed_stocks.sort(key=lambda x: x['score'], reverse=True)
-        final_selection = self.diversify_selection(precomputed_stocks[:max_stocks*2], max_stocks)
-        
-        logger.info(f"Pre-computed selection: {[s['symbol'] for s in final_selection]}")
+
+    def select_from_snapshot(self, snapshot, max_stocks=10, timeframe='medium'):
+        """Top candidates of a background screener snapshot (see screener_snapshot),
+        with the same timeframe adjustment as the precomputed table.
+        Returns copies, so callers may annotate them."""
+        candidates = [dict(stock) for stock in snapshot.candidates]
+        self.adjust_scores_for_timeframe(candidates, timeframe)
+        candidates.sort(key=lambda x: x['score'], reverse=True)
+        final_selection = self.diversify_selection(candidates, max_stocks)
+        logger.info(f"Snapshot selection ({snapshot.age_seconds():.0f}s old): {[s['symbol'] for s in final_selection]}")
         return final_selection
 
     def screen_stocks_fast_deployment(self, timeframe='medium', max_stocks=10):
-        """Ultra-fast deployment method - prioritizes speed over comprehensive analysis"""
+        """Ultra-fast deployment method - prioritizes speed over comprehensive analysis.
+        Serves the latest background snapshot; the validated precomputed table
+        is only used until the first snapshot has been published."""
         logger.info("Using fast deployment mode for stock selection")
         
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            return self.select_from_snapshot(snapshot, max_stocks, timeframe)
+        
         # Start with precomputed data immediately
         candidates = self.use_precomputed_data_if_timeout(timeframe, max_stocks)
         
         # Try to get some real-time data for top candidates if time permits
-        import time
         start_time = time.time()
         
         # Quick validation of top 3 precomputed stocks
@@ -1,10 +1,22 @@
-import yfinance as yf
+from equity_curve import month_end_balances, monthly_performance
+from market_data import load_symbol
 
-def get_spy_investment(start_date, end_date, initial_balance=100000):
-    """Calculates the final balance of an initial investment in SPY from start_date to end_date."""
-    
-    data = yf.download('SPY', start=start_date, end=end_date, auto_adjust=True, progress=False)
-    data.columns = data.columns.str.lower()
+def download_spy_data(start_date, end_date):
+    """Download SPY daily bars with lower-cased column names.
+
+    Served from the market_data cache when a backtest over the same dates
+    already fetched SPY in its grouped download.
+    """
+    return load_symbol('SPY', start_date, end_date)
+
+def get_spy_investment(start_date, end_date, initial_balance=100000, data=None):
+    """Calculates the final balance of an initial investment in SPY from start_date to end_date.
+
+    data: optional frame from download_spy_data, so callers that also need
+    generate_spy_monthly_performance download SPY only once.
+    """
+    if data is None:
+        data = download_spy_data(start_date, end_date)
 
     if data.empty:
         return "No data available for SPY in the specified date range.", 400
@@ -15,56 +27,22 @@ def get_spy_investment(start_date, end_date, initial_balance=100000):
     final_balance = initial_balance * (final_price / initial_price)
     return final_balance
 
-def generate_spy_monthly_performance(start_date, end_date, initial_balance=100000):
+def generate_spy_monthly_performance(start_date, end_date, initial_balance=100000, data=None):
     """
     Generate monthly performance data for SPY investment to use in frontend charts
+
+    Balances are the buy-and-hold value at each month end, from the same
+    daily closes used for the final balance (one download in total).
+    Returns an empty list if there is no SPY data for the range.
     """
-    from datetime import datetime, timedelta
-    
-    # Get the final SPY balance
-    final_balance = get_spy_investment(start_date, end_date, initial_balance)
-    
-    # Calculate number of months between start and end date
-    months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-    if months <= 0:
-        months = 1
-    
-    # Calculate monthly growth rate
-    total_return = (final_balance - initial_balance) / initial_balance
-    monthly_return = (1 + total_return) ** (1/months) - 1
-    
-    # Generate monthly data points
-    monthly_data = []
-    current_balance = initial_balance
-    current_date = start_date
-    
-    for month in range(months + 1):
-        if month == 0:
-            monthly_data.append({
-                'month': 'Start',
-                'balance': initial_balance,
-                'date': current_date.strftime('%Y-%m')
-            })
-        elif month == months:
-            # Use actual final balance for last month
-            monthly_data.append({
-                'month': f'Month {month}',
-                'balance': final_balance,
-                'date': current_date.strftime('%Y-%m')
-            })
-        else:
-            # Use calculated monthly growth
-            current_balance *= (1 + monthly_return)
-            monthly_data.append({
-                'month': f'Month {month}',
-                'balance': round(current_balance, 2),
-                'date': current_date.strftime('%Y-%m')
-            })
-        
-        # Move to next month
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
-        else:
-            current_date = current_date.replace(month=current_date.month + 1)
-    
-    return monthly_data
\ No newline at end of file
+    if data is None:
+        data = download_spy_data(start_date, end_date)
+    if data.empty:
+        return []
+
+    final_balance = get_spy_investment(start_date, end_date, initial_balance, data=data)
+    closes = data['close']
+    equity = initial_balance * (closes / closes.iloc[0])
+    return monthly_performance(
+        start_date, end_date, initial_balance, final_balance, month_end_balances(equity)
+    )
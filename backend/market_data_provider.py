@@ -0,0 +1,190 @@
+"""
+market_data_provider.py
+-----------------------
+One interface for daily OHLCV bars, used by every module that needs prices
+(benchmark.py and, under legacy/, MACD_trading, test_against_SP and
+stock_screener).
+
+Every provider returns ``{symbol: DataFrame}`` for the requested symbols.
+Frames are indexed by date, with lower-cased columns (open, high, low,
+close, volume), and cover ``start <= date < end`` (end is exclusive, as in
+yfinance).  Symbols without data map to an empty DataFrame; the caller
+decides whether that is an error.
+
+  - ``YFinanceProvider`` downloads every symbol in one grouped yf.download.
+  - ``FileProvider`` reads ``<SYMBOL>.parquet`` or ``<SYMBOL>.csv`` from a
+    local directory, so the backend can be benchmarked and load-tested
+    without network variance.  Parquet needs pyarrow (or fastparquet).
+  - ``InMemoryProvider`` serves frames held in a dict (tests, simulations).
+
+``get_provider()`` picks FileProvider when $MARKET_DATA_DIR is set and
+YFinanceProvider otherwise; ``set_provider()`` overrides both.
+
+Public API
+----------
+get_provider()                                  →  MarketDataProvider
+set_provider(provider | None)
+MarketDataProvider.download(symbols, start, end) →  dict[str, pd.DataFrame]
+YFinanceProvider()
+FileProvider(directory)
+InMemoryProvider(frames)
+split_grouped(data, symbols)                    →  dict[str, pd.DataFrame]
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Mapping, Protocol, Sequence, Union
+
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# Directory of <SYMBOL>.parquet / <SYMBOL>.csv bars; yfinance is used when unset
+MARKET_DATA_DIR_ENV = "MARKET_DATA_DIR"
+
+DateLike = Union[date, datetime, str]
+
+# Ticker characters FileProvider accepts in a file name (BRK.B, ^GSPC, EURUSD=X)
+_FILE_SYMBOL_RE = re.compile(r"^[A-Za-z0-9.\-^=]+$")
+
+
+class MarketDataProvider(Protocol):
+    def download(
+        self, symbols: Sequence[str], start: DateLike, end: DateLike
+    ) -> dict[str, pd.DataFrame]:
+        """Daily bars for each symbol over [start, end); empty frames for unknown symbols."""
+        ...
+
+
+def _normalise(frame: pd.DataFrame) -> pd.DataFrame:
+    """Copy of frame with lower-cased column names and all-NaN rows removed."""
+    frame = frame.copy()
+    frame.columns = [str(column).lower() for column in frame.columns]
+    # Grouped downloads pad each ticker to the union of all trading days
+    return frame.dropna(how="all")
+
+
+def _slice(frame: pd.DataFrame, start: DateLike, end: DateLike) -> pd.DataFrame:
+    if frame.empty:
+        return frame
+    index = pd.DatetimeIndex(frame.index)
+    return frame[(index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))]
+
+
+def split_grouped(data: pd.DataFrame, symbols: Sequence[str]) -> dict[str, pd.DataFrame]:
+    """Split one grouped download into normalised per-symbol frames.
+
+    Accepts the (ticker, field) or (field, ticker) column MultiIndex of a
+    multi-ticker yf.download and the flat columns of a single-ticker one.
+    """
+    symbols = list(symbols)
+    if not isinstance(data.columns, pd.MultiIndex):
+        if len(symbols) == 1:
+            return {symbols[0]: _normalise(data)}
+        raise ValueError("Expected per-ticker columns for a multi-ticker download")
+
+    level = 0 if set(symbols) & set(data.columns.get_level_values(0)) else 1
+    present = set(data.columns.get_level_values(level))
+    return {
+        symbol: _normalise(data.xs(symbol, axis=1, level=level)) if symbol in present else pd.DataFrame()
+        for symbol in symbols
+    }
+
+
+class YFinanceProvider:
+    """Downloads all requested symbols in one yf.download call."""
+
+    def download(
+        self, symbols: Sequence[str], start: DateLike, end: DateLike
+    ) -> dict[str, pd.DataFrame]:
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        # A single ticker is passed as a plain string, as the per-symbol callers always did
+        tickers = symbols[0] if len(symbols) == 1 else symbols
+        data = yf.download(
+            tickers, start=start, end=end, auto_adjust=True, progress=False, group_by="ticker"
+        )
+        return split_grouped(data, symbols)
+
+
+class FileProvider:
+    """Reads bars from ``<directory>/<SYMBOL>.parquet`` or ``<SYMBOL>.csv``.
+
+    CSV files have the date in the first column.  Symbols with neither file
+    get an empty frame, like an unknown ticker on yfinance.  So do symbols
+    that are not plain tickers (path separators, ``..``): symbols come from
+    requests and must never name a file outside ``directory``.
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = os.fspath(directory)
+
+    def _read(self, symbol: str) -> pd.DataFrame:
+        root = os.path.realpath(self.directory)
+        base = os.path.realpath(os.path.join(root, symbol))
+        if not _FILE_SYMBOL_RE.match(symbol) or os.path.dirname(base) != root:
+            logger.warning("FileProvider: rejected symbol %r", symbol)
+            return pd.DataFrame()
+        if os.path.exists(base + ".parquet"):
+            return pd.read_parquet(base + ".parquet")
+        if os.path.exists(base + ".csv"):
+            return pd.read_csv(base + ".csv", index_col=0, parse_dates=True)
+        return pd.DataFrame()
+
+    def download(
+        self, symbols: Sequence[str], start: DateLike, end: DateLike
+    ) -> dict[str, pd.DataFrame]:
+        return {symbol: _normalise(_slice(self._read(symbol), start, end)) for symbol in symbols}
+
+
+class InMemoryProvider:
+    """Serves bars from a ``{symbol: DataFrame}`` mapping."""
+
+    def __init__(self, frames: Mapping[str, pd.DataFrame]) -> None:
+        self.frames = dict(frames)
+
+    def download(
+        self, symbols: Sequence[str], start: DateLike, end: DateLike
+    ) -> dict[str, pd.DataFrame]:
+        return {
+            symbol: _normalise(_slice(self.frames.get(symbol, pd.DataFrame()), start, end))
+            for symbol in symbols
+        }
+
+
+_lock = threading.Lock()
+_override: MarketDataProvider | None = None
+_file_provider: FileProvider | None = None
+_yfinance_provider = YFinanceProvider()
+
+
+def get_provider() -> MarketDataProvider:
+    """The provider set with set_provider, else FileProvider for $MARKET_DATA_DIR, else yfinance."""
+    global _file_provider
+    if _override is not None:
+        return _override
+    directory = os.environ.get(MARKET_DATA_DIR_ENV, "").strip()
+    if not directory:
+        return _yfinance_provider
+    with _lock:
+        if _file_provider is None or _file_provider.directory != directory:
+            logger.info("Reading market data from %s", directory)
+            _file_provider = FileProvider(directory)
+        return _file_provider
+
+
+def set_provider(provider: MarketDataProvider | None) -> None:
+    """Route every price lookup through provider; None restores the default.
+
+    Call it before serving requests: frames that callers have already
+    cached from the previous provider are kept.
+    """
+    global _override
+    _override = provider
@@ -22,6 +22,8 @@ Statistical backbone
 ``sharpe_significance`` and ``winrate_binomial_test`` are imported from
 ``statistical_tests`` so that scoring decisions are anchored to
 established significance results rather than raw heuristics alone.
+``detect_overfitting`` computes one ``PnlMoments`` pass and shares it
+between the win-rate and Sharpe scorers.
 
 Public API
 ----------
@@ -40,7 +42,7 @@ from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import Any, Sequence
 
-from statistical_tests import sharpe_significance, winrate_binomial_test
+from statistical_tests import PnlMoments, sharpe_significance, winrate_binomial_test
 
 logger = logging.getLogger(__name__)
 
@@ -385,7 +387,7 @@ def score_equity_smoothness(
 # ---------------------------------------------------------------------------
 
 def score_win_rate(
-    pnl_list: Sequence[float],
+    pnl_list: Sequence[float] | PnlMoments,
     config: OverfittingConfig | None = None,
 ) -> dict:
     """
@@ -410,10 +412,10 @@ def score_win_rate(
         warnings        list[str]
     """
     cfg = config or OverfittingConfig()
-    data = list(pnl_list)
+    moments = PnlMoments.from_pnl(pnl_list)
     warnings: list[str] = []
 
-    if not data:
+    if moments.n == 0:
         return {
             "score": 0.0,
             "win_rate": None,
@@ -424,7 +426,7 @@ def score_win_rate(
             "warnings": warnings,
         }
 
-    binom = winrate_binomial_test(data, alpha=cfg.alpha)
+    binom = winrate_binomial_test(moments, alpha=cfg.alpha)
     win_rate = binom.get("win_rate") or 0.0
     wins     = binom.get("wins",   0)
     losses   = binom.get("losses", 0)
@@ -467,7 +469,7 @@ def score_win_rate(
 # ---------------------------------------------------------------------------
 
 def score_sharpe(
-    pnl_list: Sequence[float],
+    pnl_list: Sequence[float] | PnlMoments,
     config: OverfittingConfig | None = None,
 ) -> dict:
     """
@@ -494,10 +496,10 @@ def score_sharpe(
         warnings           list[str]
     """
     cfg = config or OverfittingConfig()
-    data = list(pnl_list)
+    moments = PnlMoments.from_pnl(pnl_list)
     warnings: list[str] = []
 
-    if not data:
+    if moments.n == 0:
         return {
             "score": 0.0,
             "per_trade_sharpe": None,
@@ -507,7 +509,7 @@ def score_sharpe(
             "warnings": warnings,
         }
 
-    sharpe_result = sharpe_significance(data, alpha=cfg.alpha)
+    sharpe_result = sharpe_significance(moments, alpha=cfg.alpha)
     per_trade_sr  = sharpe_result.get("sharpe_ratio")
 
     annualised_sr: float | None = None
@@ -758,8 +760,9 @@ def detect_overfitting(
     # Run individual factor scorers
     # ------------------------------------------------------------------
     smoothness_result  = score_equity_smoothness(curve, cfg)
-    win_rate_result    = score_win_rate(data, cfg)
-    sharpe_result      = score_sharpe(data, cfg)
+    moments            = PnlMoments.from_pnl(data)
+    win_rate_result    = score_win_rate(moments, cfg)
+    sharpe_result      = score_sharpe(moments, cfg)
 
     dates_input = trade_dates if trade_dates is not None else []
     clustering_result  = score_trade_clustering(dates_input, cfg)
@@ -0,0 +1,234 @@
+"""
+price_store.py
+--------------
+Persistent on-disk store of daily closing prices, shared by every worker
+process that points at the same directory.
+
+Prices live in a single SQLite file.  Alongside the closes the store records
+which date ranges have already been fetched per ticker, so weekends and
+holidays (which have no rows) are not re-requested, overlapping requests
+reuse what is on disk, and only the missing gaps are downloaded.
+
+Coverage only extends to the last bar a fetch actually returned, so an
+empty download (a transient error or rate limit) is retried next time.
+
+Closes are split/dividend adjusted, and a new split or dividend rescales
+every earlier close.  Each gap fetch therefore also requests the stored bar
+next to the gap; if that bar's close no longer matches, the ticker's rows
+are dropped and the whole requested range is fetched again, so a series is
+never stitched from two adjustment bases.
+
+Public API
+----------
+get_price_store()                               →  PriceStore | None
+PriceStore(directory)
+PriceStore.get_closes(ticker, start, end, fetch) →  pd.Series
+PriceStore.missing_ranges(ticker, start, end)   →  list[tuple[date, date]]
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the SQLite file; persistence is off when unset or empty
+PRICE_CACHE_DIR_ENV = "BENCHMARK_CACHE_DIR"
+PRICE_CACHE_FILENAME = "benchmark_prices.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS closes (
+    ticker TEXT NOT NULL,
+    day    TEXT NOT NULL,
+    close  REAL NOT NULL,
+    PRIMARY KEY (ticker, day)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker    TEXT NOT NULL,
+    start_day TEXT NOT NULL,
+    end_day   TEXT NOT NULL
+);
+"""
+
+# Fetches closes for an inclusive [start, end] range; returns a date-indexed Series
+CloseFetcher = Callable[[str, datetime, datetime], pd.Series]
+
+
+def _merge_ranges(ranges: list[tuple[date, date]]) -> list[tuple[date, date]]:
+    """Merge overlapping or adjacent inclusive date ranges."""
+    merged: list[tuple[date, date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class PriceStore:
+    """SQLite-backed daily close store with per-ticker coverage tracking."""
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, PRICE_CACHE_FILENAME)
+        # Serialises writers within this process; SQLite locks across processes
+        self._write_lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _coverage(self, conn: sqlite3.Connection, ticker: str) -> list[tuple[date, date]]:
+        rows = conn.execute(
+            "SELECT start_day, end_day FROM coverage WHERE ticker = ?", (ticker,)
+        ).fetchall()
+        return _merge_ranges([(date.fromisoformat(s), date.fromisoformat(e)) for s, e in rows])
+
+    def missing_ranges(self, ticker: str, start: date, end: date) -> list[tuple[date, date]]:
+        """Inclusive sub-ranges of [start, end] not yet fetched for ticker."""
+        with closing(self._connect()) as conn:
+            covered = self._coverage(conn, ticker)
+        gaps: list[tuple[date, date]] = []
+        cursor = start
+        for cov_start, cov_end in covered:
+            if cov_end < cursor:
+                continue
+            if cov_start > end:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, cov_start - timedelta(days=1)))
+            cursor = max(cursor, cov_end + timedelta(days=1))
+            if cursor > end:
+                break
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _store(self, ticker: str, closes: pd.Series, start: date, end: date) -> None:
+        """Persist closes and mark [start, last returned bar] as fetched.
+
+        Nothing is marked when closes is empty, so a failed download is
+        retried.  Coverage never extends past yesterday: today's bar may
+        still change and future dates have no data yet.
+        """
+        rows = [
+            (ticker, pd.Timestamp(ts).date().isoformat(), float(value))
+            for ts, value in closes.items()
+            if pd.notna(value)
+        ]
+        if not rows:
+            return
+        last_bar = max(date.fromisoformat(day) for _, day, _ in rows)
+        covered_end = min(end, last_bar, date.today() - timedelta(days=1))
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO closes (ticker, day, close) VALUES (?, ?, ?)", rows
+            )
+            if covered_end >= start:
+                merged = _merge_ranges(self._coverage(conn, ticker) + [(start, covered_end)])
+                conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+                conn.executemany(
+                    "INSERT INTO coverage (ticker, start_day, end_day) VALUES (?, ?, ?)",
+                    [(ticker, s.isoformat(), e.isoformat()) for s, e in merged],
+                )
+
+    def _read(self, ticker: str, start: date, end: date) -> pd.Series:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT day, close FROM closes WHERE ticker = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (ticker, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return pd.Series(
+            [close for _, close in rows],
+            index=pd.DatetimeIndex([day for day, _ in rows]),
+            dtype=float,
+            name="close",
+        )
+
+    def _anchor(self, ticker: str, gap_start: date, gap_end: date) -> tuple[date, float] | None:
+        """The stored bar just before the gap, else just after it, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT day, close FROM closes WHERE ticker = ? AND day < ? ORDER BY day DESC LIMIT 1",
+                (ticker, gap_start.isoformat()),
+            ).fetchone() or conn.execute(
+                "SELECT day, close FROM closes WHERE ticker = ? AND day > ? ORDER BY day LIMIT 1",
+                (ticker, gap_end.isoformat()),
+            ).fetchone()
+        return None if row is None else (date.fromisoformat(row[0]), row[1])
+
+    def _forget(self, ticker: str) -> None:
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM closes WHERE ticker = ?", (ticker,))
+            conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+
+    @staticmethod
+    def _close_on(closes: pd.Series, day: date) -> float | None:
+        matches = closes[[pd.Timestamp(ts).date() == day for ts in closes.index]]
+        return float(matches.iloc[0]) if len(matches) and pd.notna(matches.iloc[0]) else None
+
+    def get_closes(self, ticker: str, start: date, end: date, fetch: CloseFetcher) -> pd.Series:
+        """Return closes for [start, end], fetching only the ranges not yet on disk.
+
+        If a gap fetch shows the stored closes were re-adjusted since they
+        were saved, the ticker is dropped and [start, end] fetched in full.
+        Exceptions raised by ``fetch`` propagate; ranges fetched before the
+        failure are kept.
+        """
+        def fetch_range(first: date, last: date) -> pd.Series:
+            return fetch(
+                ticker,
+                datetime.combine(first, datetime.min.time()),
+                datetime.combine(last, datetime.min.time()),
+            )
+
+        for gap_start, gap_end in self.missing_ranges(ticker, start, end):
+            anchor = self._anchor(ticker, gap_start, gap_end)
+            if anchor is None:
+                self._store(ticker, fetch_range(gap_start, gap_end), gap_start, gap_end)
+                continue
+
+            anchor_day, anchor_close = anchor
+            fetch_start, fetch_end = min(gap_start, anchor_day), max(gap_end, anchor_day)
+            closes = fetch_range(fetch_start, fetch_end)
+            if closes.empty:
+                continue
+            fresh = self._close_on(closes, anchor_day)
+            if fresh is None or abs(fresh - anchor_close) > 1e-6 * abs(anchor_close):
+                logger.info("Stored %s closes were re-adjusted; fetching %s..%s again", ticker, start, end)
+                self._forget(ticker)
+                self._store(ticker, fetch_range(start, end), start, end)
+                break
+            self._store(ticker, closes, fetch_start, fetch_end)
+        return self._read(ticker, start, end)
+
+
+_store_lock = threading.Lock()
+_store: PriceStore | None = None
+
+
+def get_price_store() -> PriceStore | None:
+    """Return the process-wide store for $BENCHMARK_CACHE_DIR, or None if unset."""
+    global _store
+    directory = os.environ.get(PRICE_CACHE_DIR_ENV, "").strip()
+    if not directory:
+        return None
+    with _store_lock:
+        if _store is None or _store.directory != directory:
+            try:
+                _store = PriceStore(directory)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("Price store unavailable at %s: %s", directory, exc)
+                return None
+        return _store
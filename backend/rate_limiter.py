@@ -0,0 +1,158 @@
+"""
+rate_limiter.py
+---------------
+Monthly per-IP usage counters for the free-tier limit on /analyze-trades.
+
+Two interchangeable backends implement the same ``try_acquire`` contract:
+
+  - ``InMemoryRateLimiter`` keeps counts in a process-local dict.  Counts
+    from months before the current one are dropped so the dict stays
+    bounded.  Each worker process counts separately.
+  - ``SQLiteRateLimiter`` keeps counts in a SQLite file.  Every gunicorn
+    worker (or host sharing the volume) that points at the same file
+    enforces one shared limit; the check-and-increment runs inside a single
+    write transaction so concurrent requests cannot both take the last slot.
+
+``create_rate_limiter()`` picks the backend from $RATE_LIMIT_DB_PATH.
+
+Public API
+----------
+create_rate_limiter()                         →  RateLimiter
+RateLimiter.try_acquire(ip, month, limit)     →  bool
+RateLimiter.reset()
+InMemoryRateLimiter()
+SQLiteRateLimiter(path)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+# Path of the shared SQLite counter file; the in-memory backend is used when unset
+RATE_LIMIT_DB_ENV = "RATE_LIMIT_DB_PATH"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    ip    TEXT    NOT NULL,
+    month TEXT    NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (ip, month)
+);
+CREATE INDEX IF NOT EXISTS usage_month ON usage (month);
+"""
+
+
+class RateLimiter(Protocol):
+    def try_acquire(self, ip: str, month: str, limit: int) -> bool:
+        """Count one request for (ip, month); return False if limit was already reached."""
+        ...
+
+    def reset(self) -> None:
+        """Forget every count."""
+        ...
+
+
+class InMemoryRateLimiter:
+    """Process-local counters keyed by (ip, "YYYY-MM")."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, str], int] = {}
+        self._current_month: str | None = None
+
+    def _evict_before(self, month: str) -> None:
+        # Caller holds self._lock. Month keys are "YYYY-MM", so they sort chronologically.
+        stale = [key for key in self._counts if key[1] < month]
+        for key in stale:
+            del self._counts[key]
+
+    def try_acquire(self, ip: str, month: str, limit: int) -> bool:
+        key = (ip, month)
+        with self._lock:
+            if self._current_month is None or month > self._current_month:
+                self._evict_before(month)
+                self._current_month = month
+            count = self._counts.get(key, 0)
+            if count >= limit:
+                return False
+            self._counts[key] = count + 1
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._current_month = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._counts)
+
+
+class SQLiteRateLimiter:
+    """Counters in a SQLite file shared by every process that opens the same path."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = os.fspath(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def try_acquire(self, ip: str, month: str, limit: int) -> bool:
+        with closing(self._connect()) as conn:
+            # IMMEDIATE takes the write lock up front, so the read and the
+            # increment below are atomic across processes.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM usage WHERE month < ?", (month,))
+                row = conn.execute(
+                    "SELECT count FROM usage WHERE ip = ? AND month = ?", (ip, month)
+                ).fetchone()
+                allowed = (row[0] if row else 0) < limit
+                if allowed:
+                    conn.execute(
+                        "INSERT INTO usage (ip, month, count) VALUES (?, ?, 1) "
+                        "ON CONFLICT (ip, month) DO UPDATE SET count = count + 1",
+                        (ip, month),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return allowed
+
+    def reset(self) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM usage")
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM usage").fetchone()[0]
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Return a SQLite limiter for $RATE_LIMIT_DB_PATH, or an in-memory one if unset.
+
+    Falls back to in-memory (with a warning) if the SQLite file cannot be opened.
+    """
+    path = os.environ.get(RATE_LIMIT_DB_ENV, "").strip()
+    if not path:
+        return InMemoryRateLimiter()
+    try:
+        return SQLiteRateLimiter(path)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("Shared rate limit store unavailable at %s: %s; counting in memory", path, exc)
+        return InMemoryRateLimiter()
@@ -16,6 +16,8 @@ Tests performed
 Public API
 ----------
 run_significance_tests(pnl_list, ...)  →  dict      ← main entry-point
+PnlMoments.from_pnl(pnl_list)          →  PnlMoments ← shared moments pass; accepted
+                                                      by the t-test, Sharpe and win-rate tests
 plain_english_verdict(pnl_list, ...)   →  str       ← simple human-readable verdict
 """
 
@@ -25,8 +27,11 @@ import logging
 import math
 import random
 import statistics
+from dataclasses import dataclass
 from typing import Sequence
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -37,6 +42,7 @@ DEFAULT_ALPHA: float = 0.05          # significance level (two-tailed)
 DEFAULT_MIN_TRADES: int = 30         # minimum trade count for reliable inference
 DEFAULT_BOOTSTRAP_ITERS: int = 10_000
 DEFAULT_CI_LEVEL: float = 0.95
+BOOTSTRAP_CHUNK_ELEMENTS: int = 2_000_000   # resample indices held in memory at once (~16 MB)
 
 
 
@@ -68,19 +74,75 @@ VERDICT_DESCRIPTIONS: dict[str, str] = {
 # Internal helpers
 # ---------------------------------------------------------------------------
 
-def _mean(data: list[float]) -> float:
-    return sum(data) / len(data)
+@dataclass(frozen=True)
+class PnlMoments:
+    """
+    Sufficient statistics of a P&L list, computed in one pass.
+
+    Power sums are taken around ``pivot`` (the first value) rather than zero,
+    which avoids catastrophic cancellation in the variance when P&L values
+    are large relative to their spread.  Every test in the battery derives
+    its mean, variance, skewness and win counts from this object.
+    """
+    n: int
+    pivot: float
+    sum_dev: float        # Σ (x - pivot)
+    sum_sq_dev: float     # Σ (x - pivot)²
+    sum_cube_dev: float   # Σ (x - pivot)³
+    wins: int             # count of x > 0
+    nonzero: int          # count of x != 0
+
+    @classmethod
+    def from_pnl(cls, pnl_list: Sequence[float] | PnlMoments) -> PnlMoments:
+        """Compute moments from a P&L list (returns an existing PnlMoments unchanged)."""
+        if isinstance(pnl_list, PnlMoments):
+            return pnl_list
+        values = np.asarray(pnl_list, dtype=np.float64)
+        if values.size == 0:
+            return cls(0, 0.0, 0.0, 0.0, 0.0, 0, 0)
+        pivot = float(values[0])
+        dev = values - pivot
+        dev_sq = dev * dev
+        return cls(
+            n=int(values.size),
+            pivot=pivot,
+            sum_dev=float(dev.sum()),
+            sum_sq_dev=float(dev_sq.sum()),
+            sum_cube_dev=float((dev_sq * dev).sum()),
+            wins=int(np.count_nonzero(values > 0)),
+            nonzero=int(np.count_nonzero(values)),
+        )
+
+    @property
+    def losses(self) -> int:
+        """Count of x < 0 (breakeven trades are neither wins nor losses)."""
+        return self.nonzero - self.wins
 
+    @property
+    def mean(self) -> float:
+        return self.pivot + self.sum_dev / self.n
 
-def _variance(data: list[float], ddof: int = 1) -> float:
-    """Sample variance (ddof=1) or population variance (ddof=0)."""
-    m = _mean(data)
-    ss = sum((x - m) ** 2 for x in data)
-    return ss / (len(data) - ddof)
+    def _central_sq(self) -> float:
+        """Σ (x - mean)²"""
+        return max(self.sum_sq_dev - self.sum_dev * self.sum_dev / self.n, 0.0)
 
+    def variance(self, ddof: int = 1) -> float:
+        """Sample variance (ddof=1) or population variance (ddof=0)."""
+        return self._central_sq() / (self.n - ddof)
 
-def _std(data: list[float], ddof: int = 1) -> float:
-    return math.sqrt(_variance(data, ddof))
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+    def skewness(self) -> float:
+        """Sample skewness (Fisher-Pearson standardised coefficient)."""
+        if self.n < 3:
+            return 0.0
+        s = self.std(ddof=1)
+        if s == 0:
+            return 0.0
+        d = self.sum_dev / self.n   # mean deviation from pivot
+        central_cube = self.sum_cube_dev - 3 * d * self.sum_sq_dev + 2 * self.n * d ** 3
+        return (central_cube / self.n) / (s ** 3)
 
 
 def _t_cdf_approx(t: float, df: int) -> float:
@@ -160,58 +222,103 @@ def _two_tail_p_value(t_stat: float, df: int) -> float:
     return 2.0 * (1.0 - cdf)
 
 
-def _normal_cdf(z: float) -> float:
-    """Standard-normal CDF via math.erfc."""
-    return 0.5 * math.erfc(-z / math.sqrt(2.0))
+# log(i!) for i = 0..len-1, grown on demand and shared by every binomial test
+_log_factorial_table: np.ndarray = np.zeros(1)
+
+# Relative tolerance when comparing PMF terms against P(X=k), so that terms
+# equal to P(X=k) up to rounding are counted as "as extreme" (as SciPy does).
+_BINOM_PMF_RTOL: float = 1e-7
+
+
+def _log_factorials(n: int) -> np.ndarray:
+    """Return log(i!) for i = 0..n, extending the cached table if needed."""
+    global _log_factorial_table
+    table = _log_factorial_table
+    if table.size <= n:
+        # Grow geometrically so a run of increasing n stays O(total n)
+        size = max(n + 1, 2 * table.size)
+        extra = np.fromiter(
+            map(math.lgamma, range(table.size + 1, size + 1)),
+            dtype=np.float64,
+            count=size - table.size,
+        )
+        table = np.concatenate([table, extra])
+        _log_factorial_table = table
+    return table[: n + 1]
+
+
+def _binom_pmf_all(n: int, p: float) -> np.ndarray:
+    """P(X=i) for every i in 0..n, X ~ Binomial(n, p) with 0 < p < 1."""
+    log_fact = _log_factorials(n)
+    i = np.arange(n + 1)
+    log_pmf = (
+        log_fact[n] - log_fact - log_fact[::-1]
+        + i * math.log(p) + (n - i) * math.log1p(-p)
+    )
+    return np.exp(log_pmf)
 
 
 def _binomial_p_value(k: int, n: int, p0: float = 0.5) -> float:
     """
     Exact two-tailed p-value for the binomial test H0: win_rate == p0.
-    Uses normal approximation with continuity correction for n > 50,
-    exact sum for n <= 50.
+
+    Sums P(X=i) over every i with P(X=i) <= P(X=k).  All n+1 PMF terms are
+    evaluated in one vectorised pass from a cached log-factorial table, so
+    the test stays exact and O(n) for any sample size.
     """
-    if n <= 50:
-        # Exact: sum P(X=i) for all i where P(X=i) <= P(X=k)
-        prob_k = _binom_pmf(k, n, p0)
-        p_val = sum(
-            _binom_pmf(i, n, p0)
-            for i in range(n + 1)
-            if _binom_pmf(i, n, p0) <= prob_k + 1e-10
-        )
-        return min(p_val, 1.0)
-    else:
-        # Normal approximation with continuity correction
-        mu = n * p0
-        sigma = math.sqrt(n * p0 * (1 - p0))
-        z = (abs(k - mu) - 0.5) / sigma
-        return 2.0 * (1.0 - _normal_cdf(z))
-
-
-def _binom_pmf(k: int, n: int, p: float) -> float:
-    """Binomial probability mass function."""
-    log_coeff = math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
-    if p == 0.0:
-        return 1.0 if k == 0 else 0.0
-    if p == 1.0:
-        return 1.0 if k == n else 0.0
-    log_prob = log_coeff + k * math.log(p) + (n - k) * math.log(1.0 - p)
-    return math.exp(log_prob)
-
-
-def _percentile(data: list[float], pct: float) -> float:
-    """Linear-interpolation percentile (matches numpy default)."""
-    if not data:
+    if p0 <= 0.0 or p0 >= 1.0:
+        # Degenerate null: all mass on a single outcome
+        certain = 0 if p0 <= 0.0 else n
+        return 1.0 if k == certain else 0.0
+    pmf = _binom_pmf_all(n, p0)
+    threshold = pmf[k] * (1.0 + _BINOM_PMF_RTOL)
+    p_val = float(pmf[pmf <= threshold].sum())
+    return min(p_val, 1.0)
+
+
+def _percentile(data: Sequence[float] | np.ndarray, pct: float) -> float:
+    """Linear-interpolation percentile (matches numpy default).
+
+    Uses np.partition to place only the two neighbouring order statistics,
+    which is O(n) rather than the O(n log n) of a full sort.
+    """
+    values = np.asarray(data, dtype=np.float64)
+    n = values.size
+    if n == 0:
         raise ValueError("Empty data")
-    sorted_data = sorted(data)
-    n = len(sorted_data)
     idx = pct / 100.0 * (n - 1)
     lo = int(idx)
     hi = lo + 1
     if hi >= n:
-        return sorted_data[-1]
+        return float(np.max(values))
+    part = np.partition(values, [lo, hi])
     frac = idx - lo
-    return sorted_data[lo] * (1 - frac) + sorted_data[hi] * frac
+    return float(part[lo] * (1 - frac) + part[hi] * frac)
+
+
+def _bootstrap_means(
+    values: np.ndarray,
+    n_iterations: int,
+    seed: int,
+    chunk_elements: int = BOOTSTRAP_CHUNK_ELEMENTS,
+) -> np.ndarray:
+    """
+    Means of ``n_iterations`` resamples (with replacement) of ``values``.
+
+    Resample indices are drawn as (rows × n) matrices, at most
+    ``chunk_elements`` indices at a time, so memory stays bounded for large n.
+    Generator draws are consumed in row order, so the result depends only on
+    ``seed`` and not on the chunk size.
+    """
+    n = values.size
+    rng = np.random.default_rng(seed)
+    rows_per_chunk = max(1, chunk_elements // n)
+    means = np.empty(n_iterations, dtype=np.float64)
+    for start in range(0, n_iterations, rows_per_chunk):
+        stop = min(start + rows_per_chunk, n_iterations)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        means[start:stop] = values[idx].mean(axis=1)
+    return means
 
 
 # ---------------------------------------------------------------------------
@@ -241,7 +348,7 @@ def check_min_trade_count(
 
 
 def ttest_vs_zero(
-    pnl_list: list[float],
+    pnl_list: Sequence[float] | PnlMoments,
     alpha: float = DEFAULT_ALPHA,
 ) -> dict:
     """
@@ -251,7 +358,8 @@ def ttest_vs_zero(
     statistically distinguishable from zero (i.e. from random coin-flip
     trading with zero expected value).
     """
-    n = len(pnl_list)
+    moments = PnlMoments.from_pnl(pnl_list)
+    n = moments.n
     if n < 2:
         return {
             "t_statistic": None,
@@ -260,8 +368,8 @@ def ttest_vs_zero(
             "interpretation": "Insufficient data for t-test (need at least 2 trades).",
         }
 
-    mean_pnl = _mean(pnl_list)
-    se = _std(pnl_list, ddof=1) / math.sqrt(n)
+    mean_pnl = moments.mean
+    se = moments.std(ddof=1) / math.sqrt(n)
 
     if se == 0.0:
         return {
@@ -303,6 +411,8 @@ def bootstrap_confidence_interval(
     Non-parametric bootstrap confidence interval on mean P&L.
 
     Does not assume normality — robust for fat-tailed return distributions.
+    Resampling is vectorised (see _bootstrap_means); the same seed always
+    gives the same interval.
     """
     n = len(pnl_list)
     if n < 2:
@@ -314,11 +424,7 @@ def bootstrap_confidence_interval(
             "interpretation": "Insufficient data for bootstrap CI (need at least 2 trades).",
         }
 
-    rng = random.Random(seed)
-    boot_means: list[float] = []
-    for _ in range(n_iterations):
-        sample = [rng.choice(pnl_list) for _ in range(n)]
-        boot_means.append(_mean(sample))
+    boot_means = _bootstrap_means(np.asarray(pnl_list, dtype=np.float64), n_iterations, seed)
 
     alpha = 1.0 - ci_level
     lower_pct = (alpha / 2.0) * 100.0
@@ -326,7 +432,7 @@ def bootstrap_confidence_interval(
 
     ci_lower = _percentile(boot_means, lower_pct)
     ci_upper = _percentile(boot_means, upper_pct)
-    mean_pnl = _mean(pnl_list)
+    mean_pnl = float(np.mean(pnl_list))
     excludes_zero = ci_lower > 0.0 or ci_upper < 0.0
 
     pct_label = int(ci_level * 100)
@@ -350,7 +456,7 @@ def bootstrap_confidence_interval(
 
 
 def sharpe_significance(
-    pnl_list: list[float],
+    pnl_list: Sequence[float] | PnlMoments,
     risk_free_per_trade: float = 0.0,
     alpha: float = DEFAULT_ALPHA,
 ) -> dict:
@@ -360,7 +466,8 @@ def sharpe_significance(
     Uses the asymptotic t-statistic:  t = SR * sqrt(n)
     (Lo, 2002 — valid for i.i.d. returns).
     """
-    n = len(pnl_list)
+    moments = PnlMoments.from_pnl(pnl_list)
+    n = moments.n
     if n < 2:
         return {
             "sharpe_ratio": None,
@@ -370,9 +477,9 @@ def sharpe_significance(
             "interpretation": "Insufficient data for Sharpe significance test.",
         }
 
-    excess = [p - risk_free_per_trade for p in pnl_list]
-    mean_excess = _mean(excess)
-    std_excess = _std(excess, ddof=1)
+    # Subtracting a constant shifts the mean but leaves the spread unchanged
+    mean_excess = moments.mean - risk_free_per_trade
+    std_excess = moments.std(ddof=1)
 
     if std_excess == 0.0:
         return {
@@ -407,7 +514,7 @@ def sharpe_significance(
 
 
 def winrate_binomial_test(
-    pnl_list: list[float],
+    pnl_list: Sequence[float] | PnlMoments,
     null_win_rate: float = 0.5,
     alpha: float = DEFAULT_ALPHA,
 ) -> dict:
@@ -418,8 +525,8 @@ def winrate_binomial_test(
     coin-flip process (50/50 random trades).
     """
     # Only count trades with nonzero P&L
-    nonzero_pnl = [p for p in pnl_list if p != 0]
-    n = len(nonzero_pnl)
+    moments = PnlMoments.from_pnl(pnl_list)
+    n = moments.nonzero
     if n < 1:
         return {
             "win_rate": None,
@@ -430,8 +537,8 @@ def winrate_binomial_test(
             "interpretation": "No nonzero-P&L trades provided (all breakeven or empty).",
         }
 
-    wins = sum(1 for p in nonzero_pnl if p > 0)
-    losses = n - wins
+    wins = moments.wins
+    losses = moments.losses
     win_rate = wins / n
     p_val = _binomial_p_value(wins, n, null_win_rate)
     significant = p_val < alpha
@@ -489,6 +596,8 @@ def run_significance_tests(
     """
     pnl: list[float] = [float(x) for x in pnl_list]
     n = len(pnl)
+    # One moments pass shared by the t-test, Sharpe, win-rate and skewness checks
+    moments = PnlMoments.from_pnl(pnl)
     warnings: list[str] = []
 
     # --- 0. minimum trade count check ---
@@ -509,18 +618,18 @@ def run_significance_tests(
                 "are likely to hold up — smaller samples are too easily distorted by a "
                 "few lucky or unlucky trades."
             ),
-            "ttest": ttest_vs_zero(pnl, alpha),
+            "ttest": ttest_vs_zero(moments, alpha),
             "bootstrap_ci": bootstrap_confidence_interval(pnl, ci_level, bootstrap_iters, bootstrap_seed),
-            "sharpe": sharpe_significance(pnl, risk_free_per_trade, alpha),
-            "winrate": winrate_binomial_test(pnl, 0.5, alpha),
+            "sharpe": sharpe_significance(moments, risk_free_per_trade, alpha),
+            "winrate": winrate_binomial_test(moments, 0.5, alpha),
             "warnings": warnings,
         }
 
     # --- 1. individual tests ---
-    tt = ttest_vs_zero(pnl, alpha)
+    tt = ttest_vs_zero(moments, alpha)
     bci = bootstrap_confidence_interval(pnl, ci_level, bootstrap_iters, bootstrap_seed)
-    sr = sharpe_significance(pnl, risk_free_per_trade, alpha)
-    wr = winrate_binomial_test(pnl, 0.5, alpha)
+    sr = sharpe_significance(moments, risk_free_per_trade, alpha)
+    wr = winrate_binomial_test(moments, 0.5, alpha)
 
     # --- 2. overall verdict ---
     # "SIGNIFICANT" requires BOTH the t-test AND the bootstrap CI to agree.
@@ -560,12 +669,12 @@ def run_significance_tests(
         )
 
     # --- 3. extra warnings ---
-    mean_pnl = _mean(pnl)
+    mean_pnl = moments.mean
     if mean_pnl < 0:
         warnings.append("Mean P&L is negative — strategy is losing money on average.")
 
     try:
-        sk = _skewness(pnl)
+        sk = _skewness(moments)
         if abs(sk) > 2.0:
             warnings.append(
                 f"High skewness ({sk:.2f}): return distribution is heavily skewed. "
@@ -614,16 +723,9 @@ def plain_english_verdict(
 
 
 
-def _skewness(data: list[float]) -> float:
+def _skewness(data: Sequence[float] | PnlMoments) -> float:
     """Sample skewness (Fisher-Pearson standardised coefficient)."""
-    n = len(data)
-    if n < 3:
-        return 0.0
-    m = _mean(data)
-    s = _std(data, ddof=1)
-    if s == 0:
-        return 0.0
-    return (sum((x - m) ** 3 for x in data) / n) / (s ** 3)
+    return PnlMoments.from_pnl(data).skewness()
 
 
 # ---------------------------------------------------------------------------
@@ -1,11 +1,15 @@
 import sys
 import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
 import pytest
 
 if os.environ.get("SKIP_FLASK_APP", "0") == "1":
     flask_app = None
 else:
-    from app import app as flask_app, _rate_limit_store, _rate_limit_lock
+    from app import app as flask_app, _rate_limiter
 
 # Set before any app import so validate_env_vars() is suppressed during tests
 os.environ.setdefault("TESTING", "1")
@@ -14,6 +18,10 @@ os.environ.setdefault("TESTING", "1")
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'legacy'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+import backtest_cache
+import market_data
+import screener_cache
+
 @pytest.fixture
 def client():
     if flask_app is None:
@@ -25,12 +33,53 @@ def client():
 
 @pytest.fixture(autouse=True)
 def reset_rate_limit_store():
-    """Clear the in-memory rate limit store before each test to avoid cross-test pollution."""
+    """Clear the rate limit counts before each test to avoid cross-test pollution."""
     if flask_app is None:
         yield
         return
-    with _rate_limit_lock:
-        _rate_limit_store.clear()
+    _rate_limiter.reset()
+    yield
+    _rate_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_backtest_cache():
+    """Clear memoised backtests so tests with different mocked prices stay independent."""
+    backtest_cache.clear()
+    yield
+    backtest_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_market_data_cache():
+    """Clear cached price frames so each test sees its own mocked downloads."""
+    market_data.clear()
     yield
-    with _rate_limit_lock:
-        _rate_limit_store.clear()
+    market_data.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_screener_cache():
+    """Clear the screener's shared price frames and indicator state between tests."""
+    screener_cache.clear()
+    yield
+    screener_cache.clear()
+
+
+def _recent_bars(seed=0, periods=70):
+    rng = np.random.default_rng(seed)
+    close = 60 * np.exp(np.cumsum(rng.normal(0, 0.025, periods)))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * 1.02,
+        'Low': close * 0.98,
+        'Close': close,
+        'Volume': rng.integers(2_000_000, 6_000_000, periods).astype(float),
+    }, index=pd.bdate_range(end=datetime.now().date() - pd.Timedelta(days=1), periods=periods))
+
+
+@pytest.fixture
+def recent_bars():
+    """Factory for liquid daily OHLCV bars ending yesterday, in yfinance's
+    column layout: recent_bars(seed=0, periods=70)."""
+    return _recent_bars
@@ -0,0 +1,147 @@
+"""Tests for concurrent, rate-limited universe screening."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from async_screening import SCREENER_FETCH_ATTEMPTS, TokenBucket, fetch_batches
+from market_data_provider import InMemoryProvider, set_provider
+from stock_screener import StockScreener
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _CountingProvider(InMemoryProvider):
+    def __init__(self, frames, delay=0.0):
+        super().__init__(frames)
+        self.delay = delay
+        self.calls = []
+
+    def download(self, symbols, start, end):
+        self.calls.append(list(symbols))
+        time.sleep(self.delay)
+        return super().download(symbols, start, end)
+
+
+def _collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def universe(recent_bars):
+    symbols = [f'S{i:03d}' for i in range(100)]
+    provider = _CountingProvider({symbol: recent_bars(i) for i, symbol in enumerate(symbols)})
+    set_provider(provider)
+    with patch.object(StockScreener, 'get_stock_universe', return_value=symbols):
+        yield symbols, provider
+    set_provider(None)
+
+
+class TestTokenBucket:
+    def test_burst_then_steady_rate(self):
+        clock = _Clock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+        assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+
+    def test_refills_over_time_up_to_capacity(self):
+        clock = _Clock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+        bucket.reserve(), bucket.reserve()
+        clock.now = 10.0
+        assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]
+
+    @pytest.mark.parametrize('rate, capacity', [(0, 1), (1, 0)])
+    def test_invalid_arguments(self, rate, capacity):
+        with pytest.raises(ValueError):
+            TokenBucket(rate, capacity)
+
+
+class TestFetchBatches:
+    def test_yields_every_batch_with_bounded_concurrency(self):
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def fetch(batch):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return {symbol: symbol.lower() for symbol in batch}
+
+        symbols = [f'S{i}' for i in range(23)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            batches = _collect(fetch_batches(symbols, fetch, batch_size=2, max_concurrency=3,
+                                             bucket=TokenBucket(1000, 1000), executor=executor))
+        assert len(batches) == 12
+        assert sorted(s for batch in batches for s in batch) == sorted(symbols)
+        assert peak[0] == 3
+
+    def test_failed_batch_retried_then_yields_none(self):
+        attempts = []
+
+        def fetch(batch):
+            attempts.append(batch)
+            raise OSError('rate limited')
+
+        bucket = TokenBucket(1000, 1000)
+        with patch.object(bucket, 'reserve', wraps=bucket.reserve) as reserve:
+            batches = _collect(fetch_batches(['A', 'B'], fetch, batch_size=5, bucket=bucket))
+        assert batches == [{'A': None, 'B': None}]
+        assert len(attempts) == SCREENER_FETCH_ATTEMPTS
+        assert reserve.call_count == SCREENER_FETCH_ATTEMPTS
+
+    def test_results_arrive_in_completion_order(self):
+        def fetch(batch):
+            time.sleep(0.15 if batch == ['slow'] else 0.0)
+            return {symbol: 1 for symbol in batch}
+
+        batches = _collect(fetch_batches(['slow', 'fast'], fetch, batch_size=1, bucket=TokenBucket(1000, 1000)))
+        assert [list(batch) for batch in batches] == [['fast'], ['slow']]
+
+
+class TestScreenStocksForMacd:
+    def test_full_universe_screened_in_bulk(self, universe):
+        symbols, provider = universe
+        screener = StockScreener()
+        with patch.object(StockScreener, 'use_precomputed_data_if_timeout') as precomputed:
+            selected = screener.screen_stocks_for_macd(max_stocks=5, timeout_seconds=30)
+
+        precomputed.assert_not_called()
+        assert len(selected) == 5
+        assert {s['symbol'] for s in selected} <= set(symbols)
+        # Five grouped downloads of 20 instead of 100 single-symbol calls
+        assert sorted(len(call) for call in provider.calls) == [20] * 5
+
+    def test_stream_scores_every_symbol_once(self, universe):
+        symbols, _ = universe
+        results = _collect(StockScreener().stream_macd_candidates(symbols))
+        assert sorted(symbol for symbol, _ in results) == symbols
+        assert all(r is None or r['symbol'] == s for s, r in results)
+
+    def test_repeat_screen_served_from_cache(self, universe):
+        _, provider = universe
+        screener = StockScreener()
+        screener.screen_stocks_for_macd(max_stocks=5, timeout_seconds=30)
+        provider.calls.clear()
+        screener.screen_stocks_for_macd(max_stocks=5, timeout_seconds=30)
+        assert provider.calls == []
+
+    def test_deadline_returns_precomputed_without_waiting_for_downloads(self, universe):
+        _, provider = universe
+        provider.delay = 2.0
+        start = time.monotonic()
+        selected = StockScreener().screen_stocks_for_macd(max_stocks=5, timeout_seconds=1)
+        assert time.monotonic() - start < 1.5
+        assert len(selected) == 5
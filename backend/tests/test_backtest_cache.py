@@ -0,0 +1,100 @@
+"""Tests for memoised MACD backtests (in-process LRU and shared disk tier)."""
+from datetime import date, datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_cache
+from backtest_cache import BACKTEST_CACHE_DIR_ENV, DiskTier, backtest_key, cache_stats
+import MACD_trading
+from MACD_trading import backtest_strategy_MACD, generate_monthly_performance
+
+START = datetime(2020, 1, 1)
+END = datetime(2022, 1, 1)
+MOCK_YF = 'market_data_provider.yf.download'
+
+
+def _fake_download(symbol, **_):
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2020-01-01', periods=500))
+
+
+@pytest.fixture(autouse=True)
+def no_disk_tier(monkeypatch):
+    monkeypatch.delenv(BACKTEST_CACHE_DIR_ENV, raising=False)
+    backtest_cache._disk = None
+    yield
+    backtest_cache._disk = None
+
+
+class TestBacktestKey:
+    def test_normalises_dates_and_whitespace(self):
+        assert backtest_key([' AAPL', 'MSFT '], datetime(2020, 1, 1), date(2021, 1, 1), 100000, 0.15, 12, 26, 9) == \
+            backtest_key(['AAPL', 'MSFT'], date(2020, 1, 1), datetime(2021, 1, 1), 100000.0, 0.15, 12.0, 26, 9)
+
+    def test_symbol_order_matters(self):
+        # Allocations chain through the running balance, so order changes results
+        assert backtest_key(['A', 'B'], START, END, 1, 0.1, 12, 26, 9) != \
+            backtest_key(['B', 'A'], START, END, 1, 0.1, 12, 26, 9)
+
+
+@patch(MOCK_YF, side_effect=_fake_download)
+class TestMemoisedBacktest:
+    def test_repeat_is_served_from_cache(self, mock_dl):
+        first = backtest_strategy_MACD(['AAA', 'BBB'], START, END)
+        second = backtest_strategy_MACD(['AAA', 'BBB'], START, END)
+        assert first == second
+        assert mock_dl.call_count == 2
+        assert cache_stats()['hits'] == 1
+
+    def test_monthly_performance_reuses_final_backtest(self, mock_dl):
+        backtest_strategy_MACD(['AAA'], START, END, 100000, fastperiod=10, slowperiod=24, signalperiod=7)
+        generate_monthly_performance(['AAA'], START, END, 100000, fastperiod=10, slowperiod=24, signalperiod=7)
+        assert mock_dl.call_count == 1
+
+    def test_different_stop_is_a_miss(self, mock_dl):
+        # Prices are cached separately (market_data), so count backtest runs
+        with patch.object(MACD_trading, '_run_backtest_strategy_MACD',
+                          wraps=MACD_trading._run_backtest_strategy_MACD) as mock_run:
+            backtest_strategy_MACD(['AAA'], START, END, trailing_stop_loss=0.1)
+            backtest_strategy_MACD(['AAA'], START, END, trailing_stop_loss=0.2)
+        assert mock_run.call_count == 2
+
+    def test_use_cache_false_bypasses(self, mock_dl):
+        with patch.object(MACD_trading, '_run_backtest_strategy_MACD',
+                          wraps=MACD_trading._run_backtest_strategy_MACD) as mock_run:
+            backtest_strategy_MACD(['AAA'], START, END)
+            backtest_strategy_MACD(['AAA'], START, END, use_cache=False)
+        assert mock_run.call_count == 2
+
+    def test_error_message_not_cached(self, mock_dl):
+        mock_dl.side_effect = lambda symbol, **_: pd.DataFrame({'Open': []})
+        assert isinstance(backtest_strategy_MACD(['BAD'], START, END), str)
+        assert isinstance(backtest_strategy_MACD(['BAD'], START, END), str)
+        assert mock_dl.call_count == 2
+
+
+@patch(MOCK_YF, side_effect=_fake_download)
+class TestDiskTier:
+    def test_survives_process_restart(self, mock_dl, monkeypatch, tmp_path):
+        monkeypatch.setenv(BACKTEST_CACHE_DIR_ENV, str(tmp_path))
+        first = backtest_strategy_MACD(['AAA'], START, END)
+        backtest_cache.clear()  # simulate a restart: memory tier gone
+        backtest_cache._disk = None
+        second = backtest_strategy_MACD(['AAA'], START, END)
+        assert mock_dl.call_count == 1
+        assert second == first
+        assert cache_stats()['disk_enabled'] is True
+
+    def test_expired_entries_are_ignored(self, mock_dl, tmp_path):
+        tier = DiskTier(tmp_path, ttl=60)
+        key = backtest_key(['AAA'], START, END, 1, 0.1, 12, 26, 9)
+        with patch('backtest_cache.time.time', return_value=1_000.0):
+            tier.set(key, ('summary', 123.5))
+        with patch('backtest_cache.time.time', return_value=1_030.0):
+            assert tier.get(key) == ('summary', 123.5)
+        with patch('backtest_cache.time.time', return_value=1_100.0):
+            assert tier.get(key) is backtest_cache._MISSING
@@ -0,0 +1,101 @@
+"""Tests for process-pool evaluation of optimizer backtests."""
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_cache
+from backtest_pool import (
+    OPTIMIZER_WORKERS_ENV,
+    BacktestEvaluator,
+    evaluate_parameters,
+    optimizer_workers,
+)
+from MACD_trading import load_price_panel
+from optimize_MACD import optimize_macd_parameters
+
+START = datetime(2020, 1, 1)
+END = datetime(2022, 12, 31)
+SYMBOLS = ['AAA', 'BBB']
+PARAMS = [(8, 21, 5), (12, 26, 9), (15, 30, 10), (10.7, 24.2, 6.9)]
+
+
+def _fake_download(symbol, **_):
+    if not isinstance(symbol, str):
+        # Grouped multi-ticker download: (ticker, field) columns
+        return pd.concat({s: _fake_download(s) for s in symbol}, axis=1)
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2020-01-01', periods=500))
+
+
+@pytest.fixture(scope='module')
+def panel():
+    with patch('market_data_provider.yf.download', side_effect=_fake_download):
+        return load_price_panel(SYMBOLS, START, END)
+
+
+class TestBacktestEvaluator:
+    def test_serial_matches_objective(self, panel):
+        with BacktestEvaluator(SYMBOLS, START, END, 100_000, panel) as evaluator:
+            values = evaluator.evaluate(PARAMS)
+        assert values == [evaluate_parameters(p, SYMBOLS, START, END, 100_000, panel) for p in PARAMS]
+
+    def test_pool_matches_serial_in_order(self, panel):
+        with BacktestEvaluator(SYMBOLS, START, END, 100_000, panel) as serial:
+            expected = serial.evaluate(PARAMS)
+        with BacktestEvaluator(SYMBOLS, START, END, 100_000, panel, max_workers=2) as pooled:
+            assert pooled.evaluate(PARAMS) == expected
+            assert pooled._pool is not None
+            # Forking a multi-threaded web process can deadlock the workers
+            assert pooled._pool._mp_context.get_start_method() == 'spawn'
+        assert pooled._pool is None
+
+    def test_pooled_grid_matches_serial(self, panel):
+        grid = ([8, 12], [21, 26], [5, 7, 9])
+        with BacktestEvaluator(SYMBOLS, START, END, 100_000, panel) as serial:
+            expected = serial.evaluate_grid(*grid)
+        with BacktestEvaluator(SYMBOLS, START, END, 100_000, panel, max_workers=2) as pooled:
+            result = pooled.evaluate_grid(*grid)
+        assert list(result.items()) == list(expected.items())
+
+    def test_failed_backtest_scores_initial_balance(self):
+        with BacktestEvaluator(['BAD'], START, END, 100_000, {'BAD': pd.DataFrame()}) as evaluator:
+            assert evaluator.evaluate([(12, 26, 9)]) == [-100_000]
+
+    def test_optimizer_backtests_bypass_the_cache(self, panel):
+        with BacktestEvaluator(SYMBOLS, START, END, 100_000, panel) as evaluator:
+            evaluator.evaluate(PARAMS)
+        stats = backtest_cache.cache_stats()
+        assert stats['size'] == 0 and stats['misses'] == 0
+
+
+class TestBatchedOptimizer:
+    def test_results_independent_of_worker_count(self, panel):
+        serial = optimize_macd_parameters(SYMBOLS, START, END, n_iterations=2, price_data=panel, batch_size=3)
+        pooled = optimize_macd_parameters(SYMBOLS, START, END, n_iterations=2, price_data=panel,
+                                          batch_size=3, max_workers=3)
+        assert pooled == serial
+
+    def test_exhaustive_independent_of_worker_count(self, panel):
+        serial = optimize_macd_parameters(SYMBOLS, START, END, price_data=panel, mode='exhaustive')
+        pooled = optimize_macd_parameters(SYMBOLS, START, END, price_data=panel, mode='exhaustive', max_workers=2)
+        assert pooled == serial
+
+    def test_invalid_batch_size(self, panel):
+        with pytest.raises(ValueError, match="batch_size"):
+            optimize_macd_parameters(SYMBOLS, START, END, price_data=panel, batch_size=0)
+
+
+class TestOptimizerWorkers:
+    @pytest.mark.parametrize('raw, expected', [('', 1), ('3', 3), ('0', 1), ('abc', 1)])
+    def test_parses_env(self, monkeypatch, raw, expected):
+        monkeypatch.setenv(OPTIMIZER_WORKERS_ENV, raw)
+        assert optimizer_workers() == expected
+
+    def test_auto_uses_every_cpu(self, monkeypatch):
+        monkeypatch.setenv(OPTIMIZER_WORKERS_ENV, 'auto')
+        with patch('backtest_pool.os.cpu_count', return_value=6):
+            assert optimizer_workers() == 6
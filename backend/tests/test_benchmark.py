@@ -1,5 +1,8 @@
 """Tests for benchmark.fetch_benchmark and benchmark.compare_user_return_to_benchmarks."""
 
+import threading
+import time
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -7,7 +10,7 @@ from datetime import datetime
 from unittest.mock import patch
 
 import benchmark as benchmark_module
-from benchmark import fetch_benchmark, compare_user_return_to_benchmarks, generate_verdict
+from benchmark import fetch_benchmark, fetch_benchmarks, compare_user_return_to_benchmarks, generate_verdict
 
 
 @pytest.fixture(autouse=True)
@@ -17,7 +20,7 @@ def clear_benchmark_cache():
     yield
     benchmark_module._cache.clear()
 
-_MOCK_YF = "benchmark.yf.download"
+_MOCK_YF = "market_data_provider.yf.download"
 
 
 def _make_df(first: str, last: str, start_price: float, end_price: float) -> pd.DataFrame:
@@ -193,6 +196,67 @@ class TestFetchBenchmark:
         assert result["total_return_pct"] == expected
 
 
+class TestFetchBenchmarks:
+    @patch(_MOCK_YF)
+    def test_returns_result_per_ticker(self, mock_dl):
+        def _side_effect(ticker, **kwargs):
+            end_price = 480.0 if ticker == "SPY" else 420.0
+            return _make_df("2023-01-03", "2023-12-15", 400.0, end_price)
+
+        mock_dl.side_effect = _side_effect
+        results = fetch_benchmarks(_sample_trades(), ["SPY", "QQQ"])
+        assert list(results) == ["SPY", "QQQ"]
+        assert results["SPY"] == fetch_benchmark(_sample_trades(), "SPY")
+        assert results["QQQ"]["total_return_pct"] == 5.0
+
+    @patch(_MOCK_YF)
+    def test_downloads_run_concurrently(self, mock_dl):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _side_effect(ticker, **kwargs):
+            barrier.wait()  # deadlocks (then times out) unless both run at once
+            return _make_df("2023-01-03", "2023-12-15", 400.0, 480.0)
+
+        mock_dl.side_effect = _side_effect
+        results = fetch_benchmarks(_sample_trades(), ["SPY", "QQQ"])
+        assert all(r is not None for r in results.values())
+
+    @patch(_MOCK_YF)
+    def test_slow_ticker_reported_as_none_after_deadline(self, mock_dl):
+        release = threading.Event()
+
+        def _side_effect(ticker, **kwargs):
+            if ticker == "QQQ":
+                release.wait(5)
+            return _make_df("2023-01-03", "2023-12-15", 400.0, 480.0)
+
+        mock_dl.side_effect = _side_effect
+        started = time.monotonic()
+        results = fetch_benchmarks(_sample_trades(), ["SPY", "QQQ"], deadline_seconds=0.2)
+        assert time.monotonic() - started < 2
+        assert results["SPY"] is not None
+        assert results["QQQ"] is None
+
+        # The late download still completes in the background and fills the cache
+        release.set()
+        qqq_key = ("QQQ", "2023-01-03", "2023-12-15")
+        for _ in range(100):
+            if qqq_key in benchmark_module._cache:
+                break
+            time.sleep(0.02)
+        assert benchmark_module._cache.get(qqq_key) is not None
+
+    @patch(_MOCK_YF)
+    def test_cached_tickers_are_not_refetched(self, mock_dl):
+        mock_dl.return_value = _make_df("2023-01-03", "2023-12-15", 400.0, 480.0)
+        fetch_benchmark(_sample_trades(), "SPY")
+        fetch_benchmarks(_sample_trades(), ["SPY", "QQQ"])
+        assert [c.args[0] for c in mock_dl.call_args_list] == ["SPY", "QQQ"]
+
+    def test_empty_trades_returns_none_for_each_ticker(self):
+        assert fetch_benchmarks([], ["SPY", "QQQ"]) == {"SPY": None, "QQQ": None}
+
+
 class TestCompareUserReturnToBenchmarks:
     @patch(_MOCK_YF)
     def test_returns_expected_structure(self, mock_dl):
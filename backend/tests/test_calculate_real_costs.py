@@ -2,8 +2,11 @@
 Tests for calculate_real_costs() adjusted return math.
 Covers multi-trade scenarios with mixed short/long term holds.
 """
+from unittest.mock import patch
+
 import pytest
-from transaction_costs import calculate_real_costs, calculate_commissions, calculate_slippage, calculate_bid_ask_spread, calculate_win_rate, CostConfig
+import transaction_costs
+from transaction_costs import calculate_real_costs, calculate_commissions, calculate_slippage, calculate_bid_ask_spread, calculate_taxes, calculate_win_rate, normalise_trades, CostConfig
 
 ACCOUNT_SIZE = 10_000.0
 
@@ -694,3 +697,26 @@ class TestCalculateWinRate:
         result = calculate_win_rate(trades)
         assert result["low_sample_warning"] is False
         assert result["closed_trade_count"] == 30
+
+
+class TestNormaliseOnce:
+    def test_real_costs_normalises_input_once(self):
+        with patch("transaction_costs._normalise_detailed", wraps=transaction_costs._normalise_detailed) as spy:
+            calculate_real_costs(MIXED_TRADES, ACCOUNT_SIZE)
+        assert spy.call_count == 1
+
+    def test_calculators_accept_normalised_context(self):
+        context = normalise_trades(MIXED_TRADES)
+        assert len(context) == 6 and not context.is_summary
+        assert normalise_trades(context) is context
+        assert calculate_commissions(context) == calculate_commissions(MIXED_TRADES)
+        assert calculate_slippage(context) == calculate_slippage(MIXED_TRADES)
+        assert calculate_bid_ask_spread(context) == calculate_bid_ask_spread(MIXED_TRADES)
+        assert calculate_taxes(context) == calculate_taxes(MIXED_TRADES)
+        assert calculate_win_rate(context) == calculate_win_rate(MIXED_TRADES)
+
+    def test_summary_context_keeps_summary_mode(self):
+        summary = {"initial_capital": 10000, "final_balance": 11000, "num_trades": 10, "win_rate": 0.6}
+        context = normalise_trades(summary)
+        assert context.is_summary
+        assert calculate_commissions(context) == calculate_commissions(summary)
@@ -0,0 +1,128 @@
+"""Tests for sector- and correlation-aware stock selection (diversification)."""
+from datetime import datetime
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import screener_cache
+import stock_screener
+from diversification import (
+    CANDIDATE_POOL_FACTOR,
+    CORRELATION_PENALTY,
+    SAME_INDUSTRY_CORRELATION,
+    SAME_SECTOR_CORRELATION,
+    SECTORS,
+    diversify,
+    return_correlations,
+    sector_correlations,
+)
+from stock_screener import StockScreener
+
+
+def _candidates(*pairs):
+    return [{'symbol': symbol, 'score': score} for symbol, score in pairs]
+
+
+def _symbols(selection):
+    return [c['symbol'] for c in selection]
+
+
+def _cache_closes(returns_by_symbol):
+    index = pd.bdate_range(end=datetime.now().date(), periods=len(next(iter(returns_by_symbol.values()))) + 1)
+    for symbol, returns in returns_by_symbol.items():
+        close = 50 * np.cumprod(np.concatenate([[1.0], 1 + np.asarray(returns)]))
+        screener_cache.set_frame(symbol, 100, pd.DataFrame({'close': close, 'volume': 1e6}, index=index))
+
+
+class TestSectorCorrelations:
+    def test_industry_sector_and_unknown(self):
+        matrix = sector_correlations(['NVDA', 'AMD', 'MSFT', 'JPM', 'ZZZ', 'YYY'])
+        assert matrix[0, 1] == SAME_INDUSTRY_CORRELATION
+        assert matrix[0, 2] == SAME_SECTOR_CORRELATION
+        assert matrix[0, 3] == 0.0
+        assert matrix[4, 5] == 0.0
+        assert (np.diag(matrix) == 1.0).all()
+
+    def test_universe_is_fully_mapped(self):
+        universe = StockScreener().get_stock_universe()
+        assert [symbol for symbol in universe if symbol not in SECTORS] == []
+
+
+class TestDiversify:
+    def test_sector_cap_spreads_selection(self):
+        candidates = _candidates(('NVDA', 90), ('AMD', 89), ('MSFT', 88), ('CRM', 87), ('ORCL', 86),
+                                 ('JPM', 70), ('XOM', 69), ('KO', 68))
+        selected = _symbols(diversify(candidates, 5))
+        assert selected[0] == 'NVDA'
+        assert sum(SECTORS[s][0] == 'Technology' for s in selected) == 2
+        assert {'JPM', 'XOM', 'KO'} <= set(selected)
+
+    def test_cap_relaxed_when_nothing_else_is_left(self):
+        candidates = _candidates(('NVDA', 90), ('AMD', 89), ('MSFT', 88), ('CRM', 87), ('ORCL', 86), ('ADBE', 85))
+        selected = diversify(candidates, 4)
+        assert len(selected) == 4
+        assert len(set(_symbols(selected))) == 4
+
+    def test_measured_correlation_penalised(self):
+        candidates = _candidates(('AAA', 90), ('BBB', 85), ('CCC', 80))
+        correlations = np.array([[1.0, 0.95, 0.0], [0.95, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        assert _symbols(diversify(candidates, 2, correlations)) == ['AAA', 'CCC']
+        # Within the penalty, the higher score still wins
+        assert _symbols(diversify(_candidates(('AAA', 90), ('BBB', 85), ('CCC', 85 - CORRELATION_PENALTY)), 2,
+                                  correlations)) == ['AAA', 'BBB']
+
+    def test_measured_correlation_overrides_sector_map(self):
+        candidates = _candidates(('NVDA', 90), ('AMD', 85), ('JPM', 80), ('XOM', 65))
+        correlations = np.full((4, 4), np.nan)
+        correlations[0, 1] = correlations[1, 0] = 0.0  # same industry in the map
+        correlations[0, 2] = correlations[2, 0] = 0.9  # different sectors in the map
+        assert _symbols(diversify(candidates, 3, correlations)) == ['NVDA', 'AMD', 'XOM']
+
+    def test_negative_correlation_gives_no_bonus(self):
+        candidates = _candidates(('AAA', 90), ('BBB', 85), ('CCC', 84))
+        correlations = np.array([[1.0, 0.0, -0.9], [0.0, 1.0, 0.0], [-0.9, 0.0, 1.0]])
+        assert _symbols(diversify(candidates, 2, correlations)) == ['AAA', 'BBB']
+
+    def test_fewer_candidates_than_slots(self):
+        candidates = _candidates(('AAA', 90), ('BBB', 80))
+        assert diversify(candidates, 5) == candidates
+
+    def test_large_universe(self):
+        rng = np.random.default_rng(0)
+        candidates = [{'symbol': f'S{i}', 'score': float(s)} for i, s in enumerate(np.sort(rng.uniform(50, 100, 2000))[::-1])]
+        selected = diversify(candidates, 10, np.clip(rng.normal(0.3, 0.2, (2000, 2000)), -1, 1))
+        assert len(set(_symbols(selected))) == 10
+        assert selected[0] is candidates[0]
+
+
+class TestReturnCorrelations:
+    def test_from_cached_frames(self):
+        rng = np.random.default_rng(1)
+        base = rng.normal(0, 0.02, 80)
+        _cache_closes({'AAA': base, 'BBB': base * 1.5, 'CCC': rng.normal(0, 0.02, 80)})
+        matrix = return_correlations(['AAA', 'BBB', 'CCC', 'MISSING'])
+        assert matrix[0, 1] == pytest.approx(1.0)
+        assert abs(matrix[0, 2]) < 0.5
+        assert np.isnan(matrix[3]).all() and np.isnan(matrix[:, 3]).all()
+
+    def test_nothing_cached(self):
+        assert np.isnan(return_correlations(['AAA', 'BBB'])).all()
+
+    def test_diversify_selection_uses_cached_prices(self):
+        rng = np.random.default_rng(2)
+        base = rng.normal(0, 0.02, 80)
+        _cache_closes({'AAA': base, 'BBB': base + rng.normal(0, 0.001, 80), 'CCC': rng.normal(0, 0.02, 80)})
+        candidates = _candidates(('AAA', 90), ('BBB', 88), ('CCC', 80))
+        assert _symbols(StockScreener().diversify_selection(candidates, 2)) == ['AAA', 'CCC']
+
+    def test_only_top_candidates_are_correlated(self):
+        candidates = [{'symbol': f'S{i:03d}', 'score': float(i)} for i in range(500)]
+        with patch.object(stock_screener, 'return_correlations', wraps=return_correlations) as correlate:
+            selected = StockScreener().diversify_selection(candidates, 5)
+        symbols = correlate.call_args.args[0]
+        assert len(symbols) == CANDIDATE_POOL_FACTOR * 5
+        assert symbols[0] == 'S499'
+        assert _symbols(selected) == ['S499', 'S498', 'S497', 'S496', 'S495']
@@ -0,0 +1,87 @@
+"""Tests for daily equity curves and their month-end aggregation."""
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from equity_curve import month_end_balances, monthly_performance
+from MACD_trading import backtest_strategy_MACD, calculate_indicators, simulate_macd_trades
+from test_against_SP import generate_spy_monthly_performance
+
+START = datetime(2020, 1, 1)
+END = datetime(2022, 1, 1)
+
+
+def _fake_download(symbol, **_):
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2020-01-01', periods=500))
+
+
+class TestMonthEndBalances:
+    def test_takes_last_bar_of_each_month(self):
+        equity = pd.Series([1.0, 2.0, 3.0, 4.0],
+                           index=pd.to_datetime(['2023-01-03', '2023-01-31', '2023-02-01', '2023-02-27']))
+        assert month_end_balances(equity) == {'2023-01': 2.0, '2023-02': 4.0}
+
+    def test_empty_curve(self):
+        assert month_end_balances(pd.Series(dtype=float)) == {}
+
+
+class TestMonthlyPerformance:
+    def test_entry_carries_previous_month_end(self):
+        result = monthly_performance(datetime(2023, 1, 1), datetime(2023, 4, 1), 100.0, 130.0,
+                                     {'2023-01': 110.0, '2023-02': 120.0, '2023-03': 125.0})
+        assert [(e['date'], e['balance']) for e in result] == [
+            ('2023-01', 100.0), ('2023-02', 110.0), ('2023-03', 120.0), ('2023-04', 130.0)
+        ]
+
+
+@patch('market_data_provider.yf.download', side_effect=_fake_download)
+class TestBacktestEquity:
+    def test_marks_to_market_every_bar(self, _):
+        # Rebuild the curve with a per-bar loop over the trade history
+        data = calculate_indicators(_fake_download('AAA').rename(columns=str.lower), 12, 26, 9)
+        _, _, trades = simulate_macd_trades(data, 'AAA', 100_000, 0.15)
+        fills = {t['date']: t for t in trades if t['qty']}
+        cash, qty, curve = 100_000.0, 0, []
+        for day, price in data['close'].items():
+            trade = fills.get(day)
+            if trade and trade['action'] == 'buy':
+                cash, qty = cash - trade['qty'] * trade['price'], trade['qty']
+            elif trade:
+                cash, qty = cash + trade['qty'] * trade['price'], 0
+            curve.append(cash + qty * price)
+        expected = month_end_balances(pd.Series(curve, index=data.index))
+
+        _, _, month_end = backtest_strategy_MACD(['AAA'], START, END, return_monthly_data=True)
+        assert month_end.keys() == expected.keys()
+        np.testing.assert_allclose(list(month_end.values()), list(expected.values()))
+
+    def test_curve_ends_at_final_balance(self, _):
+        for symbols in (['AAA'], ['AAA', 'BBB', 'CCC']):
+            _, final_balance, month_end = backtest_strategy_MACD(symbols, START, END, return_monthly_data=True)
+            assert list(month_end.values())[-1] == final_balance
+
+    def test_default_return_is_unchanged(self, _):
+        assert len(backtest_strategy_MACD(['AAA'], START, END)) == 2
+
+
+class TestSpyMonthlyPerformance:
+    @patch('market_data_provider.yf.download')
+    def test_single_download_and_real_month_ends(self, mock_dl):
+        dates = pd.bdate_range('2023-01-02', '2023-03-31')
+        mock_dl.return_value = pd.DataFrame({'Close': np.linspace(400, 440, len(dates))}, index=dates)
+
+        result = generate_spy_monthly_performance(datetime(2023, 1, 1), datetime(2023, 4, 1), 100_000)
+
+        assert mock_dl.call_count == 1
+        jan_close = 400 + 40 * (len(pd.bdate_range('2023-01-02', '2023-01-31')) - 1) / (len(dates) - 1)
+        assert result[1]['balance'] == round(100_000 * jan_close / 400, 2)
+        assert result[-1]['balance'] == 100_000 * (440 / 400)
+
+    @patch('market_data_provider.yf.download')
+    def test_no_data_returns_empty_list(self, mock_dl):
+        mock_dl.return_value = pd.DataFrame(columns=['Close'])
+        assert generate_spy_monthly_performance(datetime(2023, 1, 7), datetime(2023, 1, 8)) == []
@@ -0,0 +1,134 @@
+"""Tests for the single-pass ingest_csv() engine in csv_analyzer."""
+import csv
+from unittest.mock import patch
+
+import pytest
+
+from csv_analyzer import (
+    CSVIngestError,
+    FREE_TIER_TRADE_LIMIT,
+    FreeTierLimitExceeded,
+    detect_format,
+    ingest_csv,
+    parse_detailed,
+    parse_summary,
+    sanitize_csv,
+)
+
+DETAILED_CSV = (
+    "date,symbol,action,price,shares\n"
+    "2024-01-15,AAPL,BUY,185.50,10\n"
+    "\n"
+    "2024-02-20,aapl,sell,195.20,10\n"
+)
+SUMMARY_CSV = (
+    "initial_capital,final_balance,num_trades,win_rate,start_date,end_date\n"
+    "10000,12000,42,0.6,2024-01-01,2024-12-31\n"
+)
+
+
+def _legacy_pipeline(csv_data):
+    """The multi-pass pipeline ingest_csv replaces."""
+    clean = sanitize_csv(csv_data)
+    fmt = detect_format(clean)
+    if fmt == "summary":
+        return fmt, parse_summary(clean)
+    return fmt, parse_detailed(clean)
+
+
+class TestIngestMatchesLegacyPipeline:
+    @pytest.mark.parametrize("csv_data", [
+        DETAILED_CSV,
+        DETAILED_CSV.replace(",", ";"),
+        "\ufeff" + DETAILED_CSV.replace("\n", "\r\n"),
+        " Date , Symbol , Action , Price , Shares , Notes \n2024-01-15,MSFT,BUY,370,5,\"entry, first\"\n",
+    ])
+    def test_detailed_trades_identical(self, csv_data):
+        fmt, trades = _legacy_pipeline(csv_data)
+        ingested = ingest_csv(csv_data)
+        assert ingested.format == fmt == "detailed"
+        assert ingested.trades == trades
+        assert ingested.summary is None
+
+    @pytest.mark.parametrize("csv_data", [SUMMARY_CSV, SUMMARY_CSV.replace(",", ";")])
+    def test_summary_identical(self, csv_data):
+        fmt, summary = _legacy_pipeline(csv_data)
+        ingested = ingest_csv(csv_data)
+        assert ingested.format == fmt == "summary"
+        assert ingested.summary == summary
+        assert ingested.trades == []
+
+    def test_row_numbers_in_errors_match_parse_detailed(self):
+        csv_data = DETAILED_CSV + "2024-03-01,AAPL,HOLD,190,10\n"
+        with pytest.raises(ValueError) as legacy:
+            _legacy_pipeline(csv_data)
+        with pytest.raises(ValueError) as ingested:
+            ingest_csv(csv_data)
+        assert str(ingested.value) == str(legacy.value)
+
+
+class TestIngestSinglePass:
+    def test_text_is_tokenised_once(self):
+        calls = []
+        real_reader = csv.reader
+
+        def _counting_reader(*args, **kwargs):
+            calls.append(kwargs.get("delimiter", ","))
+            return real_reader(*args, **kwargs)
+
+        with patch("csv_analyzer.csv.reader", side_effect=_counting_reader):
+            ingest_csv(DETAILED_CSV.replace(",", ";"))
+        assert calls == [";"]
+
+
+class TestIngestErrors:
+    def test_binary_content_rejected(self):
+        with pytest.raises(CSVIngestError, match="binary file") as exc:
+            ingest_csv("\x7fELF\x02\x01\x01")
+        assert exc.value.format is None
+
+    def test_formula_cell_rejected(self):
+        with pytest.raises(CSVIngestError, match="cannot be processed safely"):
+            ingest_csv(DETAILED_CSV + "2024-03-01,=CMD|calc,BUY,1,1\n")
+
+    def test_formula_cell_in_semicolon_file_rejected(self):
+        with pytest.raises(CSVIngestError, match="cannot be processed safely"):
+            ingest_csv("date;symbol;action;price;shares\n2024-01-15;@SUM(1);BUY;1;1\n")
+
+    def test_unsafe_cell_outranks_earlier_row_error(self):
+        csv_data = (
+            "date,symbol,action,price,shares\n"
+            "not-a-date,AAPL,BUY,1,1\n"
+            "2024-01-15,AAPL,BUY,1,+cmd\n"
+        )
+        with pytest.raises(CSVIngestError, match="cannot be processed safely"):
+            ingest_csv(csv_data)
+
+    def test_detailed_row_error_is_plain_value_error(self):
+        with pytest.raises(ValueError, match="Row 2: invalid date") as exc:
+            ingest_csv("date,symbol,action,price,shares\nnot-a-date,AAPL,BUY,1,1\n")
+        assert not isinstance(exc.value, CSVIngestError)
+
+    def test_unknown_header_has_no_format(self):
+        with pytest.raises(CSVIngestError, match="missing these columns") as exc:
+            ingest_csv("foo,bar,baz\n1,2,3\n")
+        assert exc.value.format is None
+
+    def test_empty_upload_rejected(self):
+        with pytest.raises(CSVIngestError, match="empty or has no header row"):
+            ingest_csv("")
+
+    def test_invalid_summary_tagged_as_summary(self):
+        with pytest.raises(CSVIngestError, match="win_rate") as exc:
+            ingest_csv(SUMMARY_CSV.replace("0.6", "1.5"))
+        assert exc.value.format == "summary"
+
+    def test_free_tier_limit_enforced(self):
+        rows = "".join("2024-01-15,AAPL,BUY,1,1\n" for _ in range(FREE_TIER_TRADE_LIMIT + 1))
+        with pytest.raises(FreeTierLimitExceeded):
+            ingest_csv("date,symbol,action,price,shares\n" + rows)
+
+    def test_free_tier_limit_can_be_disabled(self):
+        rows = "".join("2024-01-15,AAPL,BUY,1,1\n" for _ in range(FREE_TIER_TRADE_LIMIT + 1))
+        ingested = ingest_csv("date,symbol,action,price,shares\n" + rows, is_free_tier=False)
+        assert len(ingested.trades) == FREE_TIER_TRADE_LIMIT + 1
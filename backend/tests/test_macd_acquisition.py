@@ -0,0 +1,96 @@
+"""Tests for the Expected Improvement acquisition in optimize_MACD."""
+import math
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import Matern
+
+from optimize_MACD import (
+    ACQUISITION_CANDIDATES,
+    expected_improvement,
+    parameter_bounds,
+    propose_next_sample,
+    propose_next_samples,
+)
+
+
+def _normal_cdf(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def _normal_pdf(x):
+    return math.exp(-x * x / 2) / math.sqrt(2 * math.pi)
+
+
+@pytest.fixture
+def fitted_gp():
+    rng = np.random.default_rng(0)
+    X = rng.uniform([8, 20, 5], [15, 30, 10], size=(12, 3))
+    y = -(100_000 + 1_000 * np.sin(X).sum(axis=1))
+    gp = GaussianProcessRegressor(kernel=Matern(nu=2.5), alpha=1e-5, normalize_y=True, random_state=42)
+    return gp.fit(X, y), y.min()
+
+
+class TestExpectedImprovement:
+    def test_matches_closed_form(self):
+        mean, std, best = np.array([-10.0, -12.0]), np.array([2.0, 0.5]), -11.0
+        ei = expected_improvement(mean, std, best, xi=0.0)
+        for m, s, value in zip(mean, std, ei):
+            z = (best - m) / s
+            assert value == pytest.approx((best - m) * _normal_cdf(z) + s * _normal_pdf(z))
+
+    def test_zero_std_is_plain_improvement(self):
+        ei = expected_improvement(np.array([-12.0, -10.0]), np.array([0.0, 0.0]), -11.0, xi=0.0)
+        np.testing.assert_allclose(ei, [1.0, 0.0])
+
+    def test_rewards_lower_mean_and_higher_uncertainty(self):
+        # The old acquisition collapsed to the constant -best_y; EI must not
+        ei = expected_improvement(np.array([-11.0, -9.0, -9.0]), np.array([1.0, 1.0, 3.0]), -10.0)
+        assert ei[0] > ei[1]
+        assert ei[2] > ei[1]
+
+
+class TestProposeNextSample:
+    def test_within_bounds(self, fitted_gp):
+        gp, best_y = fitted_gp
+        sample = propose_next_sample(gp, best_y, np.random.default_rng(1))
+        for value, (low, high) in zip(sample, parameter_bounds.values()):
+            assert low <= value <= high
+
+    def test_deterministic_for_seed(self, fitted_gp):
+        gp, best_y = fitted_gp
+        first = propose_next_sample(gp, best_y, np.random.default_rng(7))
+        second = propose_next_sample(gp, best_y, np.random.default_rng(7))
+        np.testing.assert_array_equal(first, second)
+
+    def test_candidates_scored_in_one_batch(self, fitted_gp):
+        gp, best_y = fitted_gp
+        with patch.object(GaussianProcessRegressor, 'predict', autospec=True,
+                          side_effect=GaussianProcessRegressor.predict) as mock_predict:
+            propose_next_sample(gp, best_y, np.random.default_rng(1))
+        batch_sizes = [len(call.args[1]) for call in mock_predict.call_args_list]
+        assert batch_sizes[0] == ACQUISITION_CANDIDATES
+        assert all(size == 1 for size in batch_sizes[1:])
+        assert len(batch_sizes) < 400  # the 100-restart search made ~400 per iteration
+
+    def test_beats_best_random_candidate(self, fitted_gp):
+        gp, best_y = fitted_gp
+        rng = np.random.default_rng(3)
+        sample = propose_next_sample(gp, best_y, np.random.default_rng(3))
+        candidates = rng.uniform([8, 20, 5], [15, 30, 10], size=(ACQUISITION_CANDIDATES, 3))
+        mean, std = gp.predict(np.vstack([candidates, sample]), return_std=True)
+        ei = expected_improvement(mean, std, best_y)
+        assert ei[-1] >= ei[:-1].max()
+
+    def test_batch_has_distinct_integer_parameters(self, fitted_gp):
+        gp, best_y = fitted_gp
+        samples = propose_next_samples(gp, best_y, np.random.default_rng(1), batch_size=4)
+        keys = {tuple(int(v) for v in s) for s in samples}
+        assert len(samples) == 4 and len(keys) == 4
+
+    def test_single_batch_matches_single_proposal(self, fitted_gp):
+        gp, best_y = fitted_gp
+        batch = propose_next_samples(gp, best_y, np.random.default_rng(5), batch_size=3)
+        np.testing.assert_array_equal(batch[0], propose_next_sample(gp, best_y, np.random.default_rng(5)))
@@ -0,0 +1,78 @@
+"""Tests for the MACD parameter-grid backtester and the exhaustive optimizer mode."""
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from MACD_trading import backtest_macd_grid, backtest_strategy_MACD, load_price_panel
+from optimize_MACD import optimize_macd_parameters, parameter_grid
+
+START = datetime(2020, 1, 1)
+END = datetime(2022, 12, 31)
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+MOCK_YF = 'market_data_provider.yf.download'
+
+
+def _fake_download(symbol, **_):
+    if not isinstance(symbol, str):
+        # Grouped multi-ticker download: (ticker, field) columns
+        return pd.concat({s: _fake_download(s) for s in symbol}, axis=1)
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, 600)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2020-01-01', periods=600))
+
+
+@pytest.fixture
+def panel():
+    with patch(MOCK_YF, side_effect=_fake_download):
+        return load_price_panel(SYMBOLS, START, END)
+
+
+class TestBacktestMacdGrid:
+    def test_every_combination_matches_single_backtest(self, panel):
+        balances = backtest_macd_grid(
+            SYMBOLS, START, END, [8, 12], [21, 26, 30], [5, 9],
+            trailing_stop_loss=0.1, price_data=panel
+        )
+        assert len(balances) == 12
+        for (fast, slow, signal), balance in balances.items():
+            _, expected = backtest_strategy_MACD(
+                SYMBOLS, START, END, trailing_stop_loss=0.1,
+                fastperiod=fast, slowperiod=slow, signalperiod=signal, price_data=panel
+            )
+            assert balance == expected
+
+    def test_does_not_modify_panel(self, panel):
+        backtest_macd_grid(SYMBOLS, START, END, [12], [26], [9], price_data=panel)
+        assert list(panel['AAA'].columns) == ['close']
+
+    def test_missing_price_data_raises(self):
+        with pytest.raises(ValueError, match="not the name of a real stock"):
+            backtest_macd_grid(['BAD'], START, END, [12], [26], [9], price_data={'BAD': pd.DataFrame()})
+
+
+class TestExhaustiveOptimizer:
+    def test_finds_grid_maximum(self, panel):
+        result = optimize_macd_parameters(SYMBOLS, START, END, price_data=panel, mode='exhaustive')
+
+        grid = parameter_grid()
+        balances = backtest_macd_grid(
+            SYMBOLS, START, END, grid['fastperiod'], grid['slowperiod'], grid['signalperiod'],
+            trailing_stop_loss=0.1, price_data=panel
+        )
+        assert len(balances) == 8 * 11 * 6
+        assert result['best_balance'] == max(balances.values())
+        params = result['optimized_params']
+        assert balances[(params['fastperiod'], params['slowperiod'], params['signalperiod'])] == result['best_balance']
+
+    def test_at_least_as_good_as_bayesian(self, panel):
+        exhaustive = optimize_macd_parameters(SYMBOLS, START, END, price_data=panel, mode='exhaustive')
+        bayesian = optimize_macd_parameters(SYMBOLS, START, END, n_iterations=3, price_data=panel)
+        assert exhaustive['best_balance'] >= bayesian['best_balance']
+
+    def test_unknown_mode_rejected(self, panel):
+        with pytest.raises(ValueError, match="mode must be one of"):
+            optimize_macd_parameters(SYMBOLS, START, END, price_data=panel, mode='random')
+
@@ -3,6 +3,9 @@ import re
 from datetime import datetime
 from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
+
 from MACD_trading import generate_monthly_performance
 
 INITIAL_BALANCE = 100_000
@@ -15,7 +18,17 @@ SYMBOLS = ['AAPL']
 MOCK_PATCH = 'MACD_trading.backtest_strategy_MACD'
 
 
-@patch(MOCK_PATCH, return_value=('result', FINAL_BALANCE))
+def _month_ends(first: str, last: str, start: float, end: float) -> dict:
+    """Evenly spaced month-end balances, as the backtest's equity curve reports them."""
+    periods = pd.period_range(first, last, freq='M')
+    values = np.linspace(start, end, len(periods))
+    return {str(p): float(v) for p, v in zip(periods, values)}
+
+
+MONTH_ENDS = _month_ends('2023-01', '2023-12', 101_000, FINAL_BALANCE)
+
+
+@patch(MOCK_PATCH, return_value=('result', FINAL_BALANCE, MONTH_ENDS))
 class TestMonthlyPerformanceStructure:
     """Confirm the shape of monthly_performance matches what the frontend chart expects."""
 
@@ -94,7 +107,7 @@ class TestMonthlyPerformanceStructure:
         assert result[-1]['balance'] == FINAL_BALANCE
 
 
-@patch(MOCK_PATCH, return_value=('result', FINAL_BALANCE))
+@patch(MOCK_PATCH, return_value=('result', FINAL_BALANCE, MONTH_ENDS))
 class TestMonthlyPerformanceEdgeCases:
 
     def test_sub_one_month_range_clamps_to_one_month(self, _):
@@ -106,9 +119,21 @@ class TestMonthlyPerformanceEdgeCases:
         assert result[0]['month'] == 'Start'
         assert result[1]['month'] == 'Month 1'
 
+    def test_months_without_bars_carry_balance_forward(self, mock_backtest):
+        # Equity only known through March; later months repeat the last month-end
+        mock_backtest.return_value = ('result', FINAL_BALANCE, {'2023-01': 101_000.0, '2023-03': 104_000.0})
+        result = generate_monthly_performance(SYMBOLS, START, END, INITIAL_BALANCE)
+        balances = [entry['balance'] for entry in result]
+        assert balances[:5] == [INITIAL_BALANCE, 101_000.0, 101_000.0, 104_000.0, 104_000.0]
+        assert balances[-1] == FINAL_BALANCE
+
+    def test_requests_month_end_equity_from_backtest(self, mock_backtest):
+        generate_monthly_performance(SYMBOLS, START, END, INITIAL_BALANCE)
+        assert mock_backtest.call_args.kwargs['return_monthly_data'] is True
+
     def test_negative_return_handled_gracefully(self, mock_backtest):
         # Strategy can lose money; structure must still be valid
-        mock_backtest.return_value = ('result', 85_000)
+        mock_backtest.return_value = ('result', 85_000, _month_ends('2023-01', '2023-12', 99_000, 85_000))
         result = generate_monthly_performance(SYMBOLS, START, END, INITIAL_BALANCE)
         assert len(result) == EXPECTED_MONTHS + 1
         assert result[-1]['balance'] == 85_000
@@ -0,0 +1,92 @@
+"""Tests for the vectorised MACD trade simulation in MACD_trading."""
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from MACD_trading import (
+    backtest_strategy_MACD,
+    calculate_indicators,
+    simulate_macd_trades,
+)
+
+
+def _reference_simulation(data, symbol, balance, trailing_stop_loss):
+    """The original per-bar loop, kept as the oracle for the vectorised engine."""
+    position = 0
+    trade_history = []
+    highest_price = None
+    for index in range(1, len(data)):
+        macd_line = data['MACD'].iloc[index]
+        signal_line = data['Signal'].iloc[index]
+        price = data['close'].iloc[index]
+
+        if macd_line > signal_line and data['Hist'].iloc[index] > 0 and position == 0:
+            qty = int(balance / price)
+            balance -= qty * price
+            position = qty
+            highest_price = price
+            trade_history.append({'symbol': symbol, 'action': 'buy', 'price': price,
+                                  'qty': qty, 'date': data.index[index]})
+
+        if position > 0 and (macd_line < signal_line or price <= highest_price * (1 - trailing_stop_loss)):
+            balance += position * price
+            trade_history.append({'symbol': symbol, 'action': 'sell', 'price': price,
+                                  'qty': qty, 'date': data.index[index]})
+            position = 0
+            highest_price = None
+    return balance, position, trade_history
+
+
+def _random_walk(seed, n=750, start=50.0):
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({'close': close}, index=pd.bdate_range('2020-01-01', periods=n))
+
+
+class TestMatchesPerBarLoop:
+    @pytest.mark.parametrize('seed', range(8))
+    @pytest.mark.parametrize('stop', [0.05, 0.1, 0.15])
+    def test_same_trades_and_balance(self, seed, stop):
+        data = calculate_indicators(_random_walk(seed), 12, 26, 9)
+        expected = _reference_simulation(data, 'XYZ', 20_000.0, stop)
+        assert simulate_macd_trades(data, 'XYZ', 20_000.0, stop) == expected
+
+    def test_unaffordable_buys_match(self):
+        # Price above the cash balance: every buy signal records a zero-qty buy
+        data = calculate_indicators(_random_walk(3, start=5_000.0), 8, 21, 5)
+        expected = _reference_simulation(data, 'XYZ', 1_000.0, 0.1)
+        assert expected[2] and all(t['qty'] == 0 for t in expected[2])
+        assert simulate_macd_trades(data, 'XYZ', 1_000.0, 0.1) == expected
+
+    def test_zero_stop_sells_on_entry_bar(self):
+        data = calculate_indicators(_random_walk(5), 12, 26, 9)
+        expected = _reference_simulation(data, 'XYZ', 10_000.0, 0.0)
+        assert simulate_macd_trades(data, 'XYZ', 10_000.0, 0.0) == expected
+
+    @pytest.mark.parametrize('n', [0, 1, 2])
+    def test_tiny_frames(self, n):
+        data = calculate_indicators(_random_walk(0, n=n), 12, 26, 9)
+        assert simulate_macd_trades(data, 'XYZ', 10_000.0, 0.1) == (10_000.0, 0, [])
+
+
+class TestBacktestStrategy:
+    @patch('market_data_provider.yf.download')
+    def test_final_balance_matches_reference(self, mock_dl):
+        frames = {'AAA': _random_walk(1), 'BBB': _random_walk(2)}
+        mock_dl.side_effect = lambda symbol, **_: frames[symbol].rename(columns=str.title)
+
+        _, final_balance = backtest_strategy_MACD(
+            ['AAA', 'BBB'], datetime(2020, 1, 1), datetime(2023, 1, 1), trailing_stop_loss=0.1
+        )
+
+        # Later symbols are allocated a share of the running portfolio balance
+        expected = 100_000.0
+        for symbol in ['AAA', 'BBB']:
+            data = calculate_indicators(frames[symbol].copy(), 12, 26, 9)
+            balance, position, _ = _reference_simulation(data, symbol, expected / 2, 0.1)
+            balance += position * data['close'].iloc[-1]
+            expected += balance - 50_000.0
+        assert final_balance == expected
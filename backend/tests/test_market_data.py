@@ -0,0 +1,98 @@
+"""Tests for batched, cached market-data downloads used by the MACD backtests."""
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import load_bars, load_symbol
+from market_data_provider import MARKET_DATA_DIR_ENV
+from MACD_trading import backtest_strategy_MACD, load_price_panel
+from test_against_SP import download_spy_data
+
+START = datetime(2020, 1, 1)
+END = datetime(2021, 6, 30)
+MOCK_YF = 'market_data_provider.yf.download'
+
+
+def _bars(seed, periods=300):
+    rng = np.random.default_rng(seed)
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, periods)))
+    return pd.DataFrame({'Open': close, 'Close': close}, index=pd.bdate_range('2020-01-01', periods=periods))
+
+
+def _grouped(tickers, **_):
+    if isinstance(tickers, str):
+        return _bars(len(tickers))
+    return pd.concat({t: _bars(i) for i, t in enumerate(tickers)}, axis=1)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for seed, symbol in enumerate(['AAA', 'BBB', 'SPY']):
+        _bars(seed).rename_axis('Date').to_csv(tmp_path / f'{symbol}.csv')
+    return tmp_path
+
+
+@patch(MOCK_YF, side_effect=_grouped)
+class TestLoadBars:
+    def test_one_grouped_download_including_benchmarks(self, mock_dl):
+        bars = load_bars(['AAA', 'BBB'], START, END)
+        assert list(bars) == ['AAA', 'BBB', 'SPY']
+        mock_dl.assert_called_once()
+        assert mock_dl.call_args.args[0] == ['AAA', 'BBB', 'SPY']
+        assert mock_dl.call_args.kwargs['group_by'] == 'ticker'
+
+    def test_cached_symbols_are_not_fetched_again(self, mock_dl):
+        load_bars(['AAA'], START, END)
+        load_bars(['AAA', 'BBB'], START, END)
+        assert mock_dl.call_args.args[0] == 'BBB'
+        assert mock_dl.call_count == 2
+
+    def test_cache_is_keyed_by_date_range(self, mock_dl):
+        load_symbol('AAA', START, END)
+        load_symbol('AAA', START, datetime(2021, 7, 1))
+        assert mock_dl.call_count == 2
+
+    def test_callers_get_copies(self, mock_dl):
+        frame = load_symbol('AAA', START, END)
+        frame['close'] = 0.0
+        assert (load_symbol('AAA', START, END)['close'] != 0.0).all()
+
+    def test_empty_frames_are_not_cached(self, mock_dl):
+        mock_dl.side_effect = lambda tickers, **_: pd.DataFrame()
+        assert load_symbol('ZZZ', START, END).empty
+        assert load_symbol('ZZZ', START, END).empty
+        assert mock_dl.call_count == 2
+
+    def test_spy_reuses_backtest_batch(self, mock_dl):
+        panel = load_price_panel(['AAA', 'BBB'], START, END)
+        backtest_strategy_MACD(['AAA', 'BBB'], START, END, price_data=panel)
+        spy = download_spy_data(START, END)
+        assert mock_dl.call_count == 1
+        assert list(panel) == ['AAA', 'BBB']
+        assert not spy.empty
+
+    def test_grouped_failure_falls_back_per_symbol(self, mock_dl):
+        def fail_grouped(tickers, **kw):
+            if not isinstance(tickers, str):
+                raise OSError('boom')
+            return _grouped(tickers)
+
+        mock_dl.side_effect = fail_grouped
+        panel = load_price_panel(['AAA', 'BBB'], START, END)
+        assert list(panel) == ['AAA', 'BBB']
+        assert mock_dl.call_count == 3
+
+
+class TestFileBackedBacktests:
+    @patch(MOCK_YF)
+    def test_backtests_run_offline(self, mock_dl, monkeypatch, data_dir):
+        monkeypatch.setenv(MARKET_DATA_DIR_ENV, str(data_dir))
+        summary, balance = backtest_strategy_MACD(['AAA', 'BBB'], START, END)
+        message = backtest_strategy_MACD(['ZZZ'], START, END)
+        assert balance > 0 and 'AAA' in summary
+        assert message == 'ZZZ is not the name of a real stock'
+        assert not download_spy_data(START, END).empty
+        mock_dl.assert_not_called()
@@ -0,0 +1,182 @@
+"""Tests for market_data_provider: the yfinance, file-backed and in-memory providers."""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data_provider
+from benchmark import fetch_benchmark
+from market_data_provider import (
+    MARKET_DATA_DIR_ENV,
+    FileProvider,
+    InMemoryProvider,
+    YFinanceProvider,
+    get_provider,
+    set_provider,
+    split_grouped,
+)
+from stock_screener import StockScreener
+
+_MOCK_YF = "market_data_provider.yf.download"
+
+
+def _bars(seed: int, periods: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, periods)))
+    return pd.DataFrame(
+        {"Open": close, "Close": close, "Volume": np.full(periods, 1_000_000)},
+        index=pd.bdate_range("2020-01-01", periods=periods),
+    )
+
+
+def _grouped(tickers, **_):
+    if isinstance(tickers, str):
+        return _bars(0)
+    return pd.concat({t: _bars(i) for i, t in enumerate(tickers)}, axis=1)
+
+
+@pytest.fixture
+def provider():
+    """Install an in-memory provider for the test and restore the default after."""
+    installed = InMemoryProvider({"AAA": _bars(0), "SPY": _bars(1)})
+    set_provider(installed)
+    yield installed
+    set_provider(None)
+
+
+class TestSplitGrouped:
+    def test_ticker_first_columns(self):
+        frames = split_grouped(_grouped(["AAA", "BBB"]), ["AAA", "BBB"])
+        assert list(frames) == ["AAA", "BBB"]
+        assert list(frames["AAA"].columns) == ["open", "close", "volume"]
+        pd.testing.assert_series_equal(frames["BBB"]["close"], _bars(1)["Close"], check_names=False)
+
+    def test_field_first_columns(self):
+        frames = split_grouped(_grouped(["AAA", "BBB"]).swaplevel(axis=1), ["AAA", "BBB"])
+        pd.testing.assert_series_equal(frames["AAA"]["close"], _bars(0)["Close"], check_names=False)
+
+    def test_padding_rows_dropped_and_missing_ticker_empty(self):
+        data = pd.concat({"AAA": _bars(0, 300), "BBB": _bars(1, 250)}, axis=1)
+        frames = split_grouped(data, ["AAA", "BBB", "ZZZ"])
+        assert len(frames["BBB"]) == 250
+        assert frames["ZZZ"].empty
+
+    def test_flat_single_ticker(self):
+        assert list(split_grouped(_bars(0), ["AAA"])["AAA"].columns) == ["open", "close", "volume"]
+
+    def test_flat_columns_for_several_tickers_rejected(self):
+        with pytest.raises(ValueError):
+            split_grouped(_bars(0), ["AAA", "BBB"])
+
+
+class TestYFinanceProvider:
+    @patch(_MOCK_YF, side_effect=_grouped)
+    def test_one_grouped_call(self, mock_dl):
+        frames = YFinanceProvider().download(["AAA", "BBB"], datetime(2020, 1, 1), datetime(2021, 1, 1))
+        mock_dl.assert_called_once()
+        assert mock_dl.call_args.args[0] == ["AAA", "BBB"]
+        assert mock_dl.call_args.kwargs["auto_adjust"] is True
+        assert list(frames) == ["AAA", "BBB"]
+
+    @patch(_MOCK_YF, side_effect=_grouped)
+    def test_single_ticker_passed_as_string(self, mock_dl):
+        YFinanceProvider().download(["SPY"], datetime(2020, 1, 1), datetime(2021, 1, 1))
+        assert mock_dl.call_args.args[0] == "SPY"
+
+
+class TestFileProvider:
+    def test_csv_end_date_is_exclusive(self, tmp_path):
+        _bars(0).rename_axis("Date").to_csv(tmp_path / "AAA.csv")
+        frames = FileProvider(tmp_path).download(["AAA"], datetime(2020, 2, 3), datetime(2020, 2, 10))
+        assert list(frames["AAA"].index.strftime("%Y-%m-%d")) == [
+            "2020-02-03", "2020-02-04", "2020-02-05", "2020-02-06", "2020-02-07"
+        ]
+        assert list(frames["AAA"].columns) == ["open", "close", "volume"]
+
+    def test_parquet_preferred_over_csv(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        _bars(0).to_parquet(tmp_path / "AAA.parquet")
+        _bars(1).rename_axis("Date").to_csv(tmp_path / "AAA.csv")
+        frame = FileProvider(tmp_path).download(["AAA"], "2020-01-01", "2030-01-01")["AAA"]
+        pd.testing.assert_series_equal(frame["close"], _bars(0)["Close"], check_names=False, check_freq=False)
+
+    def test_missing_file_is_empty(self, tmp_path):
+        assert FileProvider(tmp_path).download(["ZZZ"], "2020-01-01", "2021-01-01")["ZZZ"].empty
+
+    def test_symbols_cannot_leave_directory(self, tmp_path):
+        _bars(0).rename_axis("Date").to_csv(tmp_path / "secret.csv")
+        data_dir = tmp_path / "bars"
+        data_dir.mkdir()
+        symbols = ["../secret", str(tmp_path / "secret"), "bars/../../secret", ".."]
+        frames = FileProvider(data_dir).download(symbols, "2020-01-01", "2030-01-01")
+        assert all(frames[symbol].empty for symbol in symbols)
+
+    def test_index_and_share_class_symbols_are_read(self, tmp_path):
+        for symbol in ("^GSPC", "BRK.B", "EURUSD=X"):
+            _bars(0).rename_axis("Date").to_csv(tmp_path / f"{symbol}.csv")
+        frames = FileProvider(tmp_path).download(["^GSPC", "BRK.B", "EURUSD=X"], "2020-01-01", "2030-01-01")
+        assert not any(frame.empty for frame in frames.values())
+
+
+class TestInMemoryProvider:
+    def test_slices_and_normalises_copies(self):
+        source = _bars(0)
+        frame = InMemoryProvider({"AAA": source}).download(["AAA"], "2020-01-06", "2020-01-08")["AAA"]
+        assert list(frame.index.strftime("%Y-%m-%d")) == ["2020-01-06", "2020-01-07"]
+        frame["close"] = 0.0
+        assert list(source.columns) == ["Open", "Close", "Volume"]
+        assert (source["Close"] != 0.0).all()
+
+    def test_unknown_symbol_is_empty(self):
+        assert InMemoryProvider({}).download(["ZZZ"], "2020-01-01", "2021-01-01")["ZZZ"].empty
+
+
+class TestGetProvider:
+    def test_defaults_to_yfinance(self, monkeypatch):
+        monkeypatch.delenv(MARKET_DATA_DIR_ENV, raising=False)
+        assert isinstance(get_provider(), YFinanceProvider)
+
+    def test_env_var_selects_file_provider(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(MARKET_DATA_DIR_ENV, str(tmp_path))
+        assert isinstance(get_provider(), FileProvider)
+        assert get_provider() is get_provider()
+        assert get_provider().directory == str(tmp_path)
+
+    def test_override_wins_over_env(self, monkeypatch, tmp_path, provider):
+        monkeypatch.setenv(MARKET_DATA_DIR_ENV, str(tmp_path))
+        assert get_provider() is provider
+        set_provider(None)
+        assert isinstance(get_provider(), FileProvider)
+
+
+class TestCallersUseProvider:
+    @patch(_MOCK_YF)
+    def test_benchmark(self, mock_dl, provider):
+        result = fetch_benchmark([{"date": "2020-01-01"}, {"date": "2020-06-30"}], "SPY")
+        window = _bars(1)["Close"]["2020-01-01":"2020-06-30"]
+        assert result["start_price"] == round(float(window.iloc[0]), 4)
+        assert result["end_price"] == round(float(window.iloc[-1]), 4)
+        mock_dl.assert_not_called()
+
+    @patch(_MOCK_YF)
+    def test_stock_screener(self, mock_dl, provider):
+        recent = _bars(0, 100)
+        recent.index = pd.bdate_range(end=datetime.now(), periods=100)
+        provider.frames["AAA"] = recent
+        data = StockScreener().get_stock_data("AAA", days=100)
+        assert list(data.columns) == ["open", "close", "volume"]
+        assert len(data) > 30
+        mock_dl.assert_not_called()
+
+    def test_no_module_calls_yfinance_directly(self):
+        import benchmark
+        import MACD_trading
+        import stock_screener
+        import test_against_SP
+
+        for module in (benchmark, MACD_trading, stock_screener, test_against_SP):
+            assert not hasattr(module, "yf"), module.__name__
+        assert hasattr(market_data_provider, "yf")
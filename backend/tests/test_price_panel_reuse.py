@@ -0,0 +1,66 @@
+"""Tests that MACD backtests and the optimizer reuse a preloaded price panel."""
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from MACD_trading import backtest_strategy_MACD, load_price_panel
+from optimize_MACD import optimize_macd_parameters
+
+START = datetime(2020, 1, 1)
+END = datetime(2022, 12, 31)
+SYMBOLS = ['AAA', 'BBB']
+MOCK_YF = 'market_data_provider.yf.download'
+
+
+def _fake_download(symbol, **_):
+    if not isinstance(symbol, str):
+        # Grouped multi-ticker download: (ticker, field) columns
+        return pd.concat({s: _fake_download(s) for s in symbol}, axis=1)
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, 600)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2020-01-01', periods=600))
+
+
+@patch(MOCK_YF, side_effect=_fake_download)
+class TestPricePanel:
+    def test_panel_is_one_grouped_download(self, mock_dl):
+        panel = load_price_panel(SYMBOLS, START, END)
+        assert list(panel) == SYMBOLS
+        assert mock_dl.call_count == 1
+        assert mock_dl.call_args.args[0] == SYMBOLS + ['SPY']
+        assert list(panel['AAA'].columns) == ['close']
+
+    def test_failed_download_is_left_out(self, mock_dl):
+        def only_aaa(symbol, **kw):
+            if symbol != 'AAA':
+                raise OSError('boom')
+            return _fake_download(symbol)
+
+        mock_dl.side_effect = only_aaa
+        assert list(load_price_panel(SYMBOLS, START, END)) == ['AAA']
+
+    def test_backtest_with_panel_skips_download_and_matches(self, mock_dl):
+        panel = load_price_panel(SYMBOLS, START, END)
+        mock_dl.reset_mock()
+
+        with_panel = backtest_strategy_MACD(SYMBOLS, START, END, price_data=panel)
+        assert mock_dl.call_count == 0
+        assert with_panel == backtest_strategy_MACD(SYMBOLS, START, END, use_cache=False)
+
+    def test_backtest_does_not_modify_panel(self, mock_dl):
+        panel = load_price_panel(SYMBOLS, START, END)
+        backtest_strategy_MACD(SYMBOLS, START, END, price_data=panel)
+        assert list(panel['AAA'].columns) == ['close']
+
+    def test_optimizer_downloads_once(self, mock_dl):
+        result = optimize_macd_parameters(SYMBOLS, START, END, n_iterations=2)
+        assert mock_dl.call_count == 1
+        assert result['best_balance'] > 0
+
+    def test_optimizer_uses_supplied_panel(self, mock_dl):
+        panel = load_price_panel(SYMBOLS, START, END)
+        mock_dl.reset_mock()
+        optimize_macd_parameters(SYMBOLS, START, END, n_iterations=1, price_data=panel)
+        assert mock_dl.call_count == 0
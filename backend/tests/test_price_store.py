@@ -0,0 +1,175 @@
+"""Tests for the persistent benchmark price store and its use by fetch_benchmark."""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark as benchmark_module
+import price_store
+from benchmark import fetch_benchmark
+from price_store import PRICE_CACHE_DIR_ENV, PriceStore, get_price_store
+
+_MOCK_YF = "market_data_provider.yf.download"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    benchmark_module._cache.clear()
+    price_store._store = None
+    yield
+    benchmark_module._cache.clear()
+    price_store._store = None
+
+
+def _closes(first, last, freq: str = "B", factor: float = 1.0) -> pd.Series:
+    """Closes that depend only on the day, so overlapping fetches agree."""
+    days = pd.date_range(first, last, freq=freq)
+    return pd.Series([(d.toordinal() - 738000) * factor for d in days], index=days, dtype=float)
+
+
+class _FakeFetcher:
+    """Records requested ranges and serves business-day closes for them."""
+
+    def __init__(self, freq: str = "B"):
+        self.calls = []
+        self.freq = freq
+        self.factor = 1.0
+        self.empty = False
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((ticker, start.date(), end.date()))
+        if self.empty:
+            return pd.Series(dtype=float)
+        return _closes(start, end, self.freq, self.factor)
+
+
+class TestMissingRanges:
+    def test_empty_store_misses_whole_range(self, tmp_path):
+        store = PriceStore(tmp_path)
+        assert store.missing_ranges("SPY", date(2023, 1, 1), date(2023, 1, 31)) == [
+            (date(2023, 1, 1), date(2023, 1, 31))
+        ]
+
+    def test_only_gaps_are_fetched(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        store.get_closes("SPY", date(2023, 2, 1), date(2023, 2, 28), fetch)
+        store.get_closes("SPY", date(2023, 1, 15), date(2023, 3, 15), fetch)
+        # Each gap also re-reads the adjacent stored bar to detect re-adjusted closes
+        assert fetch.calls == [
+            ("SPY", date(2023, 2, 1), date(2023, 2, 28)),
+            ("SPY", date(2023, 1, 15), date(2023, 2, 1)),
+            ("SPY", date(2023, 2, 28), date(2023, 3, 15)),
+        ]
+
+    def test_sub_range_served_from_disk(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        full = store.get_closes("SPY", date(2023, 1, 1), date(2023, 6, 30), fetch)
+        part = store.get_closes("SPY", date(2023, 2, 4), date(2023, 2, 12), fetch)
+        assert len(fetch.calls) == 1
+        pd.testing.assert_series_equal(part, full.loc["2023-02-04":"2023-02-12"])
+
+    def test_tickers_are_independent(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        store.get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch)
+        store.get_closes("QQQ", date(2023, 1, 1), date(2023, 1, 31), fetch)
+        assert [c[0] for c in fetch.calls] == ["SPY", "QQQ"]
+
+    def test_recent_days_are_not_marked_covered(self, tmp_path):
+        store = PriceStore(tmp_path)
+        today = date.today()
+        store.get_closes("SPY", today - timedelta(days=10), today, _FakeFetcher(freq="D"))
+        assert store.missing_ranges("SPY", today - timedelta(days=10), today) == [(today, today)]
+
+    def test_coverage_stops_at_last_returned_bar(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        store.get_closes("SPY", date(2023, 3, 1), date(2023, 3, 31), lambda *a: fetch(*a).loc[:"2023-03-20"])
+        assert store.missing_ranges("SPY", date(2023, 3, 1), date(2023, 3, 31)) == [
+            (date(2023, 3, 21), date(2023, 3, 31))
+        ]
+
+    def test_empty_fetch_is_retried(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        fetch.empty = True
+        assert store.get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch).empty
+        assert store.missing_ranges("SPY", date(2023, 1, 1), date(2023, 1, 31)) == [
+            (date(2023, 1, 1), date(2023, 1, 31))
+        ]
+
+        fetch.empty = False
+        closes = store.get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch)
+        assert len(closes) == len(pd.bdate_range("2023-01-02", "2023-01-31"))
+        assert len(fetch.calls) == 2
+
+    def test_readjusted_history_is_refetched(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        store.get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch)
+
+        fetch.factor = 0.5  # a 2-for-1 split halves every adjusted close
+        closes = store.get_closes("SPY", date(2023, 1, 1), date(2023, 2, 28), fetch)
+
+        assert fetch.calls[-1] == ("SPY", date(2023, 1, 1), date(2023, 2, 28))
+        pd.testing.assert_series_equal(
+            closes, _closes("2023-01-01", "2023-02-28", factor=0.5), check_names=False, check_freq=False
+        )
+        assert store.missing_ranges("SPY", date(2023, 1, 1), date(2023, 2, 28)) == []
+
+    def test_unchanged_history_is_extended(self, tmp_path):
+        store = PriceStore(tmp_path)
+        fetch = _FakeFetcher()
+        store.get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch)
+        closes = store.get_closes("SPY", date(2023, 1, 1), date(2023, 2, 28), fetch)
+        assert len(fetch.calls) == 2
+        pd.testing.assert_series_equal(
+            closes, _closes("2023-01-01", "2023-02-28"), check_names=False, check_freq=False
+        )
+
+    def test_persists_across_instances(self, tmp_path):
+        fetch = _FakeFetcher()
+        PriceStore(tmp_path).get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch)
+        closes = PriceStore(tmp_path).get_closes("SPY", date(2023, 1, 1), date(2023, 1, 31), fetch)
+        assert len(fetch.calls) == 1
+        assert len(closes) == len(pd.bdate_range("2023-01-02", "2023-01-31"))
+
+
+class TestGetPriceStore:
+    def test_disabled_without_env(self, monkeypatch):
+        monkeypatch.delenv(PRICE_CACHE_DIR_ENV, raising=False)
+        assert get_price_store() is None
+
+    def test_reused_for_same_directory(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(PRICE_CACHE_DIR_ENV, str(tmp_path))
+        assert get_price_store() is get_price_store()
+
+
+class TestFetchBenchmarkWithStore:
+    @patch(_MOCK_YF)
+    def test_restart_does_not_refetch(self, mock_dl, monkeypatch, tmp_path):
+        monkeypatch.setenv(PRICE_CACHE_DIR_ENV, str(tmp_path))
+        dates = pd.bdate_range("2023-01-03", "2023-06-15")
+        mock_dl.return_value = pd.DataFrame({"Close": np.linspace(400, 450, len(dates))}, index=dates)
+        trades = [{"date": "2023-01-03"}, {"date": "2023-06-15"}]
+
+        first = fetch_benchmark(trades, "SPY")
+        benchmark_module._cache.clear()   # simulate a process restart
+        price_store._store = None
+        second = fetch_benchmark(trades, "SPY")
+
+        assert first == second
+        assert first["total_return_pct"] == round((450 - 400) / 400 * 100, 4)
+        assert mock_dl.call_count == 1
+        assert mock_dl.call_args.kwargs["end"] == datetime(2023, 6, 16)
+
+    @patch(_MOCK_YF)
+    def test_download_failure_returns_none(self, mock_dl, monkeypatch, tmp_path):
+        monkeypatch.setenv(PRICE_CACHE_DIR_ENV, str(tmp_path))
+        mock_dl.side_effect = Exception("network error")
+        assert fetch_benchmark([{"date": "2023-01-03"}, {"date": "2023-06-15"}], "SPY") is None
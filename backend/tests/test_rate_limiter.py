@@ -0,0 +1,88 @@
+"""Tests for the pluggable rate limiter backends."""
+
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rate_limiter import (
+    RATE_LIMIT_DB_ENV,
+    InMemoryRateLimiter,
+    SQLiteRateLimiter,
+    create_rate_limiter,
+)
+
+
+def _hammer_sqlite(path, n):
+    limiter = SQLiteRateLimiter(path)
+    return sum(limiter.try_acquire("1.2.3.4", "2099-01", 25) for _ in range(n))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryRateLimiter()
+    return SQLiteRateLimiter(tmp_path / "limits.sqlite3")
+
+
+class TestBackendContract:
+    def test_allows_up_to_limit(self, limiter):
+        results = [limiter.try_acquire("1.1.1.1", "2099-01", 3) for _ in range(5)]
+        assert results == [True, True, True, False, False]
+
+    def test_ips_counted_separately(self, limiter):
+        assert limiter.try_acquire("1.1.1.1", "2099-01", 1)
+        assert limiter.try_acquire("2.2.2.2", "2099-01", 1)
+        assert not limiter.try_acquire("1.1.1.1", "2099-01", 1)
+
+    def test_new_month_resets_count(self, limiter):
+        assert limiter.try_acquire("1.1.1.1", "2099-01", 1)
+        assert not limiter.try_acquire("1.1.1.1", "2099-01", 1)
+        assert limiter.try_acquire("1.1.1.1", "2099-02", 1)
+
+    def test_past_months_are_evicted(self, limiter):
+        for i in range(10):
+            limiter.try_acquire(f"10.0.0.{i}", "2099-01", 5)
+        limiter.try_acquire("10.0.0.1", "2099-02", 5)
+        assert len(limiter) == 1
+
+    def test_reset_clears_counts(self, limiter):
+        limiter.try_acquire("1.1.1.1", "2099-01", 1)
+        limiter.reset()
+        assert limiter.try_acquire("1.1.1.1", "2099-01", 1)
+
+    def test_concurrent_threads_never_exceed_limit(self, limiter):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: limiter.try_acquire("1.1.1.1", "2099-01", 10), range(50)))
+        assert sum(results) == 10
+
+
+class TestSQLiteRateLimiter:
+    def test_counts_shared_between_instances(self, tmp_path):
+        path = tmp_path / "limits.sqlite3"
+        first, second = SQLiteRateLimiter(path), SQLiteRateLimiter(path)
+        assert first.try_acquire("1.1.1.1", "2099-01", 2)
+        assert second.try_acquire("1.1.1.1", "2099-01", 2)
+        assert not first.try_acquire("1.1.1.1", "2099-01", 2)
+
+    def test_limit_enforced_across_processes(self, tmp_path):
+        path = str(tmp_path / "limits.sqlite3")
+        SQLiteRateLimiter(path)
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(4) as pool:
+            allowed = sum(pool.starmap(_hammer_sqlite, [(path, 20)] * 4))
+        assert allowed == 25
+
+
+class TestCreateRateLimiter:
+    def test_in_memory_without_env(self, monkeypatch):
+        monkeypatch.delenv(RATE_LIMIT_DB_ENV, raising=False)
+        assert isinstance(create_rate_limiter(), InMemoryRateLimiter)
+
+    def test_sqlite_with_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(RATE_LIMIT_DB_ENV, str(tmp_path / "sub" / "limits.sqlite3"))
+        assert isinstance(create_rate_limiter(), SQLiteRateLimiter)
+
+    def test_falls_back_to_memory_when_unopenable(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(RATE_LIMIT_DB_ENV, str(tmp_path))  # a directory, not a file
+        assert isinstance(create_rate_limiter(), InMemoryRateLimiter)
@@ -1,8 +1,13 @@
 """Tests for run_significance_tests() in statistical_tests.py."""
+import math
 import random
+import statistics
+from unittest.mock import patch
+
+import numpy as np
 import pytest
 
-from statistical_tests import run_significance_tests, winrate_binomial_test, plain_english_verdict, VERDICT_NOT_ENOUGH, VERDICT_REAL_EDGE
+from statistical_tests import PnlMoments, _binomial_p_value, _bootstrap_means, _percentile, bootstrap_confidence_interval, run_significance_tests, sharpe_significance, ttest_vs_zero, winrate_binomial_test, plain_english_verdict, VERDICT_NOT_ENOUGH, VERDICT_REAL_EDGE
 
 # Shared fixtures
 
@@ -242,6 +247,27 @@ class TestBootstrapCI:
         result = run_significance_tests(NOISE_TRADES)
         assert result["bootstrap_ci"]["ci_excludes_zero"] is False
 
+    def test_chunk_size_does_not_change_resamples(self):
+        values = np.asarray(NOISE_TRADES)
+        full = _bootstrap_means(values, 500, seed=7)
+        chunked = _bootstrap_means(values, 500, seed=7, chunk_elements=len(values) * 3)
+        assert np.array_equal(full, chunked)
+
+    def test_large_sample_is_bounded_by_chunking(self):
+        values = np.arange(10_000, dtype=float)
+        means = _bootstrap_means(values, 50, seed=1, chunk_elements=1)
+        assert means.shape == (50,)
+        assert abs(means.mean() - values.mean()) < 200
+
+    def test_bootstrap_mean_distribution_centred_on_sample_mean(self):
+        bci = bootstrap_confidence_interval(WINNING_TRADES)
+        centre = (bci["ci_lower"] + bci["ci_upper"]) / 2
+        assert abs(centre - bci["mean"]) < 1.0
+
+    @pytest.mark.parametrize("pct", [0, 2.5, 50, 97.5, 100])
+    def test_percentile_matches_numpy(self, pct):
+        assert _percentile(NOISE_TRADES, pct) == pytest.approx(np.percentile(NOISE_TRADES, pct))
+
 
 # 6. P-value sanity (t-test, Sharpe, binomial)
 
@@ -412,3 +438,69 @@ class TestPlainEnglishVerdict:
     def test_returns_string(self):
         assert isinstance(plain_english_verdict(WINNING_TRADES), str)
 
+
+
+# PnlMoments — shared sufficient statistics
+
+class TestPnlMoments:
+    def test_matches_statistics_module(self):
+        m = PnlMoments.from_pnl(NOISE_TRADES)
+        assert m.n == len(NOISE_TRADES)
+        assert m.mean == pytest.approx(statistics.mean(NOISE_TRADES))
+        assert m.variance() == pytest.approx(statistics.variance(NOISE_TRADES))
+        assert m.variance(ddof=0) == pytest.approx(statistics.pvariance(NOISE_TRADES))
+
+    def test_win_counts_ignore_breakeven(self):
+        m = PnlMoments.from_pnl([1.0, 0.0, -2.0, 3.0, 0.0])
+        assert (m.wins, m.losses, m.nonzero) == (2, 1, 3)
+
+    def test_skewness_matches_direct_formula(self):
+        data = [1.0, 2.0, 3.0, 10.0, 50.0]
+        mean = sum(data) / len(data)
+        sd = (sum((x - mean) ** 2 for x in data) / (len(data) - 1)) ** 0.5
+        expected = (sum((x - mean) ** 3 for x in data) / len(data)) / sd ** 3
+        assert PnlMoments.from_pnl(data).skewness() == pytest.approx(expected)
+
+    def test_stable_for_large_offsets(self):
+        data = [1e9 + x for x in (1.0, 2.0, 3.0, 4.0)]
+        assert PnlMoments.from_pnl(data).variance() == pytest.approx(5 / 3)
+
+    def test_from_pnl_returns_existing_moments(self):
+        m = PnlMoments.from_pnl(WINNING_TRADES)
+        assert PnlMoments.from_pnl(m) is m
+
+    def test_tests_accept_moments(self):
+        m = PnlMoments.from_pnl(WINNING_TRADES)
+        assert winrate_binomial_test(m) == winrate_binomial_test(WINNING_TRADES)
+        assert sharpe_significance(m, 0.5) == sharpe_significance(WINNING_TRADES, 0.5)
+        assert ttest_vs_zero(m) == ttest_vs_zero(WINNING_TRADES)
+
+    def test_battery_computes_moments_once(self):
+        with patch.object(PnlMoments, "from_pnl", wraps=PnlMoments.from_pnl) as spy:
+            run_significance_tests(WINNING_TRADES)
+        computed = [c for c in spy.call_args_list if not isinstance(c.args[0], PnlMoments)]
+        assert len(computed) == 1
+
+
+# Exact binomial p-value
+
+def _brute_force_binomial_p(k, n, p0):
+    pmf = [math.comb(n, i) * p0 ** i * (1 - p0) ** (n - i) for i in range(n + 1)]
+    return min(sum(q for q in pmf if q <= pmf[k] * (1 + 1e-7)), 1.0)
+
+
+class TestExactBinomialPValue:
+    @pytest.mark.parametrize("k,n,p0", [(3, 10, 0.5), (25, 30, 0.5), (15, 30, 0.5), (60, 100, 0.5), (70, 120, 0.6), (0, 8, 0.5)])
+    def test_matches_brute_force(self, k, n, p0):
+        assert _binomial_p_value(k, n, p0) == pytest.approx(_brute_force_binomial_p(k, n, p0), rel=1e-9)
+
+    def test_symmetric_under_half(self):
+        assert _binomial_p_value(550, 1000) == pytest.approx(_binomial_p_value(450, 1000))
+
+    def test_large_sample_is_exact_and_bounded(self):
+        p = _binomial_p_value(500_800, 1_000_000)
+        assert 0.10 < p < 0.12
+
+    def test_degenerate_null(self):
+        assert _binomial_p_value(0, 10, 0.0) == 1.0
+        assert _binomial_p_value(3, 10, 1.0) == 0.0
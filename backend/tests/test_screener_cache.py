@@ -0,0 +1,130 @@
+"""Tests for the StockScreener caches shared across instances (screener_cache)."""
+import threading
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import screener_cache
+import stock_screener
+from market_data_provider import InMemoryProvider, set_provider
+from stock_screener import StockScreener
+
+
+def _recent_bars(periods=70, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 60 * np.exp(np.cumsum(rng.normal(0, 0.02, periods)))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.integers(1_000_000, 3_000_000, periods).astype(float),
+    }, index=pd.bdate_range(end=datetime.now().date(), periods=periods))
+
+
+@pytest.fixture
+def provider():
+    installed = InMemoryProvider({'AAA': _recent_bars()})
+    set_provider(installed)
+    with patch.object(installed, 'download', wraps=installed.download) as download:
+        yield download
+    set_provider(None)
+
+
+class TestSharedFrames:
+    def test_new_screener_reuses_earlier_download(self, provider):
+        StockScreener().get_stock_data('AAA', days=100)
+        StockScreener().get_stock_data('AAA', days=100)
+        assert provider.call_count == 1
+
+    def test_shorter_window_served_from_longer_frame(self, provider):
+        full = StockScreener().get_stock_data('AAA', days=100)
+        short = StockScreener().get_stock_data('AAA', days=60)
+
+        assert provider.call_count == 1
+        assert short.index[-1] == full.index[-1]
+        assert short.index[0] >= pd.Timestamp(screener_cache.history_start(60))
+        assert len(short) < len(full)
+        pd.testing.assert_frame_equal(short, full.loc[short.index])
+
+    def test_longer_window_is_downloaded(self, provider):
+        StockScreener().get_stock_data('AAA', days=60)
+        StockScreener().get_stock_data('AAA', days=100)
+        assert provider.call_count == 2
+
+    def test_trim_below_minimum_bars_is_a_miss(self):
+        screener_cache.set_frame('AAA', 100, _recent_bars())
+        # history_start(5) is at most 34 days back: under MIN_CACHED_BARS bars
+        assert screener_cache.get_frame('AAA', 5) is None
+
+    def test_lru_bound(self, monkeypatch):
+        small = screener_cache.TTLCache(maxsize=2, ttl=60)
+        monkeypatch.setattr(screener_cache, '_frames', small)
+        for symbol in ('A', 'B', 'C'):
+            screener_cache.set_frame(symbol, 100, _recent_bars())
+        assert screener_cache.get_frame('A', 100) is None
+        assert screener_cache.get_frame('C', 100) is not None
+        assert small.stats()['evictions'] == 1
+
+    def test_concurrent_stores_and_lookups(self):
+        frame = _recent_bars()
+        errors = []
+
+        def worker(offset):
+            try:
+                for i in range(200):
+                    symbol = f'S{(i + offset) % 50}'
+                    screener_cache.set_frame(symbol, 100, frame)
+                    screener_cache.get_frame(symbol, 60)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(screener_cache._frames) == 50
+
+
+class TestHistoryStart:
+    def test_start_only_moves_every_anchor_period(self):
+        days = [datetime(2024, 1, 1) + pd.Timedelta(days=n) for n in range(90)]
+        starts = [screener_cache.history_start(100, now) for now in days]
+        changes = [n for n in range(1, len(starts)) if starts[n] != starts[n - 1]]
+        assert len(changes) <= 3
+        assert all(b - a == screener_cache.HISTORY_ANCHOR_DAYS for a, b in zip(changes, changes[1:]))
+        for now, start in zip(days, starts):
+            assert now - pd.Timedelta(days=100 + screener_cache.HISTORY_ANCHOR_DAYS) < start
+            assert start <= now - pd.Timedelta(days=100)
+
+    def test_scoring_window_ends_at_last_bar(self):
+        frame = _recent_bars(100)
+        window = screener_cache.scoring_window(frame, 30)
+        assert window.index[-1] == frame.index[-1]
+        assert window.index[0] >= frame.index[-1] - pd.Timedelta(days=30)
+        assert len(window) < len(frame)
+
+
+class TestSharedIndicatorState:
+    def test_state_survives_across_screener_instances(self):
+        data = _recent_bars(100)
+        with patch.object(stock_screener, 'TALIB_AVAILABLE', False):
+            StockScreener().update_technical_indicators('AAA', data.iloc[:-1])
+            with patch.object(StockScreener, 'calculate_technical_indicators') as full:
+                StockScreener().update_technical_indicators('AAA', data)
+        full.assert_not_called()
+
+    def test_cached_state_is_not_advanced_in_place(self):
+        data = _recent_bars(100)
+        with patch.object(stock_screener, 'TALIB_AVAILABLE', False):
+            StockScreener().update_technical_indicators('AAA', data.iloc[:-1])
+            _, state = screener_cache.get_indicators('AAA', 100)
+            StockScreener().update_technical_indicators('AAA', data)
+        # States stay one bar behind their frame
+        assert state.last_index == data.index[-3]
+        assert screener_cache.get_indicators('AAA', 100)[1].last_index == data.index[-2]
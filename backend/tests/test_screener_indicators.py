@@ -0,0 +1,167 @@
+"""Tests for incremental screener indicators (IndicatorState / extend_indicators)."""
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import screener_cache
+import stock_screener
+from screener_indicators import INDICATOR_COLUMNS, IndicatorState, extend_indicators
+from stock_screener import StockScreener
+
+
+def _ohlcv(periods=160, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, periods)))
+    spread = close * rng.uniform(0.005, 0.03, periods)
+    return pd.DataFrame({
+        'open': close,
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.integers(500_000, 5_000_000, periods).astype(float),
+    }, index=pd.bdate_range('2024-01-01', periods=periods))
+
+
+def _full(data):
+    return StockScreener().calculate_technical_indicators(data.copy())
+
+
+def _seed(frame):
+    # State one bar behind the frame, as the screener keeps it
+    return IndicatorState.from_frame(frame.iloc[:-1])
+
+
+def _partial(data, factor=0.97):
+    # The same bars with the last one still forming
+    partial = data.copy()
+    partial.iloc[-1, partial.columns.get_indexer(['high', 'close', 'volume'])] *= factor
+    return partial
+
+
+@pytest.fixture(autouse=True)
+def pandas_indicators():
+    with patch.object(stock_screener, 'TALIB_AVAILABLE', False):
+        yield
+
+
+class TestExtendIndicators:
+    @pytest.mark.parametrize('new_bars', [1, 5, 40])
+    def test_appending_matches_full_recompute(self, new_bars):
+        data = _ohlcv()
+        seed = _full(data.iloc[:-new_bars])
+        state = _seed(seed)
+
+        extended = extend_indicators(seed, state, data)
+
+        expected = _full(data)
+        pd.testing.assert_frame_equal(extended[INDICATOR_COLUMNS], expected[INDICATOR_COLUMNS],
+                                      check_exact=False, rtol=1e-9, atol=1e-9)
+        assert state.last_index == data.index[-2]
+
+    def test_partial_last_bar_is_replaced(self):
+        data = _ohlcv()
+        frame = _full(_partial(data))
+        state = _seed(frame)
+
+        extended = extend_indicators(frame, state, data)
+
+        pd.testing.assert_frame_equal(extended, _full(data), check_exact=False, rtol=1e-9, atol=1e-9)
+        assert state.last_index == data.index[-2]
+
+    def test_moved_window_is_rejected(self):
+        data = _ohlcv()
+        frame = _full(data.iloc[:-1])
+        # Every EMA row changes when the window's first bar moves
+        assert extend_indicators(frame, _seed(frame), data.iloc[1:]) is None
+
+    def test_rsi_with_no_losses_matches_pandas(self):
+        data = _ohlcv()
+        data['close'] = np.linspace(50, 80, len(data))
+        seed = _full(data.iloc[:-3])
+        extended = extend_indicators(seed, _seed(seed), data)
+        assert (extended['RSI'].iloc[-3:] == 100).all()
+        pd.testing.assert_series_equal(extended['RSI'], _full(data)['RSI'])
+
+    def test_unchanged_data_returns_cached_frame(self):
+        data = _ohlcv()
+        frame = _full(data)
+        assert extend_indicators(frame, _seed(frame), data) is frame
+
+    def test_readjusted_closes_are_rejected(self):
+        data = _ohlcv()
+        frame = _full(data.iloc[:-1])
+        adjusted = data.copy()
+        adjusted[['open', 'high', 'low', 'close']] *= 0.98  # dividend re-adjustment
+        assert extend_indicators(frame, _seed(frame), adjusted) is None
+
+    def test_earlier_window_is_rejected(self):
+        data = _ohlcv()
+        frame = _full(data.iloc[20:-1])
+        assert extend_indicators(frame, _seed(frame), data) is None
+
+
+class TestUpdateTechnicalIndicators:
+    def test_second_screen_only_processes_new_bar(self):
+        data = _ohlcv(100)
+        screener = StockScreener()
+        screener.update_technical_indicators('AAA', data.iloc[:-1])
+
+        with patch.object(StockScreener, 'calculate_technical_indicators',
+                          wraps=screener.calculate_technical_indicators) as full:
+            result = screener.update_technical_indicators('AAA', data)
+        full.assert_not_called()
+        pd.testing.assert_frame_equal(result, screener_cache.scoring_window(_full(data), 100),
+                                      check_exact=False, rtol=1e-9, atol=1e-9)
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_growing_history_never_falls_back(self, seed):
+        data = _ohlcv(160, seed=seed)
+        expected = {end: screener_cache.scoring_window(_full(data.iloc[:end]), 100) for end in range(101, 161)}
+        screener = StockScreener()
+        screener.update_technical_indicators('AAA', data.iloc[:100])
+
+        results, candidates = {}, {}
+        with patch.object(StockScreener, 'calculate_technical_indicators',
+                          wraps=screener.calculate_technical_indicators) as full:
+            for end in range(101, 161):
+                history = data.iloc[:end]
+                # Intraday screens see the last bar still forming, then the closed bar
+                screener.update_technical_indicators('AAA', _partial(history))
+                results[end] = screener.update_technical_indicators('AAA', history)
+                candidates[end] = screener.score_stock('AAA', history)
+        assert full.call_count == 0
+
+        for end, result in results.items():
+            pd.testing.assert_frame_equal(result, expected[end], check_exact=False, rtol=1e-9, atol=1e-9)
+            history = data.iloc[:end]
+            assert StockScreener().score_universe({'AAA': history}) == [c for c in [candidates[end]] if c]
+
+    def test_new_history_start_recomputes(self):
+        data = _ohlcv(130)
+        screener = StockScreener()
+        screener.update_technical_indicators('AAA', data.iloc[:100])
+        with patch.object(StockScreener, 'calculate_technical_indicators',
+                          wraps=screener.calculate_technical_indicators) as full:
+            result = screener.update_technical_indicators('AAA', data.iloc[30:])
+        full.assert_called_once()
+        pd.testing.assert_frame_equal(result, screener_cache.scoring_window(_full(data.iloc[30:]), 100))
+
+    def test_input_frame_not_modified(self):
+        data = _ohlcv(100)
+        StockScreener().update_technical_indicators('AAA', data)
+        assert list(data.columns) == ['open', 'high', 'low', 'close', 'volume']
+
+    def test_falls_back_to_full_recompute(self):
+        data = _ohlcv(100)
+        screener = StockScreener()
+        screener.update_technical_indicators('AAA', data.iloc[:-1])
+        adjusted = data.copy()
+        adjusted['close'] *= 1.01
+
+        result = screener.update_technical_indicators('AAA', adjusted)
+        pd.testing.assert_frame_equal(result, screener_cache.scoring_window(_full(adjusted), 100))
+
+    def test_short_history_is_rejected(self):
+        assert StockScreener().update_technical_indicators('AAA', _ohlcv(40)) is None
@@ -0,0 +1,106 @@
+"""Tests for cross-sectional MACD suitability scoring (screener_scoring)."""
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_screener
+from screener_scoring import base_filter_mask, build_panel, macd_suitability_scores
+from stock_screener import StockScreener
+
+DATES = pd.bdate_range('2024-01-01', periods=100)
+
+
+def _ohlcv(seed, periods=100, price=50.0, volume=(300_000, 5_000_000)):
+    rng = np.random.default_rng(seed)
+    vol = rng.uniform(0.003, 0.04)
+    close = price * np.exp(np.cumsum(rng.normal(rng.uniform(-0.01, 0.01), vol, periods)))
+    spread = close * rng.uniform(0.002, 0.05, periods)
+    return pd.DataFrame({
+        'open': close,
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.integers(*volume, periods).astype(float),
+    }, index=DATES[-periods:])
+
+
+def _universe():
+    frames = {f'R{i:03d}': _ohlcv(i) for i in range(150)}
+    frames['SHORT'] = _ohlcv(1000, periods=60)
+    frames['TOO_SHORT'] = _ohlcv(1001, periods=40)
+    frames['GAPPED'] = _ohlcv(1002).drop(DATES[[30, 31, 75]])
+    frames['PENNY'] = _ohlcv(1003, price=2.0)
+    frames['THIN'] = _ohlcv(1004, volume=(10_000, 200_000))
+    flat = _ohlcv(1005)
+    flat['volume'] = 1_000_000.0
+    frames['FLAT_VOLUME'] = flat
+    rising = _ohlcv(1006)
+    rising['close'] = np.linspace(40, 90, len(rising))
+    frames['NO_LOSSES'] = rising
+    return frames
+
+
+def _single_score(screener, data):
+    return screener.calculate_macd_suitability_score(screener.calculate_technical_indicators(data.copy()))
+
+
+@pytest.fixture(autouse=True)
+def pandas_indicators():
+    with patch.object(stock_screener, 'TALIB_AVAILABLE', False):
+        yield
+
+
+class TestMacdSuitabilityScores:
+    def test_identical_to_per_symbol_scores(self):
+        frames = _universe()
+        screener = StockScreener()
+        scores = macd_suitability_scores(build_panel(frames))
+
+        expected = {symbol: float(_single_score(screener, data)) for symbol, data in frames.items()}
+        assert scores.to_dict() == expected
+        # The fixture exercises every branch, not just one bucket
+        assert len(set(expected.values())) > 5
+
+    def test_short_histories_score_zero(self):
+        scores = macd_suitability_scores(build_panel({'A': _ohlcv(0, periods=40)}))
+        assert scores.to_dict() == {'A': 0.0}
+
+    def test_gap_rows_use_the_symbols_own_bars(self):
+        gapped = _ohlcv(7).drop(DATES[[10, 50, 90]])
+        together = macd_suitability_scores(build_panel({'FULL': _ohlcv(8), 'GAPPED': gapped}))
+        alone = macd_suitability_scores(build_panel({'GAPPED': gapped}))
+        assert together['GAPPED'] == alone['GAPPED']
+
+
+class TestBaseFilterMask:
+    def test_identical_to_apply_base_filters(self):
+        frames = _universe()
+        screener = StockScreener()
+        mask = base_filter_mask(build_panel(frames))
+        expected = {symbol: screener.apply_base_filters(symbol, data)[0] for symbol, data in frames.items()}
+        assert mask.to_dict() == expected
+        assert not mask['PENNY'] and not mask['THIN'] and not mask['TOO_SHORT']
+
+
+class TestScoreUniverse:
+    def test_matches_score_stock(self):
+        frames = _universe()
+        frames['MISSING'] = None
+        screener = StockScreener()
+
+        expected = [c for c in (StockScreener().score_stock(s, d) for s, d in frames.items()) if c]
+        assert screener.score_universe(frames) == expected
+        assert expected
+
+    def test_nothing_to_score(self):
+        assert StockScreener().score_universe({'A': None, 'B': _ohlcv(0, periods=30)}) == []
+
+    def test_talib_falls_back_to_per_symbol_scoring(self):
+        frames = {'A': _ohlcv(0)}
+        screener = StockScreener()
+        with patch.object(stock_screener, 'TALIB_AVAILABLE', True), \
+             patch.object(StockScreener, '_score_safely', return_value=None) as single:
+            assert screener.score_universe(frames) == []
+        single.assert_called_once()
@@ -0,0 +1,210 @@
+"""Tests for background-precomputed screener snapshots."""
+import time
+from unittest.mock import patch
+
+import pytest
+
+import app as app_module
+import screener_snapshot
+from market_data_provider import InMemoryProvider, set_provider
+from screener_snapshot import (
+    SCREENER_REFRESH_SECONDS,
+    SCREENER_REFRESH_SECONDS_ENV,
+    SCREENER_SNAPSHOT_PATH_ENV,
+    Snapshot,
+    SnapshotRefresher,
+    SnapshotStore,
+    current_snapshot,
+    publish,
+    refresh_interval,
+    refresh_snapshot,
+)
+from stock_screener import StockScreener
+
+SYMBOLS = [f'S{i:02d}' for i in range(30)]
+
+
+def _snapshot(computed_at=None, scores=(80.0, 70.0, 60.0)):
+    candidates = [{'symbol': f'X{i}', 'score': score, 'price': 10.0, 'volume': 1_000_000, 'data_points': 100}
+                  for i, score in enumerate(scores)]
+    return Snapshot(candidates, time.time() if computed_at is None else computed_at, 100)
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot(monkeypatch):
+    monkeypatch.delenv(SCREENER_SNAPSHOT_PATH_ENV, raising=False)
+    screener_snapshot.clear()
+    yield
+    screener_snapshot.clear()
+
+
+@pytest.fixture
+def provider(recent_bars):
+    installed = InMemoryProvider({symbol: recent_bars(i) for i, symbol in enumerate(SYMBOLS)})
+    set_provider(installed)
+    with patch.object(StockScreener, 'get_stock_universe', return_value=SYMBOLS):
+        yield installed
+    set_provider(None)
+
+
+class TestRefreshSnapshot:
+    def test_publishes_every_candidate_best_first(self, provider):
+        snapshot = refresh_snapshot()
+        assert current_snapshot() is snapshot
+        assert snapshot.universe_size == len(SYMBOLS)
+        assert snapshot.candidates
+        scores = [c['score'] for c in snapshot.candidates]
+        assert scores == sorted(scores, reverse=True)
+        assert all(score > 50 for score in scores)
+
+    def test_scores_match_direct_screening(self, provider):
+        snapshot = refresh_snapshot()
+        screener = StockScreener()
+        for candidate in snapshot.candidates[:3]:
+            data = screener.get_stock_data(candidate['symbol'], days=100)
+            assert candidate == screener.score_stock(candidate['symbol'], data)
+
+    def test_empty_refresh_keeps_previous_snapshot(self, provider):
+        previous = _snapshot()
+        publish(previous)
+        provider.frames.clear()
+        refresh_snapshot()
+        assert current_snapshot() is previous
+
+
+class TestSharedStore:
+    def test_other_process_snapshot_picked_up_after_poll_interval(self, monkeypatch, tmp_path):
+        path = tmp_path / 'snapshot.sqlite3'
+        monkeypatch.setenv(SCREENER_SNAPSHOT_PATH_ENV, str(path))
+        assert current_snapshot() is None
+
+        # Written by another process (e.g. the standalone refresher)
+        SnapshotStore(path).save(_snapshot(computed_at=1000.0))
+        assert current_snapshot() is None  # polled less than SNAPSHOT_POLL_SECONDS ago
+
+        monkeypatch.setattr(screener_snapshot, 'SNAPSHOT_POLL_SECONDS', 0.0)
+        loaded = current_snapshot()
+        assert loaded.computed_at == 1000.0
+        assert [c['symbol'] for c in loaded.candidates] == ['X0', 'X1', 'X2']
+
+    def test_publish_writes_the_file(self, monkeypatch, tmp_path):
+        path = tmp_path / 'snapshot.sqlite3'
+        monkeypatch.setenv(SCREENER_SNAPSHOT_PATH_ENV, str(path))
+        publish(_snapshot(computed_at=2000.0))
+        assert SnapshotStore(path).load().computed_at == 2000.0
+
+    def test_older_snapshot_does_not_replace_newer(self):
+        newer = _snapshot(computed_at=2000.0)
+        publish(newer)
+        publish(_snapshot(computed_at=1000.0))
+        assert current_snapshot() is newer
+
+    def test_one_refresher_holds_the_lease(self, tmp_path):
+        store = SnapshotStore(tmp_path / 'snapshot.sqlite3')
+        assert store.claim_refresher('worker-a', 60, now=1000.0)
+        assert not store.claim_refresher('worker-b', 60, now=1010.0)
+        assert store.claim_refresher('worker-a', 60, now=1050.0)  # renewed
+        assert not store.claim_refresher('worker-b', 60, now=1100.0)
+        # worker-a stopped renewing
+        assert store.claim_refresher('worker-b', 60, now=1111.0)
+        assert not store.claim_refresher('worker-a', 60, now=1112.0)
+
+    def test_released_lease_is_taken_over(self, tmp_path):
+        store = SnapshotStore(tmp_path / 'snapshot.sqlite3')
+        assert store.claim_refresher('worker-a', 60)
+        store.release_refresher('worker-a')
+        assert store.claim_refresher('worker-b', 60)
+
+    def test_reads_are_served_from_memory(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(SCREENER_SNAPSHOT_PATH_ENV, str(tmp_path / 'snapshot.sqlite3'))
+        publish(_snapshot())
+        with patch.object(SnapshotStore, 'load') as load:
+            for _ in range(100):
+                current_snapshot()
+        load.assert_not_called()
+
+
+class TestRefresher:
+    def test_refreshes_until_stopped(self, provider):
+        refresher = SnapshotRefresher(interval=60)
+        refresher.start()
+        deadline = time.monotonic() + 10
+        while current_snapshot() is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        refresher.stop(timeout=5)
+        assert current_snapshot() is not None
+        assert not refresher.is_alive()
+
+    def test_only_the_lease_holder_refreshes(self, monkeypatch, tmp_path):
+        path = tmp_path / 'snapshot.sqlite3'
+        monkeypatch.setenv(SCREENER_SNAPSHOT_PATH_ENV, str(path))
+        SnapshotStore(path).claim_refresher('other-worker', 60)
+        with patch.object(screener_snapshot, 'refresh_snapshot') as refresh:
+            refresher = SnapshotRefresher(interval=0.01, screener=object())
+            refresher.start()
+            time.sleep(0.1)
+            refresher.stop(timeout=5)
+        refresh.assert_not_called()
+
+    def test_failed_refresh_does_not_kill_thread(self):
+        with patch.object(screener_snapshot, 'refresh_snapshot', side_effect=RuntimeError('boom')) as refresh:
+            refresher = SnapshotRefresher(interval=0.01, screener=object())
+            refresher.start()
+            time.sleep(0.1)
+            refresher.stop(timeout=5)
+        assert refresh.call_count > 1
+
+    @pytest.mark.parametrize('raw, expected', [
+        (None, 0.0), ('120', 120.0), ('0', 0.0), ('soon', SCREENER_REFRESH_SECONDS),
+    ])
+    def test_refresh_interval(self, monkeypatch, raw, expected):
+        if raw is None:
+            monkeypatch.delenv(SCREENER_REFRESH_SECONDS_ENV, raising=False)
+        else:
+            monkeypatch.setenv(SCREENER_REFRESH_SECONDS_ENV, raw)
+        assert refresh_interval() == expected
+
+    def test_shared_snapshot_refreshes_by_default(self, monkeypatch, tmp_path):
+        monkeypatch.delenv(SCREENER_REFRESH_SECONDS_ENV, raising=False)
+        monkeypatch.setenv(SCREENER_SNAPSHOT_PATH_ENV, str(tmp_path / 'snapshot.sqlite3'))
+        assert refresh_interval() == SCREENER_REFRESH_SECONDS
+
+    def test_zero_interval_starts_nothing(self):
+        assert screener_snapshot.start_background_refresh(interval=0) is None
+
+
+class TestScreenerUsesSnapshot:
+    def test_fast_deployment_serves_snapshot_without_downloads(self):
+        publish(_snapshot())
+        with patch.object(StockScreener, 'get_stock_data') as get_data:
+            selected = StockScreener().screen_stocks_fast_deployment(max_stocks=2)
+        get_data.assert_not_called()
+        assert [s['symbol'] for s in selected] == ['X0', 'X1']
+
+    def test_selection_returns_copies(self):
+        snapshot = _snapshot()
+        selected = StockScreener().select_from_snapshot(snapshot, max_stocks=3)
+        selected[0]['reason'] = 'annotated'
+        assert 'reason' not in snapshot.candidates[0]
+
+    @pytest.mark.parametrize('timeframe, expected', [
+        ('medium', ['MSFT', 'NVDA']), ('short', ['NVDA', 'MSFT']), ('long', ['MSFT', 'NVDA']),
+    ])
+    def test_selection_applies_timeframe(self, timeframe, expected):
+        snapshot = Snapshot([{'symbol': 'MSFT', 'score': 71.0}, {'symbol': 'NVDA', 'score': 70.0}], time.time(), 100)
+        selected = StockScreener().select_from_snapshot(snapshot, max_stocks=2, timeframe=timeframe)
+        assert [s['symbol'] for s in selected] == expected
+        assert snapshot.candidates[0]['score'] == 71.0
+
+    def test_get_optimal_stocks_reports_snapshot_age(self, client, monkeypatch):
+        snapshot = _snapshot(computed_at=time.time() - 120)
+        monkeypatch.setattr(app_module, 'TRADING_MODULES_AVAILABLE', True)
+        monkeypatch.setattr(app_module, 'current_snapshot', lambda: snapshot, raising=False)
+        with patch.object(StockScreener, 'screen_stocks_for_macd') as screen:
+            response = client.get('/get-optimal-stocks?max_stocks=2')
+        screen.assert_not_called()
+        body = response.get_json()
+        assert response.status_code == 200
+        assert [s['symbol'] for s in body['selected_stocks']] == ['X0', 'X1']
+        assert body['snapshot']['age_seconds'] >= 120
+        assert body['total_candidates_screened'] == 100
@@ -21,7 +21,7 @@ from app import TRADING_MODULES_AVAILABLE
 
 INITIAL_BALANCE = 100_000
 MOCK_FINAL = 120_000.0
-_MOCK_YF = "test_against_SP.yf.download"
+_MOCK_YF = "market_data_provider.yf.download"
 _MOCK_SPY = "test_against_SP.get_spy_investment"
 
 
@@ -32,6 +32,11 @@ def _make_df(first: str, last: str) -> pd.DataFrame:
     return pd.DataFrame({"Close": prices}, index=dates)
 
 
+def _spy_download(ticker, start, end, **kwargs):
+    """Mock yf.download: business-day bars from start up to (excluding) end."""
+    return _make_df(start, end - pd.Timedelta(days=1))
+
+
 # ---------------------------------------------------------------------------
 # get_spy_investment - date boundaries
 # ---------------------------------------------------------------------------
@@ -108,50 +113,51 @@ if TRADING_MODULES_AVAILABLE:
             assert status == 400
 
 
+    @patch(_MOCK_YF, side_effect=_spy_download)
     @patch(_MOCK_SPY, return_value=MOCK_FINAL)
     class TestGenerateSpyMonthlyPerformanceDateRange:
         """Verify that monthly entries span exactly from start_date through end_date."""
 
-        def test_first_entry_date_matches_start_month(self, _):
+        def test_first_entry_date_matches_start_month(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 3, 15), datetime(2024, 3, 15), INITIAL_BALANCE
             )
             assert result[0]["date"] == "2023-03"
 
-        def test_last_entry_date_matches_end_month(self, _):
+        def test_last_entry_date_matches_end_month(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 3, 15), datetime(2024, 3, 15), INITIAL_BALANCE
             )
             assert result[-1]["date"] == "2024-03"
 
-        def test_full_year_jan_to_jan_produces_13_entries(self, _):
+        def test_full_year_jan_to_jan_produces_13_entries(self, _, __):
             # 12 months → Start + Month 1 .. Month 12 = 13 entries
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             assert len(result) == 13
 
-        def test_six_month_range_produces_7_entries(self, _):
+        def test_six_month_range_produces_7_entries(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2023, 7, 1), INITIAL_BALANCE
             )
             assert len(result) == 7
 
-        def test_dates_are_monotonically_increasing(self, _):
+        def test_dates_are_monotonically_increasing(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             dates = [r["date"] for r in result]
             assert dates == sorted(dates)
 
-        def test_no_duplicate_dates(self, _):
+        def test_no_duplicate_dates(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             dates = [r["date"] for r in result]
             assert len(dates) == len(set(dates))
 
-        def test_december_to_january_boundary_not_skipped(self, _):
+        def test_december_to_january_boundary_not_skipped(self, _, __):
             """Dec→Jan year rollover must not skip or duplicate any month."""
             result = generate_spy_monthly_performance(
                 datetime(2023, 11, 1), datetime(2024, 2, 1), INITIAL_BALANCE
@@ -162,20 +168,20 @@ if TRADING_MODULES_AVAILABLE:
             assert "2024-01" in dates
             assert "2024-02" in dates
 
-        def test_sub_one_month_range_returns_2_entries(self, _):
+        def test_sub_one_month_range_returns_2_entries(self, _, __):
             # Same month → months=0 → clamped to 1 → Start + 1 entry
             result = generate_spy_monthly_performance(
                 datetime(2023, 5, 1), datetime(2023, 5, 20), INITIAL_BALANCE
             )
             assert len(result) == 2
 
-        def test_last_entry_balance_is_actual_final_balance(self, _):
+        def test_last_entry_balance_is_actual_final_balance(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             assert result[-1]["balance"] == MOCK_FINAL
 
-        def test_first_entry_balance_is_initial_balance(self, _):
+        def test_first_entry_balance_is_initial_balance(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
@@ -191,50 +197,51 @@ if TRADING_MODULES_AVAILABLE:
 
 
 if TRADING_MODULES_AVAILABLE:
+    @patch(_MOCK_YF, side_effect=_spy_download)
     @patch(_MOCK_SPY, return_value=MOCK_FINAL)
     class TestGenerateSpyMonthlyPerformanceDateRange:
         """Verify that monthly entries span exactly from start_date through end_date."""
 
-        def test_first_entry_date_matches_start_month(self, _):
+        def test_first_entry_date_matches_start_month(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 3, 15), datetime(2024, 3, 15), INITIAL_BALANCE
             )
             assert result[0]["date"] == "2023-03"
 
-        def test_last_entry_date_matches_end_month(self, _):
+        def test_last_entry_date_matches_end_month(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 3, 15), datetime(2024, 3, 15), INITIAL_BALANCE
             )
             assert result[-1]["date"] == "2024-03"
 
-        def test_full_year_jan_to_jan_produces_13_entries(self, _):
+        def test_full_year_jan_to_jan_produces_13_entries(self, _, __):
             # 12 months → Start + Month 1 .. Month 12 = 13 entries
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             assert len(result) == 13
 
-        def test_six_month_range_produces_7_entries(self, _):
+        def test_six_month_range_produces_7_entries(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2023, 7, 1), INITIAL_BALANCE
             )
             assert len(result) == 7
 
-        def test_dates_are_monotonically_increasing(self, _):
+        def test_dates_are_monotonically_increasing(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             dates = [r["date"] for r in result]
             assert dates == sorted(dates)
 
-        def test_no_duplicate_dates(self, _):
+        def test_no_duplicate_dates(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             dates = [r["date"] for r in result]
             assert len(dates) == len(set(dates))
 
-        def test_december_to_january_boundary_not_skipped(self, _):
+        def test_december_to_january_boundary_not_skipped(self, _, __):
             """Dec→Jan year rollover must not skip or duplicate any month."""
             result = generate_spy_monthly_performance(
                 datetime(2023, 11, 1), datetime(2024, 2, 1), INITIAL_BALANCE
@@ -245,20 +252,20 @@ if TRADING_MODULES_AVAILABLE:
             assert "2024-01" in dates
             assert "2024-02" in dates
 
-        def test_sub_one_month_range_returns_2_entries(self, _):
+        def test_sub_one_month_range_returns_2_entries(self, _, __):
             # Same month → months=0 → clamped to 1 → Start + 1 entry
             result = generate_spy_monthly_performance(
                 datetime(2023, 5, 1), datetime(2023, 5, 20), INITIAL_BALANCE
             )
             assert len(result) == 2
 
-        def test_last_entry_balance_is_actual_final_balance(self, _):
+        def test_last_entry_balance_is_actual_final_balance(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
             assert result[-1]["balance"] == MOCK_FINAL
 
-        def test_first_entry_balance_is_initial_balance(self, _):
+        def test_first_entry_balance_is_initial_balance(self, _, __):
             result = generate_spy_monthly_performance(
                 datetime(2023, 1, 1), datetime(2024, 1, 1), INITIAL_BALANCE
             )
@@ -292,28 +299,32 @@ import pytest
 @pytest.mark.skipif(not TRADING_MODULES_AVAILABLE, reason="Trading modules not available; skipping /spy-investment integration tests.")
 class TestSpyInvestmentRouteIntegration:
 
+    @patch("app.download_spy_data")
     @patch("app.generate_spy_monthly_performance", return_value=_MONTHLY_STUB)
     @patch("app.get_spy_investment", return_value=115_000.0)
-    def test_start_date_forwarded_verbatim_to_helper(self, mock_spy, mock_monthly, client):
+    def test_start_date_forwarded_verbatim_to_helper(self, mock_spy, mock_monthly, mock_download, client):
         client.get("/spy-investment?start_date=2023-01-01&end_date=2024-01-01")
         assert mock_spy.call_args.args[0] == datetime(2023, 1, 1)
 
+    @patch("app.download_spy_data")
     @patch("app.generate_spy_monthly_performance", return_value=_MONTHLY_STUB)
     @patch("app.get_spy_investment", return_value=115_000.0)
-    def test_end_date_forwarded_verbatim_to_helper(self, mock_spy, mock_monthly, client):
+    def test_end_date_forwarded_verbatim_to_helper(self, mock_spy, mock_monthly, mock_download, client):
         client.get("/spy-investment?start_date=2023-01-01&end_date=2024-01-01")
         assert mock_spy.call_args.args[1] == datetime(2024, 1, 1)
 
+    @patch("app.download_spy_data")
     @patch("app.generate_spy_monthly_performance", return_value=_MONTHLY_STUB)
     @patch("app.get_spy_investment", return_value=115_000.0)
-    def test_monthly_first_date_matches_requested_start_month(self, mock_spy, mock_monthly, client):
+    def test_monthly_first_date_matches_requested_start_month(self, mock_spy, mock_monthly, mock_download, client):
         resp = client.get("/spy-investment?start_date=2023-01-01&end_date=2024-01-01")
         data = resp.get_json()
         assert data["monthly_performance"][0]["date"] == "2023-01"
 
+    @patch("app.download_spy_data")
     @patch("app.generate_spy_monthly_performance", return_value=_MONTHLY_STUB)
     @patch("app.get_spy_investment", return_value=115_000.0)
-    def test_monthly_last_date_matches_requested_end_month(self, mock_spy, mock_monthly, client):
+    def test_monthly_last_date_matches_requested_end_month(self, mock_spy, mock_monthly, mock_download, client):
         resp = client.get("/spy-investment?start_date=2023-01-01&end_date=2024-01-01")
         data = resp.get_json()
         assert data["monthly_performance"][-1]["date"] == "2024-01"
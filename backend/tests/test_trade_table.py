@@ -0,0 +1,156 @@
+"""Tests for the columnar TradeTable and its use by the analysis modules."""
+import random
+from datetime import date
+
+import numpy as np
+import pytest
+
+from csv_analyzer import calculate_pnl, check_concentration_risk, validate_trades
+from trade_table import SIDE_BUY, SIDE_OTHER, SIDE_SELL, TradeTable
+from transaction_costs import (
+    _normalise_detailed,
+    _to_normalised,
+    calculate_commissions,
+    calculate_slippage,
+)
+
+TRADES = [
+    {"date": "2024-01-02", "symbol": "AAPL", "action": "BUY", "price": 100.0, "shares": 10.0},
+    {"date": "2024-01-03", "symbol": "MSFT", "action": "SELL", "price": 300.0, "shares": 5.0},
+    {"date": "2024-01-04", "symbol": "AAPL", "action": "BUY", "price": 105.0, "shares": 10.0},
+    {"date": "2024-01-10", "symbol": "AAPL", "action": "SELL", "price": 110.0, "shares": 10.0},
+    {"date": "2024-01-11", "symbol": "MSFT", "action": "BUY", "price": 310.0, "shares": 5.0},
+    {"date": "2024-01-20", "symbol": "AAPL", "action": "SELL", "price": 101.0, "shares": 10.0},
+    {"date": "2024-01-21", "symbol": "NVDA", "action": "BUY", "price": 500.0, "shares": 2.0},
+]
+
+
+def _reference_fifo(trades):
+    """Queue-based FIFO matching the table replaces."""
+    open_buys, pairs, unmatched = {}, [], []
+    for i, trade in enumerate(trades):
+        symbol = str(trade.get("symbol") or "").strip().upper()
+        if trade["action"] == "BUY":
+            open_buys.setdefault(symbol, []).append(i)
+        elif trade["action"] == "SELL":
+            if open_buys.get(symbol):
+                pairs.append((open_buys[symbol].pop(0), i))
+            else:
+                unmatched.append(i)
+    open_rows = [i for rows in open_buys.values() for i in rows]
+    return pairs, unmatched, open_rows
+
+
+class TestFromDicts:
+    def test_columns(self):
+        table = TradeTable.from_dicts(TRADES)
+        assert len(table) == len(TRADES)
+        assert table.symbols == ("AAPL", "MSFT", "NVDA")
+        assert table.symbol_code.tolist() == [0, 1, 0, 0, 1, 0, 2]
+        assert table.side.tolist()[:2] == [SIDE_BUY, SIDE_SELL]
+        assert table.price[3] == 110.0
+        assert table.date_ordinal[1] - table.date_ordinal[0] == 1
+
+    def test_normalises_symbol_and_action(self):
+        table = TradeTable.from_dicts([{"date": "2024-01-02", "symbol": " aapl ", "action": "buy ", "price": 1, "shares": 1}])
+        assert table.symbols == ("AAPL",)
+        assert table.side[0] == SIDE_BUY
+
+    def test_invalid_values_become_sentinels(self):
+        table = TradeTable.from_dicts([{"date": "01/02/2024", "symbol": None, "action": "HOLD", "price": "abc", "shares": None}])
+        assert table.date_ordinal[0] == -1
+        assert table.symbols == ("",)
+        assert table.side[0] == SIDE_OTHER
+        assert np.isnan(table.price[0]) and np.isnan(table.shares[0])
+
+    def test_keeps_raw_cells(self):
+        table = TradeTable.from_dicts([
+            {"date": "2024-01-02", "symbol": " aapl ", "action": "BUY", "price": "10.50", "shares": 0},
+            {"date": "", "timestamp": "01/09/2024", "symbol": None, "action": "hold", "price": None, "quantity": "3"},
+        ])
+        assert table.raw_symbol == (" aapl ", None)
+        assert table.raw_price == ("10.50", None)
+        assert table.raw_shares == (0, "3")
+        assert table.raw_date == ("2024-01-02", "01/09/2024")
+        assert table.actions == ("BUY", "HOLD")
+
+    def test_coerce_returns_existing_table(self):
+        table = TradeTable.from_dicts(TRADES)
+        assert TradeTable.coerce(table) is table
+
+    def test_empty(self):
+        table = TradeTable.from_dicts([])
+        assert len(table) == 0
+        assert table.fifo.buy_idx.size == table.fifo.open_buy_idx.size == 0
+
+
+class TestFifo:
+    def test_matches_known_trades(self):
+        fifo = TradeTable.from_dicts(TRADES).fifo
+        assert list(zip(fifo.buy_idx.tolist(), fifo.sell_idx.tolist())) == [(0, 3), (2, 5)]
+        assert fifo.unmatched_sell_idx.tolist() == [1]
+        assert fifo.open_buy_idx.tolist() == [4, 6]
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_queue_reference(self, seed):
+        rng = random.Random(seed)
+        trades = [
+            {"date": "2024-01-02", "symbol": rng.choice("ABCD"), "action": rng.choice(["BUY", "SELL"]), "price": 1, "shares": 1}
+            for _ in range(rng.randint(1, 60))
+        ]
+        pairs, unmatched, open_rows = _reference_fifo(trades)
+        fifo = TradeTable.from_dicts(trades).fifo
+        assert list(zip(fifo.buy_idx.tolist(), fifo.sell_idx.tolist())) == sorted(pairs, key=lambda p: p[1])
+        assert fifo.unmatched_sell_idx.tolist() == unmatched
+        assert fifo.open_buy_idx.tolist() == open_rows
+
+
+class TestConsumersAcceptTable:
+    def test_validate_trades_same_for_table_and_list(self):
+        trades = TRADES + [dict(TRADES[0]), {**TRADES[1], "price": -1}]
+        assert validate_trades(TradeTable.from_dicts(trades)) == validate_trades(list(trades))
+
+    def test_calculate_pnl_values(self):
+        result = calculate_pnl(TradeTable.from_dicts(TRADES))
+        assert [t["pnl"] for t in result["trade_pnl"]] == [100.0, -40.0]
+        assert result["total_pnl"] == 60.0
+        assert result["avg_holding_days_winners"] == 8
+        assert result["avg_holding_days_losers"] == 16
+
+    def test_concentration_risk_with_table(self):
+        warning = check_concentration_risk(TradeTable.from_dicts(TRADES))
+        assert warning["symbol"] == "AAPL"
+        assert warning["trade_count"] == 4
+
+    def test_normalised_table_matches_detailed(self):
+        table = TradeTable.from_dicts(TRADES)
+        normalised, is_summary = _to_normalised(table)
+        assert not is_summary
+        assert normalised == _normalise_detailed(TRADES)
+
+    def test_normalised_edge_rows(self):
+        trades = [
+            {"date": "2024-01-02", "action": "BUY", "price": 10, "shares": 1},
+            {"datetime": "2024-01-05", "symbol": None, "action": "SELL", "price": "12.5", "quantity": 2},
+            {"date": "", "timestamp": "01/09/2024", "symbol": "aapl", "action": "BUY", "price": None, "shares": 2},
+            {"date": None, "symbol": "AAPL", "action": "SELL", "price": "", "shares": "3"},
+            {"date": "2024-01-10", "symbol": "MSFT", "action": "HOLD", "price": "abc", "shares": "n/a"},
+        ]
+        normalised, _ = _to_normalised(TradeTable.from_dicts(trades))
+        assert [t.symbol for t in normalised] == ["UNKNOWN", "UNKNOWN", "AAPL", "AAPL"]
+        assert [(t.price, t.shares) for t in normalised] == [(10.0, 1.0), (12.5, 2.0), (0.0, 2.0), (0.0, 3.0)]
+        assert normalised[1].hold_days == 3 and normalised[1].profit == 5.0
+        assert normalised[2].entry_date == date(2024, 1, 9)
+        assert normalised[3].entry_date == date(2024, 1, 9) and normalised[3].exit_date is None
+
+    def test_non_numeric_price_raises_like_detailed(self):
+        trades = [{"date": "2024-01-02", "symbol": "AAPL", "action": "BUY", "price": "abc", "shares": 1}]
+        with pytest.raises(ValueError):
+            _normalise_detailed(trades)
+        with pytest.raises(ValueError):
+            _to_normalised(TradeTable.from_dicts(trades))
+
+    def test_cost_calculators_accept_table(self):
+        table = TradeTable.from_dicts(TRADES)
+        assert calculate_commissions(table) == calculate_commissions(TRADES)
+        assert calculate_slippage(table) == calculate_slippage(TRADES)
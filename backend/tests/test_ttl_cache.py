@@ -0,0 +1,132 @@
+"""Tests for the bounded LRU + TTL cache used for benchmark lookups."""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+import benchmark as benchmark_module
+from benchmark import fetch_benchmark
+from ttl_cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_entries_expire_after_ttl(self):
+        clock = _Clock()
+        cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_none_uses_negative_ttl(self):
+        clock = _Clock()
+        cache = TTLCache(maxsize=4, ttl=100, negative_ttl=5, clock=clock)
+        cache.set("fail", None)
+        cache.set("ok", {"x": 1})
+        clock.now = 6
+        assert "fail" not in cache
+        assert "ok" in cache
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_hit_and_miss_counters(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.get_or_load("k", lambda: 1)
+        cache.get_or_load("k", lambda: 2)
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["loads"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_loader_errors_are_not_cached(self):
+        def _failing_loader():
+            raise RuntimeError("boom")
+
+        cache = TTLCache(maxsize=2, ttl=60)
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("k", _failing_loader)
+        assert cache.get_or_load("k", lambda: 5) == 5
+        assert cache.stats()["load_errors"] == 1
+
+    def test_single_flight_per_key(self):
+        cache = TTLCache(maxsize=4, ttl=60)
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def _loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", _loader))) for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        while cache.stats()["misses"] < 5:
+            time.sleep(0.005)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert calls == [1]
+        assert results == ["value"] * 5
+
+    @pytest.mark.parametrize("kwargs", [{"maxsize": 0, "ttl": 1}, {"maxsize": 1, "ttl": 0}])
+    def test_invalid_config_rejected(self, kwargs):
+        with pytest.raises(ValueError):
+            TTLCache(**kwargs)
+
+
+class TestBenchmarkCache:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        benchmark_module._cache.clear()
+        yield
+        benchmark_module._cache.clear()
+
+    @patch("market_data_provider.yf.download")
+    def test_failure_is_retried_after_negative_ttl(self, mock_dl, monkeypatch):
+        trades = [{"date": "2023-01-03"}, {"date": "2023-01-31"}]
+        mock_dl.side_effect = Exception("transient")
+        assert fetch_benchmark(trades, "SPY") is None
+        assert fetch_benchmark(trades, "SPY") is None
+        assert mock_dl.call_count == 1
+
+        # Expire the negative entry and let the next download succeed
+        clock = _Clock()
+        clock.now = time.monotonic() + benchmark_module.BENCHMARK_CACHE_NEGATIVE_TTL_SECONDS + 1
+        monkeypatch.setattr(benchmark_module._cache, "_clock", clock)
+        dates = pd.bdate_range("2023-01-03", "2023-01-31")
+        mock_dl.side_effect = None
+        mock_dl.return_value = pd.DataFrame({"Close": range(100, 100 + len(dates))}, index=dates)
+        assert fetch_benchmark(trades, "SPY") is not None
+        assert mock_dl.call_count == 2
+
+    def test_cache_stats_route(self, client):
+        resp = client.get("/cache-stats")
+        assert resp.status_code == 200
+        assert {"hits", "misses", "size", "maxsize"} <= resp.get_json()["benchmark"].keys()
@@ -0,0 +1,230 @@
+"""
+trade_table.py
+--------------
+Columnar in-memory representation of a detailed trade list.
+
+``parse_detailed`` / ``ingest_csv`` produce one small dict per trade.  The
+analysis modules used to walk that list independently, each re-normalising
+symbols and actions, re-parsing dates and re-running FIFO BUY→SELL matching.
+A ``TradeTable`` does that work once and stores the result as NumPy columns:
+
+  date_ordinal  int64    proleptic Gregorian ordinal, -1 if missing/unparseable
+  date_code     int32    index into ``dates`` (stripped raw date strings)
+  symbol_code   int32    index into ``symbols`` (upper-cased, stripped)
+  action_code   int32    index into ``actions`` (upper-cased, stripped)
+  side          int8     SIDE_BUY | SIDE_SELL | SIDE_OTHER
+  price         float64  NaN if missing or non-numeric
+  shares        float64  NaN if missing or non-numeric
+
+The raw date, symbol, price and share cells are kept as tuples so results
+that echo input values (dates, prices in messages) stay byte-for-byte
+identical.  The date falls back to ``datetime`` then ``timestamp`` and the
+share count to ``quantity`` when the primary key is blank.
+
+Public API
+----------
+TradeTable.from_dicts(trades)   →  TradeTable
+TradeTable.coerce(trades)       →  TradeTable   (accepts a table or a dict list)
+TradeTable.fifo                 →  FifoMatch    (cached FIFO round-trip matching)
+TradeTable.symbol_counts()      →  np.ndarray
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import Any, NamedTuple, Sequence
+
+import numpy as np
+
+SIDE_BUY: int = 1
+SIDE_SELL: int = -1
+SIDE_OTHER: int = 0
+
+_SIDES: dict[str, int] = {"BUY": SIDE_BUY, "SELL": SIDE_SELL}
+
+
+class FifoMatch(NamedTuple):
+    """FIFO BUY→SELL matching per symbol, as row indices into the table."""
+    buy_idx: np.ndarray             # BUY leg of each round trip
+    sell_idx: np.ndarray            # SELL leg of each round trip (ascending)
+    unmatched_sell_idx: np.ndarray  # SELLs with no open BUY, ascending
+    open_buy_idx: np.ndarray        # BUYs never closed; symbols in first-BUY order
+
+
+def _field(trade: dict, *keys: str) -> Any:
+    """First truthy value among keys, else whatever the first key holds."""
+    for key in keys:
+        value = trade.get(key)
+        if value:
+            return value
+    return trade.get(keys[0])
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _date_ordinal(value: str) -> int:
+    if not value:
+        return -1
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return -1
+
+
+def _groupwise_cumsum(values: np.ndarray, group: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Cumulative sum of values that restarts at every group boundary."""
+    total = np.cumsum(values)
+    before_group = (total - values)[starts]
+    return total - before_group[group]
+
+
+@dataclass(frozen=True, eq=False)
+class TradeTable:
+    """Columnar trade list; build with ``TradeTable.from_dicts``."""
+    date_ordinal: np.ndarray
+    date_code: np.ndarray
+    symbol_code: np.ndarray
+    action_code: np.ndarray
+    side: np.ndarray
+    price: np.ndarray
+    shares: np.ndarray
+    symbols: tuple[str, ...]
+    dates: tuple[str, ...]
+    actions: tuple[str, ...]
+    raw_date: tuple[Any, ...]
+    raw_symbol: tuple[Any, ...]
+    raw_price: tuple[Any, ...]
+    raw_shares: tuple[Any, ...]
+
+    @classmethod
+    def from_dicts(cls, trades: Sequence[dict]) -> TradeTable:
+        """Build a table from trade dicts (keys: date, symbol, action, price, shares)."""
+        symbol_index: dict[str, int] = {}
+        date_index: dict[str, int] = {}
+        action_index: dict[str, int] = {}
+        n = len(trades)
+        symbol_code = np.empty(n, dtype=np.int32)
+        date_code = np.empty(n, dtype=np.int32)
+        action_code = np.empty(n, dtype=np.int32)
+        raw_date: list[Any] = []
+        raw_symbol: list[Any] = []
+        raw_price: list[Any] = []
+        raw_shares: list[Any] = []
+
+        for i, trade in enumerate(trades):
+            symbol = trade.get("symbol")
+            date = _field(trade, "date", "datetime", "timestamp")
+            action = trade.get("action")
+            raw_symbol.append(symbol)
+            raw_date.append(date)
+            raw_price.append(trade.get("price"))
+            raw_shares.append(_field(trade, "shares", "quantity"))
+            symbol_code[i] = symbol_index.setdefault(str(symbol or "").strip().upper(), len(symbol_index))
+            date_code[i] = date_index.setdefault(str(date or "").strip(), len(date_index))
+            action = str(action).strip().upper() if action is not None else ""
+            action_code[i] = action_index.setdefault(action, len(action_index))
+
+        # Parse each distinct date string and action once rather than once per trade
+        ordinals = np.array([_date_ordinal(d) for d in date_index], dtype=np.int64)
+        sides = np.array([_SIDES.get(a, SIDE_OTHER) for a in action_index], dtype=np.int8)
+
+        return cls(
+            date_ordinal=ordinals[date_code] if n else np.empty(0, dtype=np.int64),
+            date_code=date_code,
+            symbol_code=symbol_code,
+            action_code=action_code,
+            side=sides[action_code] if n else np.empty(0, dtype=np.int8),
+            price=np.array([_to_float(v) for v in raw_price], dtype=np.float64),
+            shares=np.array([_to_float(v) for v in raw_shares], dtype=np.float64),
+            symbols=tuple(symbol_index),
+            dates=tuple(date_index),
+            actions=tuple(action_index),
+            raw_date=tuple(raw_date),
+            raw_symbol=tuple(raw_symbol),
+            raw_price=tuple(raw_price),
+            raw_shares=tuple(raw_shares),
+        )
+
+    @classmethod
+    def coerce(cls, trades: TradeTable | Sequence[dict]) -> TradeTable:
+        """Return trades unchanged if it is already a table, else build one."""
+        return trades if isinstance(trades, cls) else cls.from_dicts(trades)
+
+    def __len__(self) -> int:
+        return len(self.side)
+
+    def symbol_counts(self) -> np.ndarray:
+        """Number of trades per symbol code."""
+        return np.bincount(self.symbol_code, minlength=len(self.symbols))
+
+    @cached_property
+    def fifo(self) -> FifoMatch:
+        """Match each SELL to the oldest open BUY of the same symbol.
+
+        Vectorised equivalent of walking the trades with a per-symbol queue:
+        within a symbol, a SELL is unmatched exactly when the running
+        (sells - buys) deficit reaches a new positive maximum, and the k-th
+        matched SELL always closes the k-th BUY.
+        """
+        n = len(self)
+        empty = np.empty(0, dtype=np.intp)
+        if n == 0:
+            return FifoMatch(empty, empty, empty, empty)
+
+        order = np.argsort(self.symbol_code, kind="stable")
+        sym = self.symbol_code[order]
+        side = self.side[order]
+        is_buy = (side == SIDE_BUY).astype(np.int64)
+        is_sell = (side == SIDE_SELL).astype(np.int64)
+
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        np.not_equal(sym[1:], sym[:-1], out=new_group[1:])
+        starts = np.flatnonzero(new_group)
+        ends = np.r_[starts[1:], n] - 1
+        group = np.cumsum(new_group) - 1
+
+        buys = _groupwise_cumsum(is_buy, group, starts)
+        sells = _groupwise_cumsum(is_sell, group, starts)
+
+        # Running max of the deficit, restarted per group by lifting each group
+        # above every value of the groups before it
+        offset = group * (2 * n + 2)
+        unmatched = np.maximum(np.maximum.accumulate(sells - buys + offset) - offset, 0)
+        prev_unmatched = np.r_[0, unmatched[:-1]]
+        prev_unmatched[starts] = 0
+
+        sell_mask = is_sell.astype(bool)
+        unmatched_mask = sell_mask & (unmatched > prev_unmatched)
+        matched_mask = sell_mask & ~unmatched_mask
+
+        # k-th matched sell in a group closes the k-th buy of that group
+        buy_mask = is_buy.astype(bool)
+        buy_rows = order[buy_mask]
+        buys_before_group = (np.cumsum(is_buy) - is_buy)[starts]
+        rank = sells[matched_mask] - unmatched[matched_mask]
+        buy_idx = buy_rows[buys_before_group[group[matched_mask]] + rank - 1]
+        sell_idx = order[matched_mask]
+        by_sell = np.argsort(sell_idx, kind="stable")
+
+        # BUYs beyond the number of matched sells in their group stay open
+        matched_in_group = sells[ends] - unmatched[ends]
+        open_mask = buy_mask & (buys > matched_in_group[group])
+        first_buy_row = np.full(len(starts), n, dtype=np.intp)
+        np.minimum.at(first_buy_row, group[buy_mask], order[buy_mask])
+        open_rows = order[open_mask]
+        open_order = np.lexsort((open_rows, first_buy_row[group[open_mask]]))
+
+        return FifoMatch(
+            buy_idx=buy_idx[by_sell],
+            sell_idx=sell_idx[by_sell],
+            unmatched_sell_idx=np.sort(order[unmatched_mask]),
+            open_buy_idx=open_rows[open_order],
+        )
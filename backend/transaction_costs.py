@@ -17,10 +17,12 @@ calculate_bid_ask_spread(trades, …) →  dict
 calculate_taxes(trades, ...)        →  dict
 calculate_win_rate(trades)          →  dict
 calculate_real_costs(trades, account_size, config)  →  dict   ← main entry-point
+normalise_trades(trades)            →  NormalisedTrades
 
 Input formats accepted
 ----------------------
-A. Detailed trade list (list[dict] or list of rows from parsed CSV):
+A. Detailed trade list (list[dict] or list of rows from parsed CSV, or a
+   trade_table.TradeTable built from one):
    [
      {"date": "2024-01-15", "symbol": "AAPL", "action": "BUY",  "price": 185.50, "shares": 10},
      {"date": "2024-02-20", "symbol": "AAPL", "action": "SELL", "price": 195.20, "shares": 10},
@@ -37,7 +39,9 @@ B. Summary dict (when only aggregate metrics are available):
      "end_date":        "2025-12-31"
    }
 
-Both formats are normalised internally before computation.
+Both formats are normalised internally before computation.  Callers running
+several calculators over the same input can normalise once with
+``normalise_trades`` and pass the resulting ``NormalisedTrades`` to each.
 """
 
 from __future__ import annotations
@@ -47,6 +51,10 @@ from dataclasses import dataclass, field
 from datetime import datetime, date
 from typing import Any
 
+import numpy as np
+
+from trade_table import SIDE_BUY, SIDE_OTHER, TradeTable
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -156,44 +164,66 @@ def _parse_date(val: Any) -> date | None:
 
 def _normalise_detailed(trades: list[dict]) -> list[NormalisedTrade]:
     """Convert a list of raw trade dicts into NormalisedTrade objects."""
-    normalised: list[NormalisedTrade] = []
-    # Group into round-trips: match each BUY to its next SELL for the same symbol
-    open_positions: dict[str, list[NormalisedTrade]] = {}
+    return _normalise_table(TradeTable.from_dicts(trades))
 
-    for raw in trades:
-        action = str(raw.get("action", "")).upper().strip()
-        if action not in ("BUY", "SELL"):
-            continue
 
-        price  = float(raw.get("price",  0) or 0)
-        shares = float(raw.get("shares", 0) or raw.get("quantity", 0) or 0)
-        symbol = str(raw.get("symbol", "UNKNOWN")).upper().strip()
-        d      = _parse_date(raw.get("date") or raw.get("datetime") or raw.get("timestamp"))
-        tv     = abs(price * shares)
+def _normalise_table(table: TradeTable) -> list[NormalisedTrade]:
+    """Convert a TradeTable into NormalisedTrade objects.
+
+    BUY and SELL rows are kept and each SELL is paired with the table's FIFO
+    BUY for the same symbol.  A blank symbol is reported as "UNKNOWN" and a
+    blank price or share count as 0; a non-numeric one raises ValueError.
+    """
+    active = table.side != SIDE_OTHER
+    symbols = ["UNKNOWN" if not s else s for s in table.symbols]
+
+    # NaN marks a blank or non-numeric cell; float() raises on the latter
+    price = table.price.copy()
+    for i in np.flatnonzero(active & np.isnan(price)):
+        price[i] = float(table.raw_price[i] or 0)
+    shares = table.shares.copy()
+    for i in np.flatnonzero(active & np.isnan(shares)):
+        shares[i] = float(table.raw_shares[i] or 0)
+    trade_value = np.abs(price * shares)
+
+    # Parse each distinct date string once; date objects are taken as they are
+    parsed = [_parse_date(d) if d else None for d in table.dates]
+
+    def row_date(i: int) -> date | None:
+        raw = table.raw_date[i]
+        return parsed[table.date_code[i]] if not raw or isinstance(raw, str) else _parse_date(raw)
+
+    entry_row = dict(zip(table.fifo.sell_idx.tolist(), table.fifo.buy_idx.tolist()))
+
+    normalised: list[NormalisedTrade] = []
+    for i in np.flatnonzero(active).tolist():
+        d = row_date(i)
+        if table.side[i] == SIDE_BUY:
+            normalised.append(NormalisedTrade(
+                action="BUY",
+                price=float(price[i]),
+                shares=float(shares[i]),
+                trade_value=float(trade_value[i]),
+                entry_date=d,
+                symbol=symbols[table.symbol_code[i]],
+            ))
+            continue
 
         nt = NormalisedTrade(
-            action=action,
-            price=price,
-            shares=shares,
-            trade_value=tv,
-            entry_date=d if action == "BUY" else None,
-            exit_date=d  if action == "SELL" else None,
-            symbol=symbol,
+            action="SELL",
+            price=float(price[i]),
+            shares=float(shares[i]),
+            trade_value=float(trade_value[i]),
+            exit_date=d,
+            symbol=symbols[table.symbol_code[i]],
         )
-
-        if action == "BUY":
-            open_positions.setdefault(symbol, []).append(nt)
-            normalised.append(nt)
-        elif action == "SELL":
-            nt.exit_date = d
-            # Try to find matching BUY
-            if symbol in open_positions and open_positions[symbol]:
-                buy = open_positions[symbol].pop(0)
-                nt.entry_date = buy.entry_date
-                if nt.entry_date and nt.exit_date:
-                    nt.hold_days = (nt.exit_date - nt.entry_date).days
-                nt.profit = (nt.price - buy.price) * nt.shares
-            normalised.append(nt)
+        buy = entry_row.get(i)
+        if buy is not None:
+            nt.entry_date = row_date(buy)
+            if nt.entry_date and nt.exit_date:
+                nt.hold_days = (nt.exit_date - nt.entry_date).days
+            nt.profit = (nt.price - float(price[buy])) * nt.shares
+        normalised.append(nt)
 
     return normalised
 
@@ -248,13 +278,39 @@ def _is_summary(data: Any) -> bool:
     return isinstance(data, dict) and "initial_capital" in data
 
 
+@dataclass(frozen=True)
+class NormalisedTrades:
+    """Pre-normalised input shared by the calculators (see normalise_trades)."""
+    trades: list[NormalisedTrade]
+    is_summary: bool
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+
+def normalise_trades(data: Any) -> NormalisedTrades:
+    """
+    Normalise trades once (FIFO round-trip matching, date parsing) so that
+    every calculator given the result skips that work.
+    """
+    if isinstance(data, NormalisedTrades):
+        return data
+    normalised, is_summary = _to_normalised(data)
+    return NormalisedTrades(trades=normalised, is_summary=is_summary)
+
+
 def _to_normalised(data: Any) -> tuple[list[NormalisedTrade], bool]:
     """
     Returns (normalised_trades, is_summary_mode).
-    Accepts list[dict] (detailed) or dict (summary).
+    Accepts list[dict] or TradeTable (detailed), dict (summary), or an
+    already-normalised NormalisedTrades.
     """
+    if isinstance(data, NormalisedTrades):
+        return data.trades, data.is_summary
     if _is_summary(data):
         return _normalise_summary(data), True
+    if isinstance(data, TradeTable):
+        return _normalise_table(data), False
     if isinstance(data, list):
         return _normalise_detailed(data), False
     raise ValueError(
@@ -674,6 +730,9 @@ def calculate_real_costs(
     gross_return_pct: float = 0.0
     gross_profit_usd: float = 0.0
 
+    # Normalise once; every calculator below reuses the same round trips
+    context = normalise_trades(trades)
+
     if _is_summary(trades):
         initial = float(trades.get("initial_capital", account_size) or account_size)
         final   = float(trades.get("final_balance",   account_size) or account_size)
@@ -681,30 +740,29 @@ def calculate_real_costs(
         gross_return_pct = (gross_profit_usd / initial * 100) if initial else 0.0
     else:
         # Derive gross profit from sell-side trades
-        normalised, _ = _to_normalised(trades)
         gross_profit_usd = sum(
-            nt.profit for nt in normalised if nt.profit is not None
+            nt.profit for nt in context.trades if nt.profit is not None
         )
         gross_return_pct = (gross_profit_usd / account_size * 100) if account_size else 0.0
 
     # Run individual calculators
-    win_rate = calculate_win_rate(trades)
+    win_rate = calculate_win_rate(context)
     comm   = calculate_commissions(
-        trades,
+        context,
         commission_per_trade=config.commission_per_trade,
         commission_is_pct=config.commission_is_pct,
     )
     slip   = calculate_slippage(
-        trades,
+        context,
         slippage_pct=slippage_pct,
         preset=config.slippage_preset,
     )
     spread = calculate_bid_ask_spread(
-        trades,
+        context,
         spread_pct=config.spread_pct,
     )
     taxes  = calculate_taxes(
-        trades,
+        context,
         short_term_tax_rate=config.short_term_tax_rate,
         long_term_tax_rate=config.long_term_tax_rate,
         apply_taxes=config.apply_taxes,
@@ -737,7 +795,7 @@ def calculate_real_costs(
         warnings.append("Trading costs exceed 50% of gross profit — trade frequency may be too high.")
     if after_costs_and_tax_pct < 0 < gross_return_pct:
         warnings.append("Strategy is profitable gross but unprofitable after all costs and taxes.")
-    normalised_check, is_summary_mode = _to_normalised(trades)
+    normalised_check, is_summary_mode = context.trades, context.is_summary
     if len(normalised_check) < 30:
         warnings.append(
             f"Only {len(normalised_check)} trade legs detected. "
@@ -0,0 +1,183 @@
+"""
+ttl_cache.py
+------------
+Thread-safe, size-bounded LRU cache with per-entry expiry and single-flight
+loading.
+
+  - Entries expire after ``ttl`` seconds; ``None`` results (failed or empty
+    lookups) use the shorter ``negative_ttl`` so a transient error does not
+    poison a key for long.
+  - At most ``maxsize`` entries are kept; the least recently used is evicted.
+  - ``get_or_load`` runs at most one loader per key at a time.  Concurrent
+    callers for the same key wait for that load and share its result instead
+    of all hitting the upstream service (cache stampede).
+  - Hit / miss / load / eviction counters are available via ``stats()``.
+
+Public API
+----------
+TTLCache(maxsize, ttl, negative_ttl)
+TTLCache.get_or_load(key, loader)   →  value
+TTLCache.get(key, default)          →  value | default
+TTLCache.set(key, value)
+TTLCache.stats()                    →  dict
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_MISSING = object()
+
+
+class _Flight:
+    """An in-progress load that other callers for the same key can wait on."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class TTLCache:
+    """Bounded LRU cache with TTL expiry, negative caching and single-flight loads."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        negative_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        if ttl <= 0:
+            raise ValueError(f"ttl must be positive, got {ttl}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._load_errors = 0
+        self._evictions = 0
+
+    # ------------------------------------------------------------------
+    # Internal helpers (caller holds self._lock)
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        ttl = self.negative_ttl if value is None else self.ttl
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if absent or expired."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self._misses += 1
+                return default
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader once on a miss.
+
+        If another thread is already loading key, wait for it and return its
+        result.  Exceptions from loader are re-raised to every waiting caller
+        and are not cached.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self._hits += 1
+                return value
+            self._misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._loads += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            with self._lock:
+                self._load_errors += 1
+            raise
+        else:
+            with self._lock:
+                self._store(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._loads = self._load_errors = self._evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        """Counters for monitoring; hit_rate is None before the first lookup."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "loads": self._loads,
+                "load_errors": self._load_errors,
+                "evictions": self._evictions,
+                "inflight": len(self._inflight),
+            }